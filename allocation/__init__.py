@@ -1,7 +1,61 @@
-from .adaptive_allocation import minimization
-from .adaptive_randomization import (
-    double_biased_coin_minimize,
-    double_biased_coin_urn,
-    multi_arm_bandit,
-)
-from .randomization import *  # noqa
+"""
+Allocation provides functions to allocate new subjects to a trial.
+
+The functions are imported from their modules on first use (PEP 562), so
+``import allocation`` stays cheap for short lived processes, and NumPy is
+only imported by the functions that need it.
+"""
+
+# Maps each name the package exports to the module that defines it.
+_EXPORTS = {
+    "MinimizationAllocator": ".adaptive_allocation",
+    "minimization": ".adaptive_allocation",
+    "double_biased_coin_minimize": ".adaptive_randomization",
+    "double_biased_coin_urn": ".adaptive_randomization",
+    "multi_arm_bandit": ".adaptive_randomization",
+    "RejectionStats": ".randomization",
+    "block": ".randomization",
+    "complete": ".randomization",
+    "complete_max_deviation": ".randomization",
+    "cumsum": ".randomization",
+    "efrons_biased_coin": ".randomization",
+    "generalized_biased_coin": ".randomization",
+    "iter_block": ".randomization",
+    "iter_generalized_biased_coin": ".randomization",
+    "iter_random_block": ".randomization",
+    "max_deviation": ".randomization",
+    "random_block": ".randomization",
+    "random_treatment_order": ".randomization",
+    "simple": ".randomization",
+    "simple_max_deviation": ".randomization",
+    "smiths_exponent": ".randomization",
+    "stratification": ".randomization",
+    "weis_urn": ".randomization",
+    "williams_design": ".randomization",
+    "StratumRegistry": ".registry",
+    "AllocationSchedule": ".schedule",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    # Even importlib is imported on first use.
+    import importlib
+
+    if name in _EXPORTS:
+        module = importlib.import_module(_EXPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    try:
+        # Submodules, e.g. `allocation.vectorized`.
+        return importlib.import_module("." + name, __name__)
+    except ModuleNotFoundError as error:
+        if error.name != __name__ + "." + name:
+            raise
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -1,4 +1,18 @@
-import random
+from array import array
+
+from .rng import get_rng
+
+
+def _choose_minimum(sums, rng):
+    """Returns the index of the smallest of `sums`, breaking ties at random."""
+    if sum(sums) == 0:
+        # No assignment made yet, so make one at random
+        return rng.randint(0, len(sums) - 1)
+    min_value = min(sums)
+    groups = [i for i, j in enumerate(sums) if j == min_value]
+    if len(groups) > 1:
+        return rng.choice(groups)
+    return groups[0]
 
 
 class Minimization(object):
@@ -35,13 +49,16 @@ class Minimization(object):
         group_labels: (optional) a list of labels corresponding to each
             element in current_tally.  If not provided, it defaults to
             [1, ... len(current_tally)]
+        seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
 
     Return:
         group: the group label for the next allocation
 
     """
 
-    def __init__(self, current_tally=None, group_labels=None, seed=None):
+    def __init__(self, current_tally=None, group_labels=None, seed=None, rng=None):
         self.current_tally = current_tally
         if group_labels is not None:
             if len(group_labels) != self.target_length:
@@ -49,7 +66,8 @@ class Minimization(object):
                     "group_labels must be {} long".format(self.target_length)
                 )
         self.group_labels = group_labels
-        self.seed = seed or random.seed(seed)
+        self.seed = seed
+        self.rng = get_rng(seed, rng)
 
     @property
     def group(self):
@@ -60,23 +78,12 @@ class Minimization(object):
         sums = [0] * self.n_treatments
         for idx, tally in enumerate(self.current_tally):
             sums[idx] = sum(tally)
-        if sum(sums) == 0:
-            # No assignment made yet, so make one at random
-            idx = random.randint(0, self.n_treatments - 1)
-        else:
-            min_value = min(sums)
-            groups = [i for i, j in enumerate(sums) if j == min_value]
-            if len(groups) > 1:
-                idx = random.choice(groups)
-            else:
-                idx = groups[0]
+        idx = _choose_minimum(sums, self.rng)
 
         if self.group_labels:
-            print(self.group_labels)
             group = self.group_labels[idx]
         else:
             group = idx + 1
-        print(group)
         return group
 
     @property
@@ -103,8 +110,167 @@ class Minimization(object):
         return n_treatments
 
 
-def minimization(current_tally, group_labels=None, seed=None):
+def minimization(current_tally, group_labels=None, seed=None, rng=None):
     minimization = Minimization(
-        current_tally=current_tally, group_labels=group_labels, seed=seed
+        current_tally=current_tally, group_labels=group_labels, seed=seed, rng=rng
     )
     return minimization.group
+
+
+class MinimizationAllocator(object):
+
+    """A long-lived allocator for Minimization that keeps its own tallies.
+
+    :class:`Minimization` needs the caller to count, for every new subject,
+    how many subjects of each treatment share each of the subject's factor
+    levels.  This allocator instead keeps the counts for every treatment,
+    factor and level, and updates them as subjects are allocated, so each
+    allocation takes :math:`O(factors \\times treatments)` time.
+
+    The counts are held in one flat :class:`array.array` of length
+    :math:`treatments \\times levels`, indexed by treatment and then by the
+    position of the level among the levels of all factors.
+
+    Arguments:
+        factor_levels: a list with one element per factor to minimize over.
+            Each element is either the number of levels of the factor, in
+            which case the levels are ``0, ..., n - 1``, or a list of the
+            level labels.
+        n_treatments: (optional) the number of treatments.  If not provided,
+            it defaults to ``len(group_labels)``, or 2.
+        group_labels: (optional) a list of labels for the treatments.  If not
+            provided, it defaults to [1, ... n_treatments]
+        seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+        store: (optional) a :class:`allocation.state.StateStore` to keep the
+            counts in.  The counts are loaded from it, so an allocator built
+            with the same `factor_levels` and `n_treatments` carries on where
+            the last one stopped, and each allocation is written to it.
+        namespace: (optional) The namespace of the counts in `store`.  The
+            default is "minimization".
+
+    Examples:
+        >>> allocator = MinimizationAllocator([["Male", "Female"], 4], seed=1)
+        >>> allocator.allocate(["Female", 2])
+        1
+        >>> allocator.allocate(["Female", 3])
+        2
+    """
+
+    def __init__(
+        self,
+        factor_levels,
+        n_treatments=None,
+        group_labels=None,
+        seed=None,
+        rng=None,
+        store=None,
+        namespace="minimization",
+    ):
+        if n_treatments is None:
+            n_treatments = len(group_labels) if group_labels is not None else 2
+        if n_treatments < 2:
+            raise ValueError("n_treatments must be at least 2.")
+        if group_labels is not None and len(group_labels) != n_treatments:
+            raise ValueError("group_labels must be {} long".format(n_treatments))
+        self.n_treatments = n_treatments
+        self.group_labels = group_labels
+        self.seed = seed
+        self.rng = get_rng(seed, rng)
+
+        # For each factor, the offset of its first level in a treatment's
+        # counts and a map from level label to position.
+        self.offsets = []
+        self.level_index = []
+        n_levels = 0
+        for levels in factor_levels:
+            if isinstance(levels, int):
+                levels = range(levels)
+            self.offsets.append(n_levels)
+            self.level_index.append({level: idx for idx, level in enumerate(levels)})
+            n_levels += len(self.level_index[-1])
+        self.n_levels = n_levels
+        self.counts = array("l", [0]) * (n_treatments * n_levels)
+
+        # The store keys each count by treatment, factor and level.
+        self.store = store
+        self.namespace = namespace
+        if store is not None:
+            for (idx, factor, level), count in store.load(namespace).items():
+                self.counts[idx * n_levels + self.offsets[factor] + level] = count
+
+    def positions(self, subject_levels):
+        """Returns the position of each of the subject's levels in a
+        treatment's counts."""
+        if len(subject_levels) != len(self.offsets):
+            raise ValueError("subject_levels must be {} long".format(len(self.offsets)))
+        try:
+            return [
+                offset + index[level]
+                for offset, index, level in zip(
+                    self.offsets, self.level_index, subject_levels
+                )
+            ]
+        except KeyError as error:
+            raise ValueError("Unknown factor level {}.".format(error))
+
+    def tally(self, subject_levels):
+        """Returns the counts for a subject in the form used by
+        :class:`Minimization` as `current_tally`."""
+        positions = self.positions(subject_levels)
+        return [
+            [self.counts[treatment * self.n_levels + pos] for pos in positions]
+            for treatment in range(self.n_treatments)
+        ]
+
+    def allocate(self, subject_levels):
+        """Allocates a subject and adds it to the counts.
+
+        Arguments:
+            subject_levels: the subject's level of each factor, in the order
+                of `factor_levels`.
+
+        Return:
+            group: the group label for the subject.
+        """
+        positions = self.positions(subject_levels)
+        counts = self.counts
+        sums = [0] * self.n_treatments
+        for treatment in range(self.n_treatments):
+            start = treatment * self.n_levels
+            sums[treatment] = sum(counts[start + pos] for pos in positions)
+        idx = _choose_minimum(sums, self.rng)
+        self._add(idx, positions)
+
+        if self.group_labels:
+            return self.group_labels[idx]
+        return idx + 1
+
+    def record(self, group, subject_levels):
+        """Adds a subject allocated elsewhere to the counts.
+
+        Arguments:
+            group: the group label the subject was allocated to.
+            subject_levels: the subject's level of each factor, in the order
+                of `factor_levels`.
+        """
+        if self.group_labels:
+            idx = self.group_labels.index(group)
+        else:
+            idx = group - 1
+        self._add(idx, self.positions(subject_levels))
+
+    def _add(self, idx, positions):
+        if self.store is not None:
+            # One write, so a failure leaves no factor of the subject counted.
+            self.store.add_many(
+                self.namespace,
+                [
+                    ((idx, factor, pos - offset), 1)
+                    for factor, (offset, pos) in enumerate(zip(self.offsets, positions))
+                ],
+            )
+        start = idx * self.n_levels
+        for pos in positions:
+            self.counts[start + pos] += 1
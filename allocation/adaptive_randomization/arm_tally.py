@@ -0,0 +1,55 @@
+class ArmTally(object):
+
+    """Keeps the success and trial counts of each arm of a response-adaptive
+    trial.
+
+    :func:`multi_arm_bandit` and the Double Biased Coin functions take the
+    counts as arguments.  An ArmTally updates them as outcomes arrive, in
+    constant time, and can keep them in a :class:`allocation.state.StateStore`
+    so they survive a restart.
+
+    Arguments:
+        n_arms: (optional) The number of arms.  The default is 2.
+        store: (optional) a :class:`allocation.state.StateStore` to keep the
+            counts in.  The counts are loaded from it, and each outcome is
+            written to it.
+        namespace: (optional) The namespace of the counts in `store`.  The
+            default is "arms".
+
+    Examples:
+        >>> tally = ArmTally(3)
+        >>> tally.record(2, success=True)
+        >>> arm = multi_arm_bandit(3, tally.successes, tally.failures, seed=1)
+        >>> tally.successes, tally.trials
+        ([0, 0, 1], [0, 0, 1])
+    """
+
+    def __init__(self, n_arms=2, store=None, namespace="arms"):
+        self.successes = [0] * n_arms
+        self.trials = [0] * n_arms
+        self.store = store
+        self.namespace = namespace
+        if store is not None:
+            for (count, arm), value in store.load(namespace).items():
+                getattr(self, count)[arm] = value
+
+    @property
+    def failures(self):
+        """The number of failures of each arm."""
+        return [trials - s for trials, s in zip(self.trials, self.successes)]
+
+    def record(self, arm, success):
+        """Adds the outcome of a subject.
+
+        Args:
+            arm: The index of the arm the subject was allocated to.
+            success: Whether the outcome was a success.
+        """
+        if self.store is not None:
+            items = [(("trials", arm), 1)]
+            if success:
+                items.append((("successes", arm), 1))
+            self.store.add_many(self.namespace, items)
+        self.trials[arm] += 1
+        if success:
+            self.successes[arm] += 1
@@ -1,7 +1,7 @@
 import math
-import random
 
 from ..constants import CONTROL, TREATMENT
+from ..rng import get_rng
 
 
 class DoubleBiasedCoin(object):
@@ -14,6 +14,7 @@ class DoubleBiasedCoin(object):
         control_name=None,
         treatment_name=None,
         seed=None,
+        rng=None,
     ):
         if control_trials < control_success:
             raise ValueError(
@@ -28,8 +29,13 @@ class DoubleBiasedCoin(object):
         self.control_name = control_name or CONTROL
         self.treatment_name = treatment_name or TREATMENT
 
-        self.seed = seed + 10 * control_trials + treatment_trials if seed else None
-        random.seed(seed)
+        # Offsetting the seed by the trial counts gives a new draw for each
+        # selection while staying reproducible.
+        if seed is not None:
+            self.seed = seed + 10 * control_trials + treatment_trials
+        else:
+            self.seed = None
+        self.rng = get_rng(self.seed, rng)
 
         if control_trials > 1:
             self.p_c = float(control_success) / control_trials
@@ -49,7 +55,7 @@ class DoubleBiasedCoin(object):
         return self.get_group(cut)
 
     def get_group(self, cut):
-        test = random.random()
+        test = self.rng.random()
         if test < cut:
             group = self.control_name
         else:
@@ -1,5 +1,6 @@
 import math
-import random
+
+from ..rng import get_generator, get_rng
 
 
 def multi_arm_bandit(
@@ -12,14 +13,50 @@ def multi_arm_bandit(
     prior_beta=None,
     seed=None,
     method=None,
+    rng=None,
+    batch_size=None,
 ):
+    """Returns the arm to assign the next subject to in a multi-arm bandit.
+
+    Each arm's success probability has a Beta(`prior_alpha`, `prior_beta`)
+    prior, which is updated with the arm's successes and failures.
+
+    Args:
+        k: The number of arms.
+        successes: A list of length `k` of the number of successes per arm.
+        failures: A list of length `k` of the number of failures per arm.
+        t: (optional) The number of subjects assigned so far.  The default is
+            the sum of `successes` and `failures`.
+        T: (optional) The total number of subjects.
+        prior_alpha: (optional) The alpha of the Beta prior.  The default is
+            0.5.
+        prior_beta: (optional) The beta of the Beta prior.  The default is
+            0.5.
+        seed: (optional) The seed to provide to the RNG.
+        method: (optional) One of "Current Belief", "Thompson" or "UCB".  The
+            default is "Current Belief".
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+        batch_size: (optional) The number of subjects to assign at once
+            before the outcomes are updated.  Only used by "Thompson".
+
+    Raises:
+        ValueError: If `batch_size` is given with a method other than
+            "Thompson".
+
+    Returns:
+        int: the index of the arm, or a list of `batch_size` indices if
+            `batch_size` is given.
+    """
     prior_alpha = prior_alpha or 0.5
     prior_beta = prior_beta or 0.5
-    seed = seed or 79461734
     method = method or "Current Belief"
     t = t or sum(successes) + sum(failures)
 
-    random.seed(seed)
+    if batch_size is not None and method != "Thompson":
+        raise ValueError("`batch_size` is only supported by 'Thompson'.")
+
+    rng = get_rng(seed, rng)
 
     posterior_alphas = [prior_alpha + s for s in successes]
     posterior_betas = [prior_beta + f for f in failures]
@@ -29,11 +66,22 @@ def multi_arm_bandit(
         max_value = max(post_means)
         groups = [i for i, j in enumerate(post_means) if j == max_value]
         if len(groups) > 1:
-            group = random.choice(groups)
+            group = rng.choice(groups)
         else:
             group = groups[0]
     elif method == "Thompson":
-        group = t / 2 * T
+        # One posterior sample per arm and subject, drawn as a k x B matrix.
+        # Each subject goes to the arm with the largest sample.
+        generator = get_generator(rng=rng)
+        samples = generator.beta(
+            [[a] for a in posterior_alphas],
+            [[b] for b in posterior_betas],
+            size=(k, batch_size or 1),
+        )
+        groups = samples.argmax(axis=0).tolist()
+        if batch_size is None:
+            return groups[0]
+        return groups
     elif method == "UCB":
         if t == 0:
             groups = list(range(k))
@@ -47,7 +95,7 @@ def multi_arm_bandit(
             max_value = max(idxs)
             groups = [i for i, j in enumerate(idxs) if j == max_value]
         if len(groups) > 1:
-            group = random.choice(groups)
+            group = rng.choice(groups)
         else:
             group = groups[0]
     return group
@@ -0,0 +1,475 @@
+"""
+Benchmark is a module that times and memory-profiles the allocation functions
+across problem sizes, and compares the results against a stored baseline so
+that performance regressions are caught.
+
+Run it with::
+
+    python -m allocation.benchmark --output results.json
+    python -m allocation.benchmark --baseline results.json
+
+The second form exits with status 1 if any case got slower, or used more
+memory, than the baseline allows.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from . import adaptive_randomization, randomization
+from .adaptive_allocation import MinimizationAllocator, minimization
+
+SIZES = (10**3, 10**4, 10**5, 10**6, 10**7)
+GROUPS = (2, 5, 50)
+
+
+# Maps the name of each case to a function of (n_subjects, n_groups, seed)
+# that builds the inputs and returns the function to time, and to whether the
+# case uses `n_groups`.
+CASES = {}
+
+
+def case(name, uses_groups=True):
+    def register(make):
+        CASES[name] = (make, uses_groups)
+        return make
+
+    return register
+
+
+def _labels(n_subjects, n_groups):
+    return [i % n_groups + 1 for i in range(n_subjects)]
+
+
+def _consume(iterator):
+    for _ in iterator:
+        pass
+
+
+@case("cumsum", uses_groups=False)
+def _cumsum(n_subjects, n_groups, seed):
+    numbers = list(range(n_subjects))
+    # cumsum works in place, so each run gets a fresh copy.
+    return lambda: randomization.cumsum(numbers[:])
+
+
+@case("max_deviation")
+def _max_deviation(n_subjects, n_groups, seed):
+    labels = _labels(n_subjects, n_groups)
+    return lambda: randomization.max_deviation(labels, range(1, n_groups + 1))
+
+
+@case("simple")
+def _simple(n_subjects, n_groups, seed):
+    return lambda: randomization.simple(n_subjects, n_groups, seed=seed)
+
+
+@case("simple_weighted")
+def _simple_weighted(n_subjects, n_groups, seed):
+    p = list(range(1, n_groups + 1))
+    return lambda: randomization.simple(n_subjects, n_groups, p=p, seed=seed)
+
+
+@case("simple_max_deviation", uses_groups=False)
+def _simple_max_deviation(n_subjects, n_groups, seed):
+    return lambda: randomization.simple_max_deviation(n_subjects, seed=seed)
+
+
+@case("complete")
+def _complete(n_subjects, n_groups, seed):
+    labels = _labels(n_subjects, n_groups)
+    return lambda: randomization.complete(labels, seed=seed)
+
+
+@case("complete_max_deviation")
+def _complete_max_deviation(n_subjects, n_groups, seed):
+    labels = _labels(n_subjects, n_groups)
+    return lambda: randomization.complete_max_deviation(labels, seed=seed)
+
+
+@case("block")
+def _block(n_subjects, n_groups, seed):
+    return lambda: randomization.block(n_subjects, n_groups, 2 * n_groups, seed=seed)
+
+
+@case("iter_block")
+def _iter_block(n_subjects, n_groups, seed):
+    return lambda: _consume(
+        randomization.iter_block(n_subjects, n_groups, 2 * n_groups, seed=seed)
+    )
+
+
+@case("random_block")
+def _random_block(n_subjects, n_groups, seed):
+    block_lengths = [n_groups, 2 * n_groups, 3 * n_groups]
+    return lambda: randomization.random_block(
+        n_subjects, n_groups, block_lengths, seed=seed
+    )
+
+
+@case("iter_random_block")
+def _iter_random_block(n_subjects, n_groups, seed):
+    block_lengths = [n_groups, 2 * n_groups, 3 * n_groups]
+    return lambda: _consume(
+        randomization.iter_random_block(n_subjects, n_groups, block_lengths, seed=seed)
+    )
+
+
+@case("random_treatment_order")
+def _random_treatment_order(n_subjects, n_groups, seed):
+    return lambda: randomization.random_treatment_order(n_subjects, n_groups, seed=seed)
+
+
+@case("random_treatment_order_williams")
+def _random_treatment_order_williams(n_subjects, n_groups, seed):
+    return lambda: randomization.random_treatment_order(
+        n_subjects, n_groups, seed=seed, design="williams"
+    )
+
+
+@case("williams_design")
+def _williams_design(n_subjects, n_groups, seed):
+    def run():
+        # The designs are cached, so each run builds its design afresh.
+        randomization.williams_design.cache_clear()
+        randomization.williams_design(n_groups)
+
+    return run
+
+
+@case("efrons_biased_coin", uses_groups=False)
+def _efrons_biased_coin(n_subjects, n_groups, seed):
+    return lambda: randomization.efrons_biased_coin(n_subjects, seed=seed)
+
+
+@case("smiths_exponent", uses_groups=False)
+def _smiths_exponent(n_subjects, n_groups, seed):
+    return lambda: randomization.smiths_exponent(n_subjects, seed=seed)
+
+
+@case("weis_urn", uses_groups=False)
+def _weis_urn(n_subjects, n_groups, seed):
+    return lambda: randomization.weis_urn(n_subjects, seed=seed)
+
+
+@case("generalized_biased_coin")
+def _generalized_biased_coin(n_subjects, n_groups, seed):
+    return lambda: randomization.generalized_biased_coin(n_subjects, n_groups, seed=seed)
+
+
+@case("iter_generalized_biased_coin")
+def _iter_generalized_biased_coin(n_subjects, n_groups, seed):
+    return lambda: _consume(
+        randomization.iter_generalized_biased_coin(n_subjects, n_groups, seed=seed)
+    )
+
+
+@case("stratification")
+def _stratification(n_subjects, n_groups, seed):
+    # Ten equally sized strata.
+    strata = [n_subjects // 10] * 10
+    return lambda: randomization.stratification(
+        strata, n_groups, 2 * n_groups, seed=seed
+    )
+
+
+@case("minimization")
+def _minimization(n_subjects, n_groups, seed):
+    def run():
+        tally = [[0, 0] for _ in range(n_groups)]
+        for _ in range(n_subjects):
+            group = minimization(tally, seed=seed)
+            tally[group - 1][0] += 1
+            tally[group - 1][1] += 1
+
+    return run
+
+
+@case("minimization_allocator")
+def _minimization_allocator(n_subjects, n_groups, seed):
+    def run():
+        allocator = MinimizationAllocator([2, 4], n_treatments=n_groups, seed=seed)
+        for i in range(n_subjects):
+            allocator.allocate([i % 2, i % 4])
+
+    return run
+
+
+def _double_biased_coin(method):
+    def make(n_subjects, n_groups, seed):
+        def run():
+            success = [0, 0]
+            trials = [0, 0]
+            for i in range(n_subjects):
+                group = method(success[0], trials[0], success[1], trials[1], seed=seed)
+                arm = 0 if group == "Control" else 1
+                trials[arm] += 1
+                success[arm] += i % 3 == 0
+
+        return run
+
+    return make
+
+
+case("double_biased_coin_minimize", uses_groups=False)(
+    _double_biased_coin(adaptive_randomization.double_biased_coin_minimize)
+)
+case("double_biased_coin_urn", uses_groups=False)(
+    _double_biased_coin(adaptive_randomization.double_biased_coin_urn)
+)
+
+
+def _multi_arm_bandit(method):
+    def make(n_subjects, n_groups, seed):
+        def run():
+            successes = [0] * n_groups
+            failures = [0] * n_groups
+            for i in range(n_subjects):
+                arm = adaptive_randomization.multi_arm_bandit(
+                    n_groups, successes, failures, seed=seed, method=method
+                )
+                if i % 3 == 0:
+                    successes[arm] += 1
+                else:
+                    failures[arm] += 1
+
+        return run
+
+    return make
+
+
+case("multi_arm_bandit_current_belief")(_multi_arm_bandit("Current Belief"))
+case("multi_arm_bandit_thompson")(_multi_arm_bandit("Thompson"))
+case("multi_arm_bandit_ucb")(_multi_arm_bandit("UCB"))
+
+
+def measure(function, repeat=3):
+    """Times a function and measures the peak memory it allocates.
+
+    Args:
+        function: A function that takes no arguments.
+        repeat: (optional) The number of timed runs.  The default is 3.
+
+    Returns:
+        dict: the fastest of the timed runs in `seconds` and the peak
+            memory allocated by a separate, traced run in `peak_bytes`.
+    """
+    seconds = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if seconds is None or elapsed < seconds:
+            seconds = elapsed
+
+    # Tracing slows the function down, so memory is measured on its own run.
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": seconds, "peak_bytes": peak_bytes}
+
+
+# Times an import in a fresh interpreter, and lists the modules it loaded.
+_IMPORT_SCRIPT = """
+import sys, time
+before = set(sys.modules)
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(seconds, " ".join(sorted(set(sys.modules) - before)))
+"""
+
+
+def measure_import(module="allocation", repeat=5):
+    """Times a cold import of a module, each time in a new interpreter.
+
+    Args:
+        module: (optional) The name of the module to import.  The default is
+            "allocation".
+        repeat: (optional) The number of timed imports.  The default is 5.
+
+    Returns:
+        dict: the fastest of the imports in `seconds`, and the modules the
+            import loaded in `modules`.
+    """
+    # The new interpreter imports this copy of the package.
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    path = os.pathsep.join([root] + [os.environ.get("PYTHONPATH", "")])
+    seconds = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _IMPORT_SCRIPT.format(module=module)],
+            env=dict(os.environ, PYTHONPATH=path),
+            check=True,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        ).stdout.split()
+        elapsed = float(output[0])
+        if seconds is None or elapsed < seconds:
+            seconds = elapsed
+    return {"seconds": seconds, "modules": output[1:]}
+
+
+def run_benchmarks(
+    cases=None, sizes=SIZES, groups=GROUPS, repeat=3, max_seconds=None, seed=1
+):
+    """Runs the benchmark cases at every problem size.
+
+    Args:
+        cases: (optional) A list of the names of the cases in :data:`CASES`
+            to run.  The default is all of them.
+        sizes: (optional) The numbers of subjects to run each case with.
+        groups: (optional) The numbers of groups to run each case with.
+            Cases that do not take a number of groups only run with the
+            first.
+        repeat: (optional) The number of timed runs of each case.
+        max_seconds: (optional) Once a case takes longer than this, its
+            larger sizes are skipped.  The default is to run every size.
+        seed: (optional) The seed to provide to the functions.
+
+    Raises:
+        ValueError: If a case is unknown.
+
+    Returns:
+        dict: the results, in the format read by :func:`compare`.
+    """
+    if cases is None:
+        cases = list(CASES)
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        raise ValueError("Unknown cases: {}".format(", ".join(unknown)))
+
+    results = []
+    for case in cases:
+        make, uses_groups = CASES[case]
+        for n_groups in groups if uses_groups else groups[:1]:
+            for n_subjects in sorted(sizes):
+                result = measure(make(n_subjects, n_groups, seed), repeat)
+                result.update(case=case, n_subjects=n_subjects, n_groups=n_groups)
+                results.append(result)
+                if max_seconds is not None and result["seconds"] > max_seconds:
+                    break
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "import_seconds": measure_import(repeat=repeat)["seconds"],
+        "results": results,
+    }
+
+
+def compare(results, baseline, tolerance=0.25):
+    """Compares benchmark results against a baseline.
+
+    Args:
+        results: The results of :func:`run_benchmarks`.
+        baseline: Results of an earlier run of :func:`run_benchmarks`.
+        tolerance: (optional) The allowed relative increase in time or
+            memory.  The default is 0.25 (25%).
+
+    Returns:
+        list: a dict for each measurement that exceeds its baseline by more
+            than `tolerance`.  Cases missing from either run are ignored.
+            The time to import the package is compared as the case
+            "import".
+    """
+    expected = {
+        (result["case"], result["n_subjects"], result["n_groups"]): result
+        for result in baseline["results"]
+    }
+    regressions = []
+    before = baseline.get("import_seconds")
+    after = results.get("import_seconds")
+    if before and after and after > before * (1 + tolerance):
+        regressions.append(
+            {
+                "case": "import",
+                "n_subjects": 0,
+                "n_groups": 0,
+                "metric": "seconds",
+                "baseline": before,
+                "current": after,
+                "ratio": after / before,
+            }
+        )
+    for result in results["results"]:
+        key = (result["case"], result["n_subjects"], result["n_groups"])
+        if key not in expected:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            before = expected[key][metric]
+            after = result[metric]
+            if before > 0 and after > before * (1 + tolerance):
+                regressions.append(
+                    {
+                        "case": key[0],
+                        "n_subjects": key[1],
+                        "n_groups": key[2],
+                        "metric": metric,
+                        "baseline": before,
+                        "current": after,
+                        "ratio": after / before,
+                    }
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m allocation.benchmark", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--groups", nargs="+", type=int, default=GROUPS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-seconds", type=float)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+    if args.baseline and not os.path.exists(args.baseline):
+        # Baselines are machine specific, so none is shipped.
+        parser.error(
+            "the baseline {} does not exist; record one with --output {}".format(
+                args.baseline, args.baseline
+            )
+        )
+
+    results = run_benchmarks(
+        args.cases, args.sizes, args.groups, args.repeat, args.max_seconds
+    )
+    print("{:<54} {:10.4f}s".format("import allocation", results["import_seconds"]))
+    for result in results["results"]:
+        print(
+            "{case:<32} n={n_subjects:<9} groups={n_groups:<3} "
+            "{seconds:10.4f}s {peak_bytes:>14,d}B".format(**result)
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(
+                "REGRESSION {case} n={n_subjects} groups={n_groups} {metric}: "
+                "{baseline:.4g} -> {current:.4g} ({ratio:.2f}x)".format(**regression)
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
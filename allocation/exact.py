@@ -0,0 +1,265 @@
+"""
+Exact is a module that provides exact balance and predictability curves of
+the two group sequential designs, without simulation.
+
+Under :func:`allocation.randomization.efrons_biased_coin`,
+:func:`~allocation.randomization.smiths_exponent`,
+:func:`~allocation.randomization.weis_urn` and
+:func:`~allocation.randomization.block`, the probability that the next
+subject goes to group 1 depends only on the number of subjects so far and
+how many of them are in group 1.  The number in group 1 is a Markov chain,
+so its distribution can be carried forward one subject at a time.  Only the
+counts with a non-zero probability are kept, so a design of `n_subjects`
+costs :math:`O(n_{subjects} \\cdot range)`, where the range is the number of
+reachable counts, e.g. at most `block_length` for block randomization.
+"""
+
+import numbers
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+
+from .randomization import _block_template, _ratio
+
+
+def _efrons_biased_coin(bias=None):
+    if bias is None:
+        bias = 0.67
+    elif bias >= 1 or bias <= 0:
+        raise ValueError("`bias` must be in [0, 1].")
+
+    def probability(step, counts):
+        # The same comparisons as `efrons_biased_coin`, which compares the
+        # group 1 count with half of `step + 1`.
+        if step == 0:
+            return np.full(len(counts), 0.5)
+        return np.where(
+            2 * counts == step + 1, 0.5, np.where(2 * counts < step + 1, bias, 1 - bias)
+        )
+
+    return probability
+
+
+def _smiths_exponent(exponent=None):
+    if exponent is None:
+        exponent = 1
+    elif not isinstance(exponent, numbers.Number):
+        raise ValueError("`exponent` must be a number.")
+    elif exponent < 0:
+        # `smiths_exponent` divides by zero for the first subject.
+        raise ValueError("`exponent` must be non-negative.")
+
+    def probability(step, counts):
+        group_1 = counts.astype(np.float64) ** exponent
+        group_2 = (step + 1 - counts).astype(np.float64) ** exponent
+        return 1 - group_1 / (group_1 + group_2)
+
+    return probability
+
+
+def _weis_urn():
+    def probability(step, counts):
+        if step == 0:
+            return np.full(len(counts), 0.5)
+        return 1 - counts / (step + 1)
+
+    return probability
+
+
+def _block(n_groups, block_length, ratio=None):
+    if n_groups != 2:
+        raise ValueError("The exact analysis needs `n_groups` of 2.")
+    if block_length < 1:
+        raise ValueError("`block_length` must be at least 1.")
+    group_1_per_block = _block_template(n_groups, block_length, ratio).count(1)
+
+    def probability(step, counts):
+        position = step % block_length
+        in_block = counts - (step // block_length) * group_1_per_block
+        remaining = np.clip(group_1_per_block - in_block, 0, block_length - position)
+        return remaining / (block_length - position)
+
+    return probability
+
+
+# The designs of `analyze`, mapped to functions that take the design
+# parameters and return the probability that the subject at each step goes
+# to group 1, given the number of earlier subjects in group 1.
+DESIGNS = {
+    "block": _block,
+    "efrons_biased_coin": _efrons_biased_coin,
+    "smiths_exponent": _smiths_exponent,
+    "weis_urn": _weis_urn,
+}
+
+
+class ExactAnalysis(object):
+
+    """The exact imbalance and selection bias of a design.
+
+    The imbalance after subject :math:`k` is :math:`D_k = N_1 - N_2`, the
+    difference between the group sizes after the first :math:`k` subjects.
+    Every curve is an array of length `n_subjects`, whose :math:`k^{th}`
+    entry is for subject :math:`k + 1`.  Analyses are cached and shared, so
+    the arrays are read-only.
+
+    Attributes:
+        design: The name of the design.
+        params: A read-only mapping of the parameters of the design.
+        n_subjects: The number of subjects.
+        distribution: An array of length ``n_subjects + 1`` of the
+            probability that :math:`N_1 = c` after the last subject, for
+            each :math:`c`.
+        expected_imbalance: The expected absolute imbalance,
+            :math:`E|D_k|`, after each subject.
+        mean_square_imbalance: :math:`E[D_k^2]` after each subject, which is
+            the variance of :math:`D_k` for the designs that favour neither
+            group.
+        balance_probability: The probability that :math:`D_k = 0` after each
+            subject.
+        correct_guess_probability: The probability that the Blackwell-Hodges
+            convergence strategy correctly guesses the group of each
+            subject.
+    """
+
+    def __init__(
+        self,
+        design,
+        params,
+        distribution,
+        expected_imbalance,
+        mean_square_imbalance,
+        balance_probability,
+        correct_guess_probability,
+    ):
+        self.design = design
+        self.params = params
+        self.n_subjects = len(expected_imbalance)
+        self.distribution = distribution
+        self.expected_imbalance = expected_imbalance
+        self.mean_square_imbalance = mean_square_imbalance
+        self.balance_probability = balance_probability
+        self.correct_guess_probability = correct_guess_probability
+
+    @property
+    def expected_correct_guesses(self):
+        """The expected number of correct convergence guesses."""
+        return float(self.correct_guess_probability.sum())
+
+    @property
+    def selection_bias(self):
+        """The expected fraction of correct convergence guesses beyond the
+        half expected by chance, the expectation of
+        :func:`allocation.metrics.predictability`."""
+        return self.expected_correct_guesses / max(self.n_subjects, 1) - 0.5
+
+    def imbalance_probability(self, imbalance):
+        """Returns the probability that the absolute imbalance after the last
+        subject is `imbalance`."""
+        counts = (self.n_subjects + np.array([-imbalance, imbalance])) / 2
+        probability = 0.0
+        for count in set(counts.tolist()):
+            if count.is_integer() and 0 <= count <= self.n_subjects:
+                probability += self.distribution[int(count)]
+        return probability
+
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+@lru_cache(maxsize=128)
+def _analyze(design, n_subjects, params):
+    probability = DESIGNS[design](**dict(params))
+    expected_imbalance = np.zeros(n_subjects)
+    mean_square_imbalance = np.zeros(n_subjects)
+    balance_probability = np.zeros(n_subjects)
+    correct_guess_probability = np.zeros(n_subjects)
+
+    # The probabilities of group 1 counts ``low, ..., low + len(current) - 1``.
+    low = 0
+    current = np.ones(1)
+    for step in range(n_subjects):
+        counts = np.arange(low, low + len(current))
+        group_1 = probability(step, counts)
+
+        # The convergence strategy guesses the smaller group, or either when
+        # the groups are the same size.
+        imbalance = 2 * counts - step
+        correct = np.where(
+            imbalance < 0, group_1, np.where(imbalance > 0, 1 - group_1, 0.5)
+        )
+        correct_guess_probability[step] = current @ correct
+
+        following = np.zeros(len(current) + 1)
+        following[:-1] = current * (1 - group_1)
+        following[1:] += current * group_1
+        # Drop the counts that cannot be reached, e.g. within a block.
+        reachable = np.flatnonzero(following)
+        low += reachable[0]
+        current = following[reachable[0] : reachable[-1] + 1]
+
+        imbalance = 2 * np.arange(low, low + len(current)) - (step + 1)
+        expected_imbalance[step] = current @ np.abs(imbalance)
+        mean_square_imbalance[step] = current @ imbalance.astype(np.float64) ** 2
+        balance_probability[step] = current @ (imbalance == 0)
+
+    distribution = np.zeros(n_subjects + 1)
+    distribution[low : low + len(current)] = current
+    return ExactAnalysis(
+        design,
+        MappingProxyType(dict(params)),
+        _read_only(distribution),
+        _read_only(expected_imbalance),
+        _read_only(mean_square_imbalance),
+        _read_only(balance_probability),
+        _read_only(correct_guess_probability),
+    )
+
+
+def analyze(design, params):
+    """Calculate the exact imbalance and selection bias of a design.
+
+    Args:
+        design: The name of a design in :data:`DESIGNS`, e.g.
+            ``"efrons_biased_coin"``.
+        params: A dict of the keyword arguments of the design's function in
+            :mod:`allocation.randomization`, e.g. ``{"n_subjects": 100,
+            "bias": 0.67}``.  It must not contain `seed`, `rng` or
+            `as_schedule`.
+
+    Raises:
+        ValueError: If `design` is an unknown name, `n_subjects` is missing
+            or not a non-negative integer, a parameter is not hashable, e.g.
+            a list, or `params` are not valid parameters of the design.
+            Block randomization must have 2 groups.
+        TypeError: If `params` contains parameters the design does not take.
+
+    Returns:
+        ExactAnalysis: the exact curves of the design.  Analyses are cached
+            by design and parameters.
+
+    Examples:
+        >>> analysis = analyze("efrons_biased_coin", {"n_subjects": 50})
+        >>> round(analysis.selection_bias, 3)
+        0.09
+    """
+    if design not in DESIGNS:
+        raise ValueError(
+            "`design` must be one of {}.".format(", ".join(sorted(DESIGNS)))
+        )
+    params = dict(params)
+    n_subjects = params.pop("n_subjects", None)
+    if not isinstance(n_subjects, numbers.Integral) or n_subjects < 0:
+        raise ValueError("`n_subjects` must be a non-negative integer.")
+    if "ratio" in params:
+        params["ratio"] = _ratio(params["ratio"])
+    params = tuple(sorted(params.items()))
+    try:
+        hash(params)
+    except TypeError:
+        # Analyses are cached by their parameters.
+        raise ValueError("The values of `params` must be hashable.")
+    return _analyze(design, n_subjects, params)
@@ -0,0 +1,376 @@
+"""
+Instrumentation is a module that provides opt-in metrics for the allocation
+functions: call counts, latency histograms, RNG draw counts and, for the
+functions that reject candidate lists, rejection counts.
+
+Instrumentation is off by default and costs nothing while it is off.
+:func:`enable` replaces the functions with measuring wrappers, wherever the
+package binds them, and :func:`disable` puts the originals back.  Registries
+of functions, such as the schemes of :func:`allocation.simulation.simulate`,
+hold names that are looked up on each call, so they use the wrappers too.
+Only the outermost instrumented call is recorded, so a function that calls
+another, such as :func:`allocation.randomization.stratification` calling
+:func:`allocation.randomization.block`, is counted once::
+
+    registry = instrumentation.enable()
+    allocation.simple_max_deviation(100, max_iterations=1000)
+    print(registry.to_prometheus())
+    instrumentation.disable()
+"""
+
+import contextvars
+import functools
+import importlib
+import inspect
+import random
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+from .randomization import RejectionStats
+
+# Upper bounds of the latency histogram buckets, in seconds.
+LATENCY_BUCKETS = (
+    0.00001,
+    0.0001,
+    0.001,
+    0.01,
+    0.1,
+    1.0,
+    10.0,
+)
+
+# The functions to instrument, by module, and the methods, by module and
+# class.
+_FUNCTIONS = {
+    ".randomization": (
+        "simple",
+        "simple_max_deviation",
+        "complete",
+        "complete_max_deviation",
+        "block",
+        "random_block",
+        "random_treatment_order",
+        "efrons_biased_coin",
+        "smiths_exponent",
+        "weis_urn",
+        "generalized_biased_coin",
+        "stratification",
+    ),
+    ".adaptive_allocation": ("minimization",),
+    ".adaptive_randomization.double_biased_coin": (
+        "double_biased_coin_minimize",
+        "double_biased_coin_urn",
+    ),
+    ".adaptive_randomization.multi_arm_bandit": ("multi_arm_bandit",),
+    # The trial simulation is vectorized, so it calls none of the functions
+    # above.  `simulate` calls them for each replicate, so it is not wrapped.
+    ".simulation": ("simulate_trials",),
+}
+_METHODS = {
+    ".adaptive_allocation": (
+        ("Minimization", "group"),
+        ("MinimizationAllocator", "allocate"),
+    ),
+}
+
+# Functions that derive substreams from their seed, see
+# :func:`allocation.rng.root_entropy`.  Handing them an `rng` would change
+# their output, so their draws are not counted.
+_SUBSTREAM_FUNCTIONS = ("stratification", "simulate_trials")
+
+# Maps each installed wrapper to the function it wraps.
+_originals = {}
+_lock = threading.Lock()
+# Whether an instrumented call is running in the current context.
+_in_call = contextvars.ContextVar("in_call", default=False)
+
+
+class Histogram(object):
+
+    """A histogram of observations in fixed, cumulative buckets.
+
+    Arguments:
+        buckets: the upper bounds of the buckets, in increasing order.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One count per bucket, and one for observations above them all.
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        """Returns the number of observations at or below each bucket bound,
+        followed by the total."""
+        counts = []
+        total = 0
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+    def as_dict(self):
+        return {
+            "buckets": list(self.buckets),
+            "counts": self.cumulative_counts(),
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class MetricsRegistry(object):
+
+    """Holds counters and histograms, each labelled by function.
+
+    Metrics can be updated from several threads at once.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, function, amount=1):
+        """Adds `amount` to the counter `name` of `function`."""
+        with self._lock:
+            counter = self.counters.setdefault(name, {})
+            counter[function] = counter.get(function, 0) + amount
+
+    def observe(self, name, function, value):
+        """Adds an observation to the histogram `name` of `function`."""
+        with self._lock:
+            histogram = self.histograms.setdefault(name, {})
+            if function not in histogram:
+                histogram[function] = Histogram()
+            histogram[function].observe(value)
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+
+    def as_dict(self):
+        """Returns the metrics as ``{name: {function: value}}``, where the
+        value of a histogram is a dict of its cumulative bucket counts."""
+        with self._lock:
+            metrics = {name: dict(values) for name, values in self.counters.items()}
+            for name, values in self.histograms.items():
+                metrics[name] = {
+                    function: histogram.as_dict()
+                    for function, histogram in values.items()
+                }
+        return metrics
+
+    def to_prometheus(self):
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, values in sorted(self.counters.items()):
+                lines.append("# TYPE {} counter".format(name))
+                for function, value in sorted(values.items()):
+                    lines.append('{}{{function="{}"}} {}'.format(name, function, value))
+            for name, values in sorted(self.histograms.items()):
+                lines.append("# TYPE {} histogram".format(name))
+                for function, histogram in sorted(values.items()):
+                    bounds = [repr(bound) for bound in histogram.buckets] + ["+Inf"]
+                    counts = histogram.cumulative_counts()
+                    for bound, count in zip(bounds, counts):
+                        lines.append(
+                            '{}_bucket{{function="{}",le="{}"}} {}'.format(
+                                name, function, bound, count
+                            )
+                        )
+                    lines.append(
+                        '{}_sum{{function="{}"}} {!r}'.format(
+                            name, function, histogram.sum
+                        )
+                    )
+                    lines.append(
+                        '{}_count{{function="{}"}} {}'.format(
+                            name, function, histogram.count
+                        )
+                    )
+        return "\n".join(lines) + "\n"
+
+
+class CountingRandom(random.Random):
+
+    """A :class:`random.Random` that counts the draws made from it.
+
+    Every method of :class:`random.Random` draws through :meth:`random` or
+    :meth:`getrandbits`, so counting those counts every draw.  For the same
+    seed it produces the same numbers as :class:`random.Random`.
+    """
+
+    def __init__(self, seed=None):
+        self.draws = 0
+        super().__init__(seed)
+
+    def random(self):
+        self.draws += 1
+        return super().random()
+
+    def getrandbits(self, k):
+        self.draws += 1
+        return super().getrandbits(k)
+
+
+def _recorder(function, name, registry):
+    """Returns a wrapper of `function` that records its metrics as `name`."""
+    signature = inspect.signature(function)
+    parameters = signature.parameters
+    # Only functions that take an `rng` can be handed a counting one.  Others,
+    # such as the Double Biased Coin, derive their own seeds.
+    counts_draws = (
+        "rng" in parameters
+        and "seed" in parameters
+        and function.__name__ not in _SUBSTREAM_FUNCTIONS
+    )
+    counts_rejections = "stats" in parameters
+
+    def record(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        arguments = bound.arguments
+        rng = None
+        if counts_draws and arguments.get("rng") is None:
+            rng = arguments["rng"] = CountingRandom(arguments.get("seed"))
+        stats = None
+        if counts_rejections:
+            if arguments.get("stats") is None:
+                arguments["stats"] = RejectionStats()
+            stats = arguments["stats"]
+            before = stats.as_dict()
+
+        start = time.perf_counter()
+        try:
+            result = function(*bound.args, **bound.kwargs)
+        except Exception:
+            registry.inc("allocation_errors_total", name)
+            raise
+        finally:
+            registry.observe(
+                "allocation_latency_seconds", name, time.perf_counter() - start
+            )
+            registry.inc("allocation_calls_total", name)
+            if rng is not None:
+                registry.inc("allocation_rng_draws_total", name, rng.draws)
+
+        if stats is not None:
+            after = stats.as_dict()
+            for count in ("candidates", "accepted", "subjects_checked"):
+                registry.inc(
+                    "allocation_rejection_{}_total".format(count),
+                    name,
+                    after[count] - before[count],
+                )
+            if result is None:
+                registry.inc("allocation_rejection_gave_up_total", name)
+        return result
+
+    return record
+
+
+def _instrument(function, name, registry):
+    """Returns a wrapper of `function` that records its metrics as `name`,
+    unless it is called by another instrumented function."""
+    record = _recorder(function, name, registry)
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _in_call.get():
+            # The outer call records the metrics, and counts the draws of
+            # the `rng` it handed down.
+            return function(*args, **kwargs)
+        token = _in_call.set(True)
+        try:
+            return record(*args, **kwargs)
+        finally:
+            _in_call.reset(token)
+
+    return wrapper
+
+
+def _package_modules():
+    return [
+        module
+        for module_name, module in list(sys.modules.items())
+        if module is not None
+        and (module_name == __package__ or module_name.startswith(__package__ + "."))
+    ]
+
+
+def _rebind(replacements):
+    """Replaces every module level binding in the package, and every class
+    attribute, of each key of `replacements` by its value."""
+    for module in _package_modules():
+        for attribute, value in list(vars(module).items()):
+            if callable(value) and value in replacements:
+                setattr(module, attribute, replacements[value])
+
+
+def enabled():
+    """Returns whether the instrumentation is enabled."""
+    return bool(_originals)
+
+
+def enable(registry=None):
+    """Starts recording metrics for the allocation functions.
+
+    Args:
+        registry: (optional) The :class:`MetricsRegistry` to record to.  The
+            default is a new registry.
+
+    Returns:
+        MetricsRegistry: the registry the metrics are recorded to.
+    """
+    if registry is None:
+        registry = MetricsRegistry()
+    with _lock:
+        _disable()
+        wrappers = {}
+        for module_name, names in _FUNCTIONS.items():
+            module = importlib.import_module(module_name, __package__)
+            for name in names:
+                original = getattr(module, name)
+                wrappers[original] = _instrument(original, name, registry)
+        for module_name, methods in _METHODS.items():
+            module = importlib.import_module(module_name, __package__)
+            for class_name, name in methods:
+                cls = getattr(module, class_name)
+                original = vars(cls)[name]
+                label = class_name + "." + name
+                if isinstance(original, property):
+                    wrapper = property(_instrument(original.fget, label, registry))
+                else:
+                    wrapper = _instrument(original, label, registry)
+                setattr(cls, name, wrapper)
+                _originals[wrapper] = (cls, name, original)
+        _rebind(wrappers)
+        for original, wrapper in wrappers.items():
+            _originals[wrapper] = (None, None, original)
+    return registry
+
+
+def _disable():
+    functions = {}
+    for wrapper, (cls, name, original) in _originals.items():
+        if cls is None:
+            functions[wrapper] = original
+        else:
+            setattr(cls, name, original)
+    _rebind(functions)
+    _originals.clear()
+
+
+def disable():
+    """Stops recording metrics and restores the original functions."""
+    with _lock:
+        _disable()
@@ -0,0 +1,278 @@
+"""
+Metrics is a module that provides balance and predictability metrics of
+randomization lists, computed with NumPy over a matrix of many lists at once.
+
+Every function takes an array of shape ``(n_replicates, n_subjects)`` of
+group labels, such as the output of :func:`allocation.simulation.simulate`,
+and works along the rows.  A 1-D array is treated as a single list.
+:class:`StreamingMetrics` computes the same metrics over lists that arrive
+in chunks of subjects.
+"""
+
+import numpy as np
+
+
+def _as_rows(sequences):
+    return np.atleast_2d(np.asarray(sequences))
+
+
+def _imbalance(sequences, values, counts):
+    """Returns the imbalance after each subject, starting from `counts`, the
+    number of earlier subjects in each group of each row."""
+    n_replicates, n_subjects = sequences.shape
+    if len(values) == 0:
+        return np.zeros((n_replicates, n_subjects), dtype=np.int64)
+    highest = lowest = None
+    for position, value in enumerate(values):
+        # One group at a time keeps the working set at a few
+        # (n_replicates, n_subjects) arrays.
+        group_counts = np.cumsum(sequences == value, axis=1, dtype=np.int64)
+        group_counts += counts[:, position, np.newaxis]
+        if highest is None:
+            highest, lowest = group_counts, group_counts.copy()
+        else:
+            np.maximum(highest, group_counts, out=highest)
+            np.minimum(lowest, group_counts, out=lowest)
+    return np.subtract(highest, lowest, out=highest)
+
+
+def imbalance(sequences, values):
+    """Calculate the imbalance of each list after each subject.
+
+    The imbalance is the difference between the sizes of the largest and the
+    smallest group, i.e. :math:`|N_A - N_B|` for two groups.
+
+    Args:
+        sequences: An array of shape ``(n_replicates, n_subjects)`` of group
+            labels.
+        values: The group labels to compare.
+
+    Returns:
+        numpy.ndarray: an integer array of shape
+            ``(n_replicates, n_subjects)`` of the imbalance after each
+            subject.
+
+    Examples:
+        >>> imbalance([[1, 1, 2, 2], [1, 2, 1, 2]], [1, 2])
+        array([[1, 2, 1, 0],
+               [1, 0, 1, 0]])
+    """
+    sequences = _as_rows(sequences)
+    counts = np.zeros((len(sequences), len(values)), dtype=np.int64)
+    return _imbalance(sequences, values, counts)
+
+
+def _run_lengths(sequences, last_value, last_length):
+    """Returns the length of the run that ends at each subject, continuing
+    the runs of `last_value` of length `last_length` from earlier subjects."""
+    n_replicates, n_subjects = sequences.shape
+    starts = np.empty((n_replicates, n_subjects), dtype=bool)
+    starts[:, 0] = (last_length == 0) | (sequences[:, 0] != last_value)
+    np.not_equal(sequences[:, 1:], sequences[:, :-1], out=starts[:, 1:])
+    # The position of the latest start of a run at or before each subject, or
+    # -1 while the run from the earlier subjects continues.
+    index = np.arange(n_subjects)
+    run_starts = np.maximum.accumulate(np.where(starts, index, -1), axis=1)
+    lengths = index - run_starts
+    lengths += np.where(run_starts < 0, last_length[:, np.newaxis], 1)
+    return lengths
+
+
+def max_run_length(sequences):
+    """Calculate the longest run of subjects assigned to the same group in
+    each list.
+
+    Args:
+        sequences: An array of shape ``(n_replicates, n_subjects)`` of group
+            labels.
+
+    Returns:
+        numpy.ndarray: an integer array of length `n_replicates` of the
+            length of the longest run in each list, or 0 for empty lists.
+
+    Examples:
+        >>> max_run_length([[1, 1, 2, 2, 2, 1], [1, 2, 1, 2, 1, 2]])
+        array([3, 1])
+    """
+    sequences = _as_rows(sequences)
+    n_replicates, n_subjects = sequences.shape
+    if n_subjects == 0:
+        return np.zeros(n_replicates, dtype=np.int64)
+    no_runs = np.zeros(n_replicates, dtype=np.int64)
+    return _run_lengths(sequences, sequences[:, 0], no_runs).max(axis=1)
+
+
+def _correct_guesses(sequences, values, counts):
+    """Returns the expected number of correct convergence guesses in each
+    row, starting from `counts`, the number of earlier subjects in each group
+    of each row."""
+    n_replicates, n_subjects = sequences.shape
+
+    def group_sizes_before(position, assigned):
+        before = np.cumsum(assigned, axis=1, dtype=np.int64)
+        before -= assigned
+        before += counts[:, position, np.newaxis]
+        return before
+
+    # The smallest group size before each subject.
+    fewest = None
+    for position, value in enumerate(values):
+        before = group_sizes_before(position, sequences == value)
+        fewest = before if fewest is None else np.minimum(fewest, before)
+
+    # Guessing among the tied smallest groups at random is right with
+    # probability 1 / ties when the subject's group is one of them.
+    ties = np.zeros((n_replicates, n_subjects), dtype=np.int64)
+    in_fewest = np.zeros((n_replicates, n_subjects), dtype=bool)
+    for position, value in enumerate(values):
+        assigned = sequences == value
+        is_fewest = group_sizes_before(position, assigned) == fewest
+        ties += is_fewest
+        in_fewest |= is_fewest & assigned
+    guesses = np.zeros((n_replicates, n_subjects), dtype=np.float64)
+    np.divide(1.0, ties, out=guesses, where=in_fewest)
+    return guesses.sum(axis=1)
+
+
+def correct_guesses(sequences, values):
+    """Calculate the expected number of correct guesses of the Blackwell-Hodges
+    convergence strategy in each list.
+
+    Before each subject, an observer who knows the earlier assignments
+    guesses that the subject goes to the group with the fewest subjects so
+    far, choosing at random among ties.
+
+    Args:
+        sequences: An array of shape ``(n_replicates, n_subjects)`` of group
+            labels.
+        values: The group labels to guess from.
+
+    Returns:
+        numpy.ndarray: an array of length `n_replicates` of the expected
+            number of correct guesses in each list.
+
+    Examples:
+        >>> correct_guesses([[1, 2, 2, 1], [1, 1, 2, 2]], [1, 2])
+        array([3. , 2.5])
+    """
+    sequences = _as_rows(sequences)
+    counts = np.zeros((len(sequences), len(values)), dtype=np.int64)
+    return _correct_guesses(sequences, values, counts)
+
+
+def predictability(sequences, values):
+    """Calculate the Blackwell-Hodges selection bias of each list.
+
+    This is the expected number of correct convergence guesses beyond those
+    expected by pure chance, :math:`n_{subjects} / n_{groups}`, as a
+    fraction of the number of subjects.  It is 0 for a list that cannot be
+    predicted any better than by chance.
+
+    Args:
+        sequences: An array of shape ``(n_replicates, n_subjects)`` of group
+            labels.
+        values: The group labels to guess from.
+
+    Returns:
+        numpy.ndarray: an array of length `n_replicates` of the excess
+            fraction of correct guesses of each list.
+    """
+    sequences = _as_rows(sequences)
+    n_subjects = max(sequences.shape[1], 1)
+    return correct_guesses(sequences, values) / n_subjects - 1 / len(values)
+
+
+class StreamingMetrics(object):
+
+    """Computes the metrics of lists that arrive in chunks of subjects.
+
+    Only the group sizes, the current run and the running results of each
+    list are kept between chunks, so a list can be longer than fits in
+    memory.  After any number of chunks the results are the same as those of
+    the functions of this module on the subjects seen so far.
+
+    Arguments:
+        values: the group labels.
+        n_replicates: (optional) the number of lists.  The default is the
+            number of rows of the first chunk.  Until then the metrics are
+            empty arrays.
+
+    Attributes:
+        n_subjects: The number of subjects seen so far.
+        counts: An array of shape ``(n_replicates, n_groups)`` of the size of
+            each group of each list.
+        max_imbalance: The largest imbalance of each list so far.
+        max_run_length: The length of the longest run of each list so far.
+        correct_guesses: The expected number of correct convergence guesses
+            in each list so far.
+
+    Examples:
+        >>> from itertools import islice
+        >>> from allocation.randomization import iter_block
+        >>> metrics = StreamingMetrics([1, 2], n_replicates=1)
+        >>> subjects = iter_block(None, 2, 4, seed=1)
+        >>> for _ in range(10):
+        ...     metrics.update(list(islice(subjects, 100)))
+        >>> metrics.n_subjects, metrics.max_imbalance, metrics.imbalance
+        (1000, array([2]), array([0]))
+    """
+
+    def __init__(self, values, n_replicates=None):
+        self.values = list(values)
+        self.n_replicates = n_replicates
+        self.n_subjects = 0
+        self._start(n_replicates or 0)
+
+    def _start(self, n_replicates):
+        n_groups = len(self.values)
+        self.counts = np.zeros((n_replicates, n_groups), dtype=np.int64)
+        self.max_imbalance = np.zeros(n_replicates, dtype=np.int64)
+        self.max_run_length = np.zeros(n_replicates, dtype=np.int64)
+        self.correct_guesses = np.zeros(n_replicates, dtype=np.float64)
+        self._last_value = None
+        self._run_length = np.zeros(n_replicates, dtype=np.int64)
+
+    def update(self, chunk):
+        """Adds the next subjects of each list.
+
+        Args:
+            chunk: An array of shape ``(n_replicates, n_chunk)`` of the group
+                labels of the next subjects of each list.  A 1-D array is
+                treated as a single list.
+
+        Raises:
+            ValueError: If the number of lists differs from `n_replicates`
+                or from earlier chunks.
+        """
+        chunk = _as_rows(chunk)
+        if self.n_replicates is None:
+            self.n_replicates = len(chunk)
+            self._start(self.n_replicates)
+        elif len(chunk) != self.n_replicates:
+            raise ValueError("Every chunk must have {} rows.".format(self.n_replicates))
+        if chunk.shape[1] == 0:
+            return
+
+        trajectory = _imbalance(chunk, self.values, self.counts)
+        np.maximum(self.max_imbalance, trajectory.max(axis=1), out=self.max_imbalance)
+        self.correct_guesses += _correct_guesses(chunk, self.values, self.counts)
+        last_value = chunk[:, 0] if self._last_value is None else self._last_value
+        lengths = _run_lengths(chunk, last_value, self._run_length)
+        np.maximum(self.max_run_length, lengths.max(axis=1), out=self.max_run_length)
+        self._last_value = chunk[:, -1].copy()
+        self._run_length = lengths[:, -1].copy()
+
+        for position, value in enumerate(self.values):
+            self.counts[:, position] += (chunk == value).sum(axis=1)
+        self.n_subjects += chunk.shape[1]
+
+    @property
+    def imbalance(self):
+        """The imbalance of each list after the last subject."""
+        return self.counts.max(axis=1) - self.counts.min(axis=1)
+
+    @property
+    def predictability(self):
+        """The Blackwell-Hodges selection bias of each list so far."""
+        n_subjects = max(self.n_subjects, 1)
+        return self.correct_guesses / n_subjects - 1 / len(self.values)
@@ -3,8 +3,14 @@ Randomization is a module that provides functions to create random group
 assignments to be used in clinical trials
 """
 
-import random
+import contextvars
+import math
 import numbers
+import random
+from functools import lru_cache
+
+from .rng import get_rng, root_entropy, substream_seed
+from .schedule import AllocationSchedule, empty_codes
 
 
 def cumsum(numbers):
@@ -65,7 +71,138 @@ def max_deviation(lst, values):
     return max_deviation
 
 
-def simple(n_subjects, n_groups, p=None, seed=None):
+class RejectionStats(object):
+
+    """Counts the work done by the functions that reject candidate lists.
+
+    Pass an instance as `stats` to :func:`simple_max_deviation` or
+    :func:`complete_max_deviation`.  The counts accumulate over calls, so one
+    instance can summarise a whole configuration.
+
+    Attributes:
+        candidates: The number of candidate lists tried.
+        accepted: The number of candidate lists accepted.
+        subjects_checked: The number of subjects checked before each
+            candidate was accepted or abandoned.
+        subjects_total: The number of subjects the candidates would have had.
+    """
+
+    def __init__(self):
+        self.candidates = 0
+        self.accepted = 0
+        self.subjects_checked = 0
+        self.subjects_total = 0
+
+    def add(self, accepted, subjects_checked, n_subjects):
+        self.candidates += 1
+        self.accepted += int(accepted)
+        self.subjects_checked += subjects_checked
+        self.subjects_total += n_subjects
+
+    @property
+    def acceptance_rate(self):
+        """The fraction of candidates that were accepted."""
+        if self.candidates == 0:
+            return 0.0
+        return self.accepted / self.candidates
+
+    @property
+    def checked_fraction(self):
+        """The fraction of the candidates' subjects that had to be checked."""
+        if self.subjects_total == 0:
+            return 0.0
+        return self.subjects_checked / self.subjects_total
+
+    def as_dict(self):
+        return {
+            "candidates": self.candidates,
+            "accepted": self.accepted,
+            "subjects_checked": self.subjects_checked,
+            "subjects_total": self.subjects_total,
+            "acceptance_rate": self.acceptance_rate,
+            "checked_fraction": self.checked_fraction,
+        }
+
+
+def _breaks_deviation(count, n_assigned, total, expected_percent, max_allowed):
+    """Checks whether a group is at or past the deviation limit on either side
+    of one of its assignments.
+
+    `count` is the number of assignments to the group among the first
+    `n_assigned` subjects, and the next subject is assigned to the group.
+
+    Between two assignments to a group its deviation is a linear function of
+    the position, so its maximum is reached just before or just after one of
+    the group's assignments.  Checking those two points for each assignment
+    finds the same maximum as checking every group at every position.
+    """
+    before = abs(count - n_assigned * expected_percent) / total
+    after = abs(count + 1 - (n_assigned + 1) * expected_percent) / total
+    return before >= max_allowed or after >= max_allowed
+
+
+def _scan_within_deviation(groups, max_allowed_deviation):
+    """Checks a randomization list against a maximum deviation, stopping at
+    the first subject where it is reached.
+
+    Returns:
+        tuple: whether the list stays below `max_allowed_deviation` and the
+            number of subjects checked.
+    """
+    n_subjects = len(groups)
+    totals = {}
+    for group in groups:
+        totals[group] = totals.get(group, 0) + 1
+    expected_percents = {group: totals[group] / n_subjects for group in totals}
+
+    counts = dict.fromkeys(totals, 0)
+    for idx, group in enumerate(groups):
+        count = counts[group]
+        if _breaks_deviation(
+            count, idx, totals[group], expected_percents[group], max_allowed_deviation
+        ):
+            return False, idx + 1
+        counts[group] = count + 1
+    return True, n_subjects
+
+
+def _shuffle_within_deviation(subjects, totals, max_allowed_deviation, rng):
+    """Shuffles a copy of `subjects`, abandoning it as soon as its deviation
+    reaches `max_allowed_deviation`.
+
+    The Fisher-Yates shuffle used by :meth:`random.Random.shuffle` fixes the
+    list from the back.  Because the totals of each group are known up front,
+    the counts of the unfixed front are the totals less the counts of the
+    fixed back, so every fixed subject can be checked straight away.
+
+    Returns:
+        tuple: the shuffled list, or None if it was abandoned, and the number
+            of subjects fixed.
+    """
+    n_subjects = len(subjects)
+    expected_percents = {group: totals[group] / n_subjects for group in totals}
+    counts = dict(totals)
+
+    groups = subjects[:]
+    for idx in range(n_subjects - 1, -1, -1):
+        if idx > 0:
+            swap = rng.randrange(idx + 1)
+            groups[idx], groups[swap] = groups[swap], groups[idx]
+        group = groups[idx]
+        # After this, `counts` holds the counts of the first `idx` subjects.
+        counts[group] -= 1
+        if _breaks_deviation(
+            counts[group],
+            idx,
+            totals[group],
+            expected_percents[group],
+            max_allowed_deviation,
+        ):
+            return None, n_subjects - idx
+    return groups, n_subjects
+
+
+def simple(n_subjects, n_groups, p=None, seed=None, rng=None, as_schedule=False):
     """Create a randomization list using simple randomization.
 
     Simple randomization randomly assigns each new subject to a group
@@ -77,6 +214,10 @@ def simple(n_subjects, n_groups, p=None, seed=None):
         p: (optional) The probability that a subject will be randomized to a
             group.  The length of p must be equal to n_groups.
         seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+        as_schedule: (optional) If True, return an :class:`AllocationSchedule`
+            instead of a list.  The default is False.
 
     Raises:
         ValueError: If the length of `p` is not equal to `n_groups`.
@@ -93,11 +234,11 @@ def simple(n_subjects, n_groups, p=None, seed=None):
         To be added
     """
 
-    random.seed(seed)
-    groups = []
+    rng = get_rng(seed, rng)
+    groups = empty_codes(n_groups) if as_schedule else []
     if p is None:
         for _ in range(0, n_subjects):
-            groups.append(random.randint(1, n_groups))
+            groups.append(rng.randint(1, n_groups))
     else:
         if len(p) is not n_groups:
             raise ValueError("The length of `p` must be equal to `n_groups`.")
@@ -105,7 +246,7 @@ def simple(n_subjects, n_groups, p=None, seed=None):
         p = [x / sum(p) for x in p]
         cumsum(p)
         for _ in range(0, n_subjects):
-            test = random.random()
+            test = rng.random()
             # Find which group the next obs should be assigned to.
             # HACKY - Let's make this better
             group = 0
@@ -113,11 +254,17 @@ def simple(n_subjects, n_groups, p=None, seed=None):
                 if elem < test:
                     group += 1
             groups.append(group + 1)
-    return groups
+    return AllocationSchedule(groups) if as_schedule else groups
 
 
 def simple_max_deviation(
-    n_subjects, max_allowed_deviation=None, max_iterations=None, seed=None
+    n_subjects,
+    max_allowed_deviation=None,
+    max_iterations=None,
+    seed=None,
+    rng=None,
+    stats=None,
+    as_schedule=False,
 ):
     """Create a randomization list using simple randomization.
 
@@ -136,6 +283,12 @@ def simple_max_deviation(
             list that satisfies the `max_deviation` criteria.  The default
             is 100.
         seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+        stats: (optional) A :class:`RejectionStats` to record the candidates
+            tried in.
+        as_schedule: (optional) If True, return an :class:`AllocationSchedule`
+            instead of a list.  The default is False.
 
     Returns:
         list: a list of length `len(subjects)` of the group labels of the
@@ -151,7 +304,7 @@ def simple_max_deviation(
         the maximum deviation and the greated the number of subjects
     """
 
-    random.seed(seed)
+    rng = get_rng(seed, rng)
 
     if max_allowed_deviation is None:
         max_allowed_deviation = 0.20
@@ -164,15 +317,19 @@ def simple_max_deviation(
         raise ValueError("`max_iterations` must be a postive integer.")
 
     for _ in range(max_iterations):
-        groups = simple(n_subjects, 2)
-
-        candidate_max_deviation = max_deviation(groups, [1, 2])
-        if candidate_max_deviation < max_allowed_deviation:
+        groups = simple(n_subjects, 2, rng=rng, as_schedule=as_schedule)
+
+        # The totals are only known once the whole list is drawn, but the
+        # check can still stop at the first subject that breaks the limit.
+        accepted, n_checked = _scan_within_deviation(groups, max_allowed_deviation)
+        if stats is not None:
+            stats.add(accepted, n_checked, n_subjects)
+        if accepted:
             return groups
     return None
 
 
-def complete(subjects, seed=None):
+def complete(subjects, seed=None, rng=None, as_schedule=False):
     """Create a randomization list using complete randomization.
 
     Complete randomization randomly shuffles a list of group labels.  This
@@ -182,6 +339,10 @@ def complete(subjects, seed=None):
     Args:
         subjects: A list of group labels to randomize.
         seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+        as_schedule: (optional) If True, return an :class:`AllocationSchedule`
+            instead of a list.  The default is False.
 
     Notes:
         Complete Randomization is prone to long runs of a single group.
@@ -196,16 +357,22 @@ def complete(subjects, seed=None):
         ["a", "b", "b", a", "a", "b"]
     """
 
-    random.seed(seed)
+    rng = get_rng(seed, rng)
     # We do not want to do the shuffle in place because it would break with
     # the pattern of the rest of the randomization functions
     groups = subjects[:]
-    random.shuffle(groups)
-    return groups
+    rng.shuffle(groups)
+    return AllocationSchedule.from_labels(groups) if as_schedule else groups
 
 
 def complete_max_deviation(
-    subjects, max_allowed_deviation=None, max_iterations=None, seed=None
+    subjects,
+    max_allowed_deviation=None,
+    max_iterations=None,
+    seed=None,
+    rng=None,
+    stats=None,
+    as_schedule=False,
 ):
     """Create a randomization list using complete randomization.
 
@@ -224,6 +391,12 @@ def complete_max_deviation(
             a list that satisfies the `max_deviation` criteria.  The
             default is 100.
         seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+        stats: (optional) A :class:`RejectionStats` to record the candidates
+            tried in.
+        as_schedule: (optional) If True, return an :class:`AllocationSchedule`
+            instead of a list.  The default is False.
 
     Returns:
         list: a list of length `len(subjects)` of the group labels of
@@ -240,7 +413,7 @@ def complete_max_deviation(
         subjects
     """
 
-    random.seed(seed)
+    rng = get_rng(seed, rng)
 
     if max_allowed_deviation is None:
         max_allowed_deviation = 0.20
@@ -252,21 +425,123 @@ def complete_max_deviation(
     elif not isinstance(max_iterations, int) or max_iterations <= 0:
         raise ValueError("`max_iterations` must be a postive integer.")
 
-    group_labels = set(subjects)
+    totals = {}
+    for subject in subjects:
+        totals[subject] = totals.get(subject, 0) + 1
 
     # We do not want to do the shuffle in place because it would break with
     # the pattern of the rest of the randomization functions
     for _ in range(max_iterations):
-        groups = subjects[:]
-        random.shuffle(groups)
-
-        candidate_max_deviation = max_deviation(groups, group_labels)
-        if candidate_max_deviation < max_allowed_deviation:
+        groups, n_checked = _shuffle_within_deviation(
+            subjects, totals, max_allowed_deviation, rng
+        )
+        if stats is not None:
+            stats.add(groups is not None, n_checked, len(subjects))
+        if groups is not None:
+            if as_schedule:
+                return AllocationSchedule.from_labels(groups)
             return groups
     return None
 
 
-def block(n_subjects, n_groups, block_length, seed=None):
+def _ratio(ratio):
+    """Returns `ratio` as a tuple, so it can key the cached templates."""
+    return tuple(ratio) if ratio is not None else None
+
+
+@lru_cache(maxsize=None)
+def _block_template(n_groups, block_length, ratio=None):
+    """Returns the unshuffled block of `block_length` group labels.
+
+    Without a `ratio`, the block is ``(1, 2, ..., n_groups, 1, 2, ...)``.
+    With one, group :math:`g` appears ``ratio[g - 1] * block_length /
+    sum(ratio)`` times.  Templates are cached and shared, so they are tuples.
+    """
+    if ratio is None:
+        # If n_groups is not a factor of block_length, there will be unbalance.
+        return tuple(i % n_groups + 1 for i in range(0, block_length))
+    if len(ratio) != n_groups:
+        raise ValueError("The length of `ratio` must be equal to `n_groups`.")
+    if block_length % sum(ratio):
+        raise ValueError("Block lengths must be multiples of the sum of `ratio`.")
+    repeats = block_length // sum(ratio)
+    return tuple(
+        group for group, share in enumerate(ratio, 1) for _ in range(share * repeats)
+    )
+
+
+@lru_cache(maxsize=None)
+def _alias_table(weights):
+    """Returns the probability and alias tables of Vose's alias method, which
+    draws index :math:`i` with probability proportional to ``weights[i]`` in
+    constant time."""
+    n_weights = len(weights)
+    total = float(sum(weights))
+    if min(weights) < 0 or total <= 0:
+        raise ValueError("`weights` must be non-negative and not all 0.")
+    scaled = [weight * n_weights / total for weight in weights]
+    probability = [1.0] * n_weights
+    alias = list(range(n_weights))
+    small = [i for i, weight in enumerate(scaled) if weight < 1]
+    large = [i for i, weight in enumerate(scaled) if weight >= 1]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        probability[less] = scaled[less]
+        alias[less] = more
+        scaled[more] -= 1 - scaled[less]
+        (small if scaled[more] < 1 else large).append(more)
+    # Anything left over has a probability of 1, up to rounding error.
+    return tuple(probability), tuple(alias)
+
+
+def _random_block_chooser(n_groups, block_lengths, rng, weights=None, ratio=None):
+    """Returns a function that picks the template of the next random block."""
+    n_block_lengths = len(block_lengths)
+    templates = [
+        _block_template(n_groups, block_length, ratio) for block_length in block_lengths
+    ]
+    if weights is None:
+        return lambda: templates[rng.randint(0, n_block_lengths - 1)]
+
+    if len(weights) != n_block_lengths:
+        raise ValueError("The length of `weights` must match `block_lengths`.")
+    probability, alias = _alias_table(tuple(weights))
+
+    def choose():
+        i = rng.randrange(n_block_lengths)
+        return templates[i if rng.random() < probability[i] else alias[i]]
+
+    return choose
+
+
+def _iter_shuffled_blocks(n_subjects, next_block_form, rng):
+    """Yields shuffled blocks until `n_subjects` subjects are covered.
+
+    Each block is a shuffled copy of the template returned by
+    `next_block_form`, so the templates are never modified.  The last block
+    is cut short so exactly `n_subjects` subjects are covered.  If
+    `n_subjects` is None, blocks are yielded indefinitely.
+    """
+    count = 0
+    while n_subjects is None or count < n_subjects:
+        this_block = list(next_block_form())
+        rng.shuffle(this_block)
+        count += len(this_block)
+        if n_subjects is not None and count > n_subjects:
+            yield this_block[: len(this_block) - (count - n_subjects)]
+        else:
+            yield this_block
+
+
+def block(
+    n_subjects,
+    n_groups,
+    block_length,
+    seed=None,
+    rng=None,
+    as_schedule=False,
+    ratio=None,
+):
     """Create a randomization list using block randomization.
 
     Block randomization takes blocks of group labels of length `block_length`,
@@ -280,6 +555,16 @@ def block(n_subjects, n_groups, block_length, seed=None):
         block_length: The length of the blocks.  `block` should be equal to
             :math:`k * n_{groups}, k > 1`.
         seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+        as_schedule: (optional) If True, return an :class:`AllocationSchedule`
+            instead of a list.  The default is False.
+        ratio: (optional) The allocation ratio of the groups within each
+            block, e.g. ``[2, 1]``.  The default is equal allocation.
+
+    Raises:
+        ValueError: If the length of `ratio` is not equal to `n_groups`, or
+            `block_length` is not a multiple of its sum.
 
     Returns:
         list: a list of length `n_subjects` of integers representing the
@@ -290,26 +575,66 @@ def block(n_subjects, n_groups, block_length, seed=None):
         ensure proper balance.
     """
 
-    random.seed(seed)
-    block_form = []
-    for i in range(0, block_length):
-        # If n_groups is not a factor of block_length, there will be unbalance.
-        block_form.append(i % n_groups + 1)
-
-    count = 0
-    groups = []
+    rng = get_rng(seed, rng)
+    block_form = _block_template(n_groups, block_length, _ratio(ratio))
+    groups = empty_codes(n_groups) if as_schedule else []
+    for this_block in _iter_shuffled_blocks(n_subjects, lambda: block_form, rng):
+        groups.extend(this_block)
+    return AllocationSchedule(groups) if as_schedule else groups
 
-    while count < n_subjects:
-        random.shuffle(block_form)
-        groups.extend(block_form)
-        count += block_length
 
-    # If `n_subjects` is not a multiple of `block_length`, only return the
-    # first `n_subjects` elements of `groups`
-    return groups[:n_subjects]
+def iter_block(
+    n_subjects,
+    n_groups,
+    block_length,
+    seed=None,
+    rng=None,
+    by_block=False,
+    ratio=None,
+):
+    """Lazily generate a randomization list using block randomization.
 
+    This is the streaming counterpart of :func:`block`.  Only the current
+    block is held in memory, and for the same seed the assignments are the
+    same as those returned by :func:`block`.
 
-def random_block(n_subjects, n_groups, block_lengths, seed=None):
+    Args:
+        n_subjects: The number of subjects to randomize.  If None, blocks
+            are generated indefinitely.
+        n_groups: The number of groups to randomize subjects to.
+        block_length: The length of the blocks.
+        seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+        by_block: (optional) If True, yield each block as a list instead of
+            each assignment.  The default is False.
+        ratio: (optional) The allocation ratio of the groups within each
+            block, e.g. ``[2, 1]``.  The default is equal allocation.
+
+    Yields:
+        int: the group of the next subject, or a list of the groups of the
+            next block if `by_block` is True.  The last block is cut short
+            when `n_subjects` is not a multiple of `block_length`.
+    """
+    rng = get_rng(seed, rng)
+    block_form = _block_template(n_groups, block_length, _ratio(ratio))
+    for this_block in _iter_shuffled_blocks(n_subjects, lambda: block_form, rng):
+        if by_block:
+            yield this_block
+        else:
+            yield from this_block
+
+
+def random_block(
+    n_subjects,
+    n_groups,
+    block_lengths,
+    seed=None,
+    rng=None,
+    as_schedule=False,
+    weights=None,
+    ratio=None,
+):
     """Create a randomization list by block randomization with random blocks.
 
     Block randomization takes blocks of group labels of length `block_length`,
@@ -326,6 +651,20 @@ def random_block(n_subjects, n_groups, block_lengths, seed=None):
         n_groups: The number of groups to randomize subjects to.
         block_lengths: A list of the length of the blocks.
         seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+        as_schedule: (optional) If True, return an :class:`AllocationSchedule`
+            instead of a list.  The default is False.
+        weights: (optional) The relative probability of each block length.
+            The default is to choose block lengths uniformly.
+        ratio: (optional) The allocation ratio of the groups within each
+            block, e.g. ``[2, 1]``.  The default is equal allocation.
+
+    Raises:
+        ValueError: If the length of `weights` is not equal to the length of
+            `block_lengths`, or the weights are negative or all 0.
+        ValueError: If the length of `ratio` is not equal to `n_groups`, or a
+            block length is not a multiple of its sum.
 
     Returns:
         list: a list of length `n_subjects` of integers representing the
@@ -335,31 +674,111 @@ def random_block(n_subjects, n_groups, block_lengths, seed=None):
         Each value in `block_lengths` should be a multiple of `n_groups`
         to ensure proper balance.
 
-    Todo:
-        - Implement weights for block lengths
+        Weighted block lengths are drawn with the alias method, in constant
+        time per block.
     """
-    random.seed(seed)
-    n_block_lengths = len(block_lengths)
-    blocks = []
-    for block_length in block_lengths:
-        block_form = []
-        for i in range(0, block_length):
-            block_form.append(i % n_groups + 1)
-        blocks.append(block_form)
-    count = 0
-    groups = []
-    while count < n_subjects:
-        this_block = blocks[random.randint(0, n_block_lengths - 1)]
-        random.shuffle(this_block)
+    rng = get_rng(seed, rng)
+    chooser = _random_block_chooser(
+        n_groups, block_lengths, rng, weights, _ratio(ratio)
+    )
+    groups = empty_codes(n_groups) if as_schedule else []
+    for this_block in _iter_shuffled_blocks(n_subjects, chooser, rng):
         groups.extend(this_block)
-        count += len(this_block)
-    # Due to the random selection of block lengths, you cannot guarentee that
-    # `len(groups) is n_subjects` therefore we only return the first
-    # `n_subjects` elements of `groups`
-    return groups[:n_subjects]
+    return AllocationSchedule(groups) if as_schedule else groups
+
+
+def iter_random_block(
+    n_subjects,
+    n_groups,
+    block_lengths,
+    seed=None,
+    rng=None,
+    by_block=False,
+    weights=None,
+    ratio=None,
+):
+    """Lazily generate a randomization list by block randomization with random
+    blocks.
+
+    This is the streaming counterpart of :func:`random_block`.  Only the
+    current block is held in memory, and for the same seed the assignments
+    are the same as those returned by :func:`random_block`.
+
+    Args:
+        n_subjects: The number of subjects to randomize.  If None, blocks
+            are generated indefinitely.
+        n_groups: The number of groups to randomize subjects to.
+        block_lengths: A list of the length of the blocks.
+        seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+        by_block: (optional) If True, yield each block as a list instead of
+            each assignment.  The default is False.
+        weights: (optional) The relative probability of each block length.
+            The default is to choose block lengths uniformly.
+        ratio: (optional) The allocation ratio of the groups within each
+            block, e.g. ``[2, 1]``.  The default is equal allocation.
+
+    Yields:
+        int: the group of the next subject, or a list of the groups of the
+            next block if `by_block` is True.  The last block is cut short so
+            that exactly `n_subjects` assignments are made.
+    """
+    rng = get_rng(seed, rng)
+    chooser = _random_block_chooser(
+        n_groups, block_lengths, rng, weights, _ratio(ratio)
+    )
+    for this_block in _iter_shuffled_blocks(n_subjects, chooser, rng):
+        if by_block:
+            yield this_block
+        else:
+            yield from this_block
+
+
+@lru_cache(maxsize=None)
+def williams_design(n_treatments):
+    """Returns the treatment sequences of a Williams design.
+
+    A Williams design is a Latin square for crossover studies in which every
+    treatment follows every other treatment equally often, so first order
+    carryover effects are balanced.  With an odd number of treatments, no
+    single square is balanced, so the design is a square and its mirror
+    image.
 
+    Args:
+        n_treatments: The number of treatments each subject will recieve.
+
+    Raises:
+        ValueError: If `n_treatments` is less than 1.
+
+    Returns:
+        tuple: a tuple of `n_treatments` sequences, or `2 * n_treatments` if
+            `n_treatments` is odd.  Each sequence is a tuple of the
+            treatments ``1, ..., n_treatments`` in the order they are given.
+            The result is cached, so it is shared by every call.
 
-def random_treatment_order(n_subjects, n_treatments, seed=None):
+    Examples:
+        >>> williams_design(4)
+        ((1, 2, 4, 3), (2, 3, 1, 4), (3, 4, 2, 1), (4, 1, 3, 2))
+    """
+    if n_treatments < 1:
+        raise ValueError("`n_treatments` must be at least 1.")
+    # The first sequence is 0, 1, n - 1, 2, n - 2, ...
+    first = [0]
+    for i in range(1, n_treatments):
+        first.append((i + 1) // 2 if i % 2 else n_treatments - i // 2)
+    sequences = [
+        tuple((treatment + shift) % n_treatments + 1 for treatment in first)
+        for shift in range(n_treatments)
+    ]
+    if n_treatments % 2 and n_treatments > 1:
+        sequences.extend([sequence[::-1] for sequence in sequences])
+    return tuple(sequences)
+
+
+def random_treatment_order(
+    n_subjects, n_treatments, seed=None, rng=None, as_schedule=False, design="random"
+):
     """Create a randomization list for studies where the subject recieves
     multiple treatments.
 
@@ -370,24 +789,52 @@ def random_treatment_order(n_subjects, n_treatments, seed=None):
         n_subjects: The number of subjects to randomize.
         n_treatments: The number of treatments a subject will
         seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+        as_schedule: (optional) If True, return an :class:`AllocationSchedule`
+            instead of a list.  The default is False.
+        design: (optional) "random" to give each subject an independent
+            random order, or "williams" to block randomize subjects to the
+            sequences of :func:`williams_design`, so that each block of
+            subjects covers every sequence once.  The default is "random".
+
+    Raises:
+        ValueError: If `design` is not "random" or "williams".
 
     Returns:
         list: a list of length `n_subjects` of lists of length `n_treatments`.
             Each sublist is treatment order of the subject.
     """
-
-    random.seed(seed)
-    treatment = []
-    for i in range(0, n_treatments):
-        treatment.append(i + 1)
-    groups = []
-    for i in range(0, n_subjects):
-        random.shuffle(treatment)
-        groups.append(treatment[:])
+    if design not in ("random", "williams"):
+        raise ValueError('`design` must be "random" or "williams".')
+
+    rng = get_rng(seed, rng)
+    groups = empty_codes(n_treatments) if as_schedule else []
+    if design == "williams":
+        sequences = williams_design(n_treatments)
+        rows = list(range(len(sequences)))
+        for this_block in _iter_shuffled_blocks(n_subjects, lambda: rows, rng):
+            for row in this_block:
+                if as_schedule:
+                    groups.extend(sequences[row])
+                else:
+                    groups.append(list(sequences[row]))
+    else:
+        treatment = []
+        for i in range(0, n_treatments):
+            treatment.append(i + 1)
+        for i in range(0, n_subjects):
+            rng.shuffle(treatment)
+            if as_schedule:
+                groups.extend(treatment)
+            else:
+                groups.append(treatment[:])
+    if as_schedule:
+        return AllocationSchedule(groups, width=n_treatments)
     return groups
 
 
-def efrons_biased_coin(n_subjects, bias=None, seed=None):
+def efrons_biased_coin(n_subjects, bias=None, seed=None, rng=None, as_schedule=False):
     """Create a randomization list using Efron's Biased Coin
 
     Efron's Biased Coin weights the assignment of a new subject by adjusting
@@ -401,6 +848,10 @@ def efrons_biased_coin(n_subjects, bias=None, seed=None):
         bias: (optional) The probability the new subject will be assigned to
             the under represented group.  The default is 0.67.
         seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+        as_schedule: (optional) If True, return an :class:`AllocationSchedule`
+            instead of a list.  The default is False.
 
     Returns:
         list: a list of length `n_subjects` of integers representing the
@@ -413,25 +864,27 @@ def efrons_biased_coin(n_subjects, bias=None, seed=None):
         Exact balance between groups is not guaranteed when using Efron's
         Biased Coin, but it is usually very close to balanced.
     """
-    random.seed(seed)
+    rng = get_rng(seed, rng)
     if bias is None:
         bias = 0.67
     else:
         if bias >= 1 or bias <= 0:
             raise ValueError("`bias` must be in [0, 1].")
-    group_0_count = 0.0
-    groups = []
+    group_0_count = 0
+    groups = empty_codes(2) if as_schedule else []
     for i in range(0, n_subjects):
-        if (group_0_count / (i + 1)) == 0.5 or i == 0:
+        # The same comparisons as `group_0_count / (i + 1)` against 0.5,
+        # done on integers.
+        if 2 * group_0_count == i + 1 or i == 0:
             # Balance
             cut = 0.5
-        elif group_0_count / (i + 1) < 0.5:
+        elif 2 * group_0_count < i + 1:
             # Too few from Group 0
             cut = 1 - bias
         else:
             # Too few from Group 1
             cut = bias
-        test = random.random()
+        test = rng.random()
         if test > cut:
             group = 1
         else:
@@ -439,10 +892,10 @@ def efrons_biased_coin(n_subjects, bias=None, seed=None):
         groups.append(group)
         if group == 1:
             group_0_count += 1
-    return groups
+    return AllocationSchedule(groups) if as_schedule else groups
 
 
-def smiths_exponent(n_subjects, exponent=None, seed=None):
+def smiths_exponent(n_subjects, exponent=None, seed=None, rng=None, as_schedule=False):
     """Create a randomization list using Smith's Exponent
 
     Smith's Exponent weights the assignment of a new subject by adjusting
@@ -459,6 +912,10 @@ def smiths_exponent(n_subjects, exponent=None, seed=None):
         exponent: (optional) Smith's Exponent (:math:`\\rho`).
             The default is 1.
         seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+        as_schedule: (optional) If True, return an :class:`AllocationSchedule`
+            instead of a list.  The default is False.
 
     Raises:
         ValueError: If `exponent` is not a number.
@@ -477,20 +934,20 @@ def smiths_exponent(n_subjects, exponent=None, seed=None):
         simple randomization and a negative exponent will cause one group to be
         over-represented in the list.
     """
-    random.seed(seed)
+    rng = get_rng(seed, rng)
     if exponent is None:
         exponent = 1
     else:
         if not isinstance(exponent, numbers.Number):
             raise ValueError("`exponent` must be a number.")
     group_0_count = 0.0
-    groups = []
+    groups = empty_codes(2) if as_schedule else []
     for i in range(0, n_subjects):
         # The plus one is to account for zero indexing.
         denom = group_0_count ** exponent + (i + 1 - group_0_count) ** exponent
         cut = group_0_count ** exponent / denom
 
-        test = random.random()
+        test = rng.random()
         if test > cut:
             group = 1
         else:
@@ -498,10 +955,10 @@ def smiths_exponent(n_subjects, exponent=None, seed=None):
         groups.append(group)
         if group == 1:
             group_0_count += 1
-    return groups
+    return AllocationSchedule(groups) if as_schedule else groups
 
 
-def weis_urn(n_subjects, seed=None):
+def weis_urn(n_subjects, seed=None, rng=None, as_schedule=False):
     """Create a randomization list using Wei's Urn.
 
     Wei's Urn weights the assignment of a new subject by adjusting the
@@ -522,6 +979,10 @@ def weis_urn(n_subjects, seed=None):
     Args:
         n_subjects: The number of subjects to randomize.
         seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+        as_schedule: (optional) If True, return an :class:`AllocationSchedule`
+            instead of a list.  The default is False.
 
     Returns:
         list: a list of length `n_subjects` of integers representing the
@@ -532,15 +993,15 @@ def weis_urn(n_subjects, seed=None):
         Urn, but it is usually very close to balanced.
     """
 
-    random.seed(seed)
+    rng = get_rng(seed, rng)
     group_0_count = 0.0
-    groups = []
+    groups = empty_codes(2) if as_schedule else []
     for i in range(0, n_subjects):
         if i > 0:
             cut = 1 - group_0_count / (i + 1)
         else:
             cut = 0.5
-        test = random.random()
+        test = rng.random()
         if test < cut:
             group = 1
         else:
@@ -548,10 +1009,180 @@ def weis_urn(n_subjects, seed=None):
         groups.append(group)
         if group == 1:
             group_0_count += 1
+    return AllocationSchedule(groups) if as_schedule else groups
+
+
+class _GroupCounts(object):
+
+    """The number of subjects in each group, kept in order of size so the
+    smallest groups are found, and a count is incremented, in constant time.
+
+    `order` lists the groups by increasing count, `position` is the index of
+    each group in `order`, and `first[c]` and `last[c]` are the first and
+    last index in `order` of the groups with count `c`.
+    """
+
+    def __init__(self, n_groups):
+        self.counts = [0] * n_groups
+        self.order = list(range(n_groups))
+        self.position = list(range(n_groups))
+        self.first = {0: 0}
+        self.last = {0: n_groups - 1}
+
+    def n_smallest(self):
+        """Returns the number of groups tied for the smallest count.  They
+        are ``order[:n_smallest]``."""
+        return self.last[self.counts[self.order[0]]] + 1
+
+    def add(self, group):
+        count = self.counts[group]
+        # Swap the group with the last group of the same count, which moves
+        # it to the front of the groups with one more.
+        i = self.position[group]
+        j = self.last[count]
+        other = self.order[j]
+        self.order[i], self.order[j] = other, group
+        self.position[other], self.position[group] = i, j
+        if j == self.first[count]:
+            del self.first[count], self.last[count]
+        else:
+            self.last[count] = j - 1
+        self.first[count + 1] = j
+        self.last.setdefault(count + 1, j)
+        self.counts[group] = count + 1
+
+
+def _check_generalized_biased_coin(n_groups, bias):
+    """Returns the bias of a generalized biased coin, checking its
+    arguments."""
+    if n_groups < 2:
+        raise ValueError("`n_groups` must be at least 2.")
+    if bias is None:
+        return 0.67
+    if bias >= 1 or bias <= 0:
+        raise ValueError("`bias` must be in [0, 1].")
+    return bias
+
+
+def iter_generalized_biased_coin(n_subjects, n_groups, bias=None, seed=None, rng=None):
+    """Lazily generate a randomization list using a generalized biased coin.
+
+    This is the streaming counterpart of :func:`generalized_biased_coin`.
+    Only the group sizes are held in memory, and for the same seed the
+    assignments are the same as those returned by
+    :func:`generalized_biased_coin`.
+
+    Args:
+        n_subjects: The number of subjects to randomize.  If None, subjects
+            are generated indefinitely.
+        n_groups: The number of groups to randomize subjects to.
+        bias: (optional) The probability the new subject will be assigned to
+            one of the smallest groups.  The default is 0.67.
+        seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+
+    Raises:
+        ValueError: If `n_groups` is less than 2, or `bias` is not in
+            [0, 1].
+
+    Yields:
+        int: the group of the next subject.
+    """
+    bias = _check_generalized_biased_coin(n_groups, bias)
+    rng = get_rng(seed, rng)
+    counts = _GroupCounts(n_groups)
+    i = 0
+    while n_subjects is None or i < n_subjects:
+        n_smallest = counts.n_smallest()
+        if n_smallest == n_groups:
+            # Balance
+            index = rng.randrange(n_groups)
+        elif rng.random() < bias:
+            index = rng.randrange(n_smallest)
+        else:
+            index = n_smallest + rng.randrange(n_groups - n_smallest)
+        group = counts.order[index]
+        counts.add(group)
+        i += 1
+        yield group + 1
+
+
+def generalized_biased_coin(
+    n_subjects, n_groups, bias=None, seed=None, rng=None, as_schedule=False
+):
+    """Create a randomization list using a generalized biased coin.
+
+    This extends Efron's Biased Coin to any number of groups.  When the
+    groups are balanced the new subject is assigned to a group at random.
+    Otherwise, they are assigned to one of the smallest groups, chosen at
+    random, with probability `bias`, and to one of the other groups, chosen
+    at random, with probability ``1 - bias``.  For 2 groups this is Efron's
+    rule applied to the current group sizes, which differs from
+    :func:`efrons_biased_coin`: that function compares group 1 with half of
+    the number of subjects so far plus one, so it treats group 1 being one
+    subject ahead as balance.
+
+    The group sizes are kept as integers, in order of size, so each subject
+    takes constant time whatever the number of groups.
+
+    Args:
+        n_subjects: The number of subjects to randomize.
+        n_groups: The number of groups to randomize subjects to.
+        bias: (optional) The probability the new subject will be assigned to
+            one of the smallest groups.  The default is 0.67.
+        seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+        as_schedule: (optional) If True, return an :class:`AllocationSchedule`
+            instead of a list.  The default is False.
+
+    Raises:
+        ValueError: If `n_groups` is less than 2, or `bias` is not in
+            [0, 1].
+
+    Returns:
+        list: a list of length `n_subjects` of integers representing the
+            groups each subject is assigned to.
+
+    Notes:
+        Exact balance between groups is not guaranteed, but the imbalance
+        stays small when `bias` is well above ``1 / n_groups``.
+    """
+    groups = empty_codes(n_groups) if as_schedule else []
+    groups.extend(
+        iter_generalized_biased_coin(n_subjects, n_groups, bias, seed=seed, rng=rng)
+    )
+    return AllocationSchedule(groups) if as_schedule else groups
+
+
+def _block_strata(
+    n_subjects_per_strata, start, n_groups, block_length, entropy, as_schedule
+):
+    """Randomizes the strata ``start, start + 1, ...`` of a stratification.
+
+    Each stratum draws from the substream of `entropy` at its own index, so
+    the lists do not depend on how the strata are split between workers.
+    """
+    groups = []
+    for index, n_subjects in enumerate(n_subjects_per_strata, start):
+        rng = random.Random(substream_seed(entropy, index))
+        groups.append(
+            block(n_subjects, n_groups, block_length, rng=rng, as_schedule=as_schedule)
+        )
     return groups
 
 
-def stratification(n_subjects_per_strata, n_groups, block_length=4, seed=None):
+def stratification(
+    n_subjects_per_strata,
+    n_groups,
+    block_length=4,
+    seed=None,
+    rng=None,
+    as_schedule=False,
+    workers=None,
+    executor="process",
+):
     """Create a randomization list for each strata using Block Randomization.
 
     If a study has several strata, each strata is seperately randomized using
@@ -563,6 +1194,20 @@ def stratification(n_subjects_per_strata, n_groups, block_length=4, seed=None):
         n_groups: The number of groups to randomize subjects to.
         block_length: The length of the blocks.
         seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            the root seed from.  When given, `seed` is ignored.
+        as_schedule: (optional) If True, each strata specific list is an
+            :class:`AllocationSchedule` instead of a list.  The default is
+            False.
+        workers: (optional) The number of workers to spread the strata over.
+            The default is to run in the current thread.
+        executor: (optional) "process" to run the workers in a
+            :class:`concurrent.futures.ProcessPoolExecutor`, or "thread" to
+            run them in a :class:`concurrent.futures.ThreadPoolExecutor`.
+            The default is "process".
+
+    Raises:
+        ValueError: If `executor` is not "process" or "thread".
 
     Returns:
         list: a list of length `len(n_subjects_per_strata)` of lists of length
@@ -573,16 +1218,53 @@ def stratification(n_subjects_per_strata, n_groups, block_length=4, seed=None):
         The value of `block_length` should be a multiple of `n_groups`
         to ensure proper balance.
 
+        Stratum :math:`i` is always randomized from the :math:`i^{th}`
+        substream of the seed, as given by
+        :func:`allocation.rng.substream_seed`, so the lists are the same for
+        any number of `workers`.
+
     Todo:
         Allow for multiple randomization techniques to be used.
     """
-
-    groups = []
-    for n_subjects_per_stratum in n_subjects_per_strata:
-        # Adding 52490, a dummy value, to the seed ensures a different list
-        # per strata.  The use of a 'magic number' here allows for
-        # reproducibility
-        if seed is not None:
-            seed = seed + 52490
-        groups.append(block(n_subjects_per_stratum, n_groups, block_length, seed))
-    return groups
+    if executor not in ("process", "thread"):
+        raise ValueError('`executor` must be "process" or "thread".')
+
+    n_subjects_per_strata = list(n_subjects_per_strata)
+    n_strata = len(n_subjects_per_strata)
+    entropy = root_entropy(seed, rng)
+    if workers is None or workers <= 1 or n_strata <= 1:
+        return _block_strata(
+            n_subjects_per_strata, 0, n_groups, block_length, entropy, as_schedule
+        )
+
+    # A few chunks per worker evens out strata of different sizes.
+    chunk_size = math.ceil(n_strata / (4 * workers))
+    starts = range(0, n_strata, chunk_size)
+    # Imported here, as it costs more to import than the rest of the package.
+    from concurrent import futures
+
+    tasks = [
+        (
+            n_subjects_per_strata[start : start + chunk_size],
+            start,
+            n_groups,
+            block_length,
+            entropy,
+            as_schedule,
+        )
+        for start in starts
+    ]
+    if executor == "process":
+        with futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = pool.map(_block_strata, *zip(*tasks))
+            return [stratum for chunk in chunks for stratum in chunk]
+
+    # Each task runs in its own copy of the caller's context, as two threads
+    # cannot enter the same one, so the workers see the caller's context
+    # variables, e.g. those of :mod:`allocation.instrumentation`.
+    with futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        chunks = [
+            pool.submit(contextvars.copy_context().run, _block_strata, *task)
+            for task in tasks
+        ]
+        return [stratum for chunk in chunks for stratum in chunk.result()]
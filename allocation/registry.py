@@ -0,0 +1,108 @@
+"""
+Registry is a module that provides lazily created strata for stratified block
+randomization over the cross product of several factors.
+"""
+
+import random
+
+from .randomization import iter_block
+from .rng import root_entropy, substream_seed
+
+
+class StratumRegistry(object):
+
+    """Allocates subjects by block randomization within their stratum.
+
+    A stratum is a combination of one level of each factor, e.g. site x sex
+    x age band.  :func:`allocation.randomization.stratification` builds the
+    list of every stratum up front, which is wasteful when most of the cross
+    product never enrolls anyone.  The registry instead starts the block
+    generator of a stratum when its first subject is allocated, and keeps
+    only the current block and the RNG of each stratum that has subjects.
+
+    Each stratum draws from the substream of the seed at its position in the
+    cross product, with the last factor varying fastest, so its list does not
+    depend on the order the strata are enrolled in.  For the same seed,
+    stratum :math:`i` gets the same list as the :math:`i^{th}` list of
+    :func:`allocation.randomization.stratification`.
+
+    Arguments:
+        factor_levels: a list with one element per factor to stratify by.
+            Each element is either the number of levels of the factor, in
+            which case the levels are ``0, ..., n - 1``, or a list of the
+            level labels.
+        n_groups: The number of groups to randomize subjects to.
+        block_length: (optional) The length of the blocks.  The default is 4.
+        seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            the root seed from.  When given, `seed` is ignored.
+
+    Examples:
+        >>> registry = StratumRegistry([["A", "B"], ["Male", "Female"]], 2, seed=1)
+        >>> registry.allocate(("B", "Female"))
+        1
+        >>> len(registry)
+        1
+    """
+
+    def __init__(self, factor_levels, n_groups, block_length=4, seed=None, rng=None):
+        self.n_groups = n_groups
+        self.block_length = block_length
+        self.entropy = root_entropy(seed, rng)
+
+        self.level_index = []
+        for levels in factor_levels:
+            if isinstance(levels, int):
+                levels = range(levels)
+            self.level_index.append({level: idx for idx, level in enumerate(levels)})
+        self.n_strata = 1
+        for index in self.level_index:
+            self.n_strata *= len(index)
+        # Maps the position of each stratum with subjects to its generator.
+        self.strata = {}
+
+    def position(self, key):
+        """Returns the position of a stratum in the cross product of the
+        factor levels.
+
+        Raises:
+            ValueError: If `key` does not have one known level per factor.
+        """
+        if len(key) != len(self.level_index):
+            raise ValueError("key must be {} long".format(len(self.level_index)))
+        position = 0
+        for index, level in zip(self.level_index, key):
+            if level not in index:
+                raise ValueError("Unknown level {!r}".format(level))
+            position = position * len(index) + index[level]
+        return position
+
+    def allocate(self, key):
+        """Allocates the next subject of a stratum.
+
+        Args:
+            key: a sequence with the subject's level of each factor.
+
+        Raises:
+            ValueError: If `key` does not have one known level per factor.
+
+        Returns:
+            int: the group the subject is allocated to.
+        """
+        position = self.position(key)
+        groups = self.strata.get(position)
+        if groups is None:
+            rng = random.Random(substream_seed(self.entropy, position))
+            groups = iter_block(None, self.n_groups, self.block_length, rng=rng)
+            self.strata[position] = groups
+        return next(groups)
+
+    def __contains__(self, key):
+        try:
+            return self.position(key) in self.strata
+        except ValueError:
+            return False
+
+    def __len__(self):
+        """Returns the number of strata with subjects."""
+        return len(self.strata)
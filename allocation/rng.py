@@ -0,0 +1,135 @@
+"""
+Rng is a module that provides the random number generators used by the
+allocation functions.
+
+Every function takes a `seed` and an optional `rng`.  Instead of reseeding
+the process wide :mod:`random` module, each call draws from its own
+generator, so concurrent calls do not share a stream.
+"""
+
+import random
+
+
+class NumpyRandom(object):
+
+    """Adapts a :class:`numpy.random.Generator` to the part of the
+    :class:`random.Random` interface used by this package.
+
+    Arguments:
+        generator: a :class:`numpy.random.Generator`.
+    """
+
+    def __init__(self, generator):
+        self.generator = generator
+
+    def random(self):
+        return float(self.generator.random())
+
+    def randint(self, a, b):
+        return int(self.generator.integers(a, b, endpoint=True))
+
+    def randrange(self, stop):
+        return int(self.generator.integers(stop))
+
+    def choice(self, seq):
+        return seq[self.randrange(len(seq))]
+
+    def shuffle(self, x):
+        self.generator.shuffle(x)
+
+
+def get_rng(seed=None, rng=None):
+    """Returns the generator an allocation function should draw from.
+
+    Args:
+        seed: (optional) The seed to provide to a new RNG.
+        rng: (optional) A :class:`random.Random` or
+            :class:`numpy.random.Generator`.  When given, `seed` is ignored
+            and draws are taken from `rng`.
+
+    Raises:
+        TypeError: If `rng` is not a supported generator.
+
+    Returns:
+        An object with the ``random``, ``randint``, ``randrange``, ``choice``
+        and ``shuffle`` methods of :class:`random.Random`.
+    """
+    if rng is None:
+        return random.Random(seed)
+    if isinstance(rng, (random.Random, NumpyRandom)):
+        return rng
+    # Checking for the attribute avoids importing numpy on this path.
+    if hasattr(rng, "bit_generator"):
+        return NumpyRandom(rng)
+    raise TypeError("`rng` must be a random.Random or a numpy.random.Generator.")
+
+
+def get_generator(seed=None, rng=None):
+    """Returns a :class:`numpy.random.Generator` for the vectorized functions.
+
+    Args:
+        seed: (optional) The seed to provide to a new RNG.
+        rng: (optional) A :class:`random.Random` or
+            :class:`numpy.random.Generator`.  A :class:`random.Random` is used
+            to seed a new generator, which advances its state.
+
+    Raises:
+        TypeError: If `rng` is not a supported generator.
+
+    Returns:
+        numpy.random.Generator: the generator to draw from.
+    """
+    import numpy as np
+
+    if rng is None:
+        return np.random.default_rng(seed)
+    if isinstance(rng, np.random.Generator):
+        return rng
+    if isinstance(rng, NumpyRandom):
+        return rng.generator
+    if isinstance(rng, random.Random):
+        return np.random.default_rng(rng.getrandbits(128))
+    raise TypeError("`rng` must be a random.Random or a numpy.random.Generator.")
+
+
+def root_entropy(seed=None, rng=None):
+    """Returns the entropy that independent substreams are derived from.
+
+    Args:
+        seed: (optional) A non-negative integer seed.  If neither `seed` nor
+            `rng` is given, fresh entropy is taken from the operating system.
+        rng: (optional) A :class:`random.Random` or
+            :class:`numpy.random.Generator` to draw the entropy from.  When
+            given, `seed` is ignored.
+
+    Returns:
+        int: the root entropy to pass to :func:`substream_seed`.
+    """
+    import numpy as np
+
+    if rng is not None:
+        return int(get_generator(rng=rng).integers(2**63))
+    return np.random.SeedSequence(seed).entropy
+
+
+def substream_seed(entropy, index):
+    """Returns the seed of the `index`-th substream of `entropy`.
+
+    The substreams are those of ``numpy.random.SeedSequence(entropy).spawn``,
+    but any one of them can be computed without spawning the ones before it.
+    Seeds derived this way are statistically independent of each other, so
+    they can be handed to workers in any order.
+
+    Args:
+        entropy: The root entropy, see :func:`root_entropy`.
+        index: The index of the substream.
+
+    Returns:
+        int: a 128 bit seed for :class:`random.Random` or
+            :func:`numpy.random.default_rng`.
+    """
+    import numpy as np
+
+    sequence = np.random.SeedSequence(entropy, spawn_key=(index,))
+    high, low = sequence.generate_state(2, np.uint64)
+    return int(high) << 64 | int(low)
@@ -0,0 +1,234 @@
+"""
+Schedule is a module that provides a compact, array backed container for
+randomization lists.
+"""
+
+from array import array
+from collections.abc import Sequence
+from itertools import islice
+
+# Typecodes from narrowest to widest.
+_TYPECODES = ("b", "h", "l", "q")
+_CHUNK_SIZE = 65536
+
+
+def _typecode(low, high):
+    """Returns the narrowest signed typecode that holds `low` and `high`."""
+    for typecode in _TYPECODES:
+        bits = 8 * array(typecode).itemsize
+        if -(2 ** (bits - 1)) <= low and high < 2 ** (bits - 1):
+            return typecode
+    raise OverflowError("Labels must fit in a 64 bit integer.")
+
+
+def empty_codes(n_groups):
+    """Returns an empty :class:`array.array` able to hold the labels
+    ``1, ..., n_groups``.
+
+    Functions that build a list of integer labels can append to it instead of
+    to a list, then wrap it in an :class:`AllocationSchedule`.
+    """
+    return array(_typecode(0, n_groups))
+
+
+def _extend(codes, values):
+    """Extends `codes` with `values`, widening it if they do not fit.
+
+    Returns:
+        array.array: `codes`, or a wider copy of it.
+    """
+    n_codes = len(codes)
+    try:
+        codes.extend(values)
+        return codes
+    except OverflowError:
+        # Anything appended before the overflow is dropped and re-added.
+        del codes[n_codes:]
+    typecode = _typecode(min(values), max(values))
+    if _TYPECODES.index(typecode) < _TYPECODES.index(codes.typecode):
+        typecode = codes.typecode
+    codes = array(typecode, codes)
+    codes.extend(values)
+    return codes
+
+
+def _encode(groups, index, add):
+    """Returns the codes of `groups` in `index`, a map from each label to its
+    code.  Labels not in `index` are numbered after the others if `add` is
+    True, and raise ValueError otherwise."""
+    if add:
+        for group in groups:
+            index.setdefault(group, len(index))
+    else:
+        for group in groups:
+            if group not in index:
+                raise ValueError("{!r} is not one of `labels`.".format(group))
+    return [index[group] for group in groups]
+
+
+class AllocationSchedule(Sequence):
+
+    """A randomization list stored as one small integer per assignment.
+
+    A list of Python integers costs a pointer per assignment, while an
+    AllocationSchedule usually costs one byte.  It behaves as a read-only
+    list of the group labels: it supports ``len``, indexing, iteration and
+    comparison with lists, and slicing returns a view that shares the
+    underlying buffer.
+
+    When `labels` is None, the codes are the group labels themselves, as for
+    the integer labels ``1, ..., n_groups`` returned by most functions.
+    Otherwise code :math:`c` stands for ``labels[c]``.
+
+    When `width` is greater than 1, each element is a row of `width` labels,
+    as returned by :func:`allocation.randomization.random_treatment_order`.
+
+    Arguments:
+        codes: any 1-D or C-contiguous 2-D buffer of integers, such as an
+            :class:`array.array` or a NumPy integer array.  It is not copied.
+        labels: (optional) a sequence of the labels the codes stand for.
+        width: (optional) the number of labels per element.  The default is
+            1, or the length of the rows of a 2-D buffer.
+
+    Examples:
+        >>> schedule = AllocationSchedule.from_labels(["a", "b", "b", "a"])
+        >>> schedule[1:3]
+        AllocationSchedule(['b', 'b'])
+        >>> schedule.codes.tolist()
+        [0, 1, 1, 0]
+    """
+
+    __slots__ = ("_codes", "labels", "width")
+
+    def __init__(self, codes, labels=None, width=None):
+        view = memoryview(codes)
+        if view.ndim == 2 and width is None:
+            width = view.shape[1]
+        if view.ndim != 1:
+            if view.c_contiguous:
+                view = view.cast("B").cast(view.format)
+            else:
+                view = memoryview(view.tobytes()).cast(view.format)
+        self._codes = view
+        self.labels = tuple(labels) if labels is not None else None
+        self.width = width or 1
+        if len(view) % self.width:
+            raise ValueError("The number of codes must be a multiple of `width`.")
+
+    @classmethod
+    def from_labels(cls, groups, labels=None, width=1):
+        """Creates a schedule from an iterable of group labels.
+
+        The iterable is consumed in chunks, so a generator such as
+        :func:`allocation.randomization.iter_block` is never materialized as
+        a list.
+
+        Args:
+            groups: An iterable of group labels.  If `width` is greater than
+                1, the labels of consecutive rows follow each other.
+            labels: (optional) The list of possible labels.  If not provided,
+                integer labels are stored as they are and any other labels
+                are numbered in order of first appearance.
+            width: (optional) The number of labels per element.
+
+        Raises:
+            ValueError: If `labels` is provided and a group is not one of
+                them.
+
+        Returns:
+            AllocationSchedule: the schedule.
+        """
+        iterator = iter(groups)
+        codes = array("b")
+        index = None
+        if labels is not None:
+            index = {label: code for code, label in enumerate(labels)}
+            codes = array(_typecode(0, len(index)))
+
+        for chunk in iter(lambda: list(islice(iterator, _CHUNK_SIZE)), []):
+            if index is None and not all(type(group) is int for group in chunk):
+                # Switch to numbering the labels.  The integer labels seen so
+                # far become the first labels.
+                index = {}
+                for code in codes:
+                    index.setdefault(code, len(index))
+                codes = _extend(array("b"), [index[code] for code in codes])
+            if index is not None:
+                chunk = _encode(chunk, index, add=labels is None)
+            codes = _extend(codes, chunk)
+
+        if index is not None:
+            labels = list(index)
+        return cls(codes, labels, width)
+
+    @property
+    def codes(self):
+        """A :class:`memoryview` of the codes, one per label."""
+        return self._codes
+
+    @property
+    def nbytes(self):
+        return self._codes.nbytes
+
+    def decode(self, code):
+        """Returns the label a code stands for."""
+        if self.labels is None:
+            return code
+        return self.labels[code]
+
+    def __len__(self):
+        return len(self._codes) // self.width
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            if self.width == 1:
+                return AllocationSchedule(self._codes[idx], self.labels)
+            start, stop, step = idx.indices(len(self))
+            if step == 1:
+                view = self._codes[start * self.width : max(start, stop) * self.width]
+                return AllocationSchedule(view, self.labels, self.width)
+            # Strided rows are not contiguous, so they are copied.
+            codes = array(self._codes.format)
+            for row in range(start, stop, step):
+                codes.extend(self._codes[row * self.width : (row + 1) * self.width])
+            return AllocationSchedule(codes, self.labels, self.width)
+
+        n_rows = len(self)
+        if idx < 0:
+            idx += n_rows
+        if not 0 <= idx < n_rows:
+            raise IndexError("AllocationSchedule index out of range")
+        if self.width == 1:
+            return self.decode(self._codes[idx])
+        start = idx * self.width
+        return [self.decode(code) for code in self._codes[start : start + self.width]]
+
+    def __iter__(self):
+        if self.width == 1 and self.labels is None:
+            return iter(self._codes)
+        return (self[idx] for idx in range(len(self)))
+
+    def __eq__(self, other):
+        if isinstance(other, str) or not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # A memoryview cannot be pickled, so the codes are copied into an
+        # array, e.g. to return schedules from worker processes.
+        codes = array(self._codes.format, self._codes.tobytes())
+        return (AllocationSchedule, (codes, self.labels, self.width))
+
+    def tolist(self):
+        """Returns the labels as a list, or a list of lists if `width` is
+        greater than 1."""
+        return list(self)
+
+    def __repr__(self):
+        if len(self) > 10:
+            return "AllocationSchedule({!r}... {} total)".format(
+                self[:10].tolist(), len(self)
+            )
+        return "AllocationSchedule({!r})".format(self.tolist())
@@ -0,0 +1,313 @@
+"""
+Service is a module that provides an asyncio front end to the stateful
+allocators, for enrollment systems that serve many sites at once.
+
+Block randomization within a stratum is quick and runs on the event loop,
+so subjects are allocated in the order they arrive.  Work that can block,
+a synchronous `persist` function and minimization, whose allocator may
+write to a :class:`allocation.state.StateStore`, runs in the loop's default
+executor, so it does not hold up the other strata.  Minimization shares its
+tallies between every subject, so it allocates one subject at a time.
+Allocations can be persisted in batches, so one write covers every
+enrollment that arrived while the previous write was running.
+
+The module also provides a local server that speaks JSON over a socket, one
+object per line, and a matching client, to load test the service::
+
+    server = await serve(AllocationService(registry), port=8765)
+    client = await AllocationClient.connect(port=8765)
+    group = await client.enroll(["site 1", "Female"])
+"""
+
+import asyncio
+import inspect
+import json
+
+
+class AllocationService(object):
+
+    """Allocates subjects from coroutines.
+
+    Arguments:
+        registry: (optional) a :class:`allocation.registry.StratumRegistry`
+            for stratified block randomization.
+        allocator: (optional) a
+            :class:`allocation.adaptive_allocation.MinimizationAllocator`.
+        persist: (optional) a function, or a coroutine function, that saves a
+            list of allocation records.  A function runs in the loop's
+            default executor.  Each record is a dict with the
+            `subject`, the `scheme` ("block" or "minimization"), the
+            `stratum` or factor `levels`, and the `group`.  An allocation is
+            only returned once its record has been saved.  Await
+            :meth:`close` before the event loop stops, so no record is left
+            unsaved.  The default is not to save the records.
+        batch_size: (optional) The largest number of records per call to
+            `persist`.  The default is 100.
+        flush_interval: (optional) The longest time in seconds a record
+            waits for its batch to fill.  The default is 0, which saves
+            whatever has arrived by the next turn of the event loop.
+
+    Examples:
+        >>> service = AllocationService(StratumRegistry([3, 2], 2, seed=1))
+        >>> asyncio.run(service.enroll((2, 1)))
+        1
+    """
+
+    def __init__(
+        self,
+        registry=None,
+        allocator=None,
+        persist=None,
+        batch_size=100,
+        flush_interval=0,
+    ):
+        self.registry = registry
+        self.allocator = allocator
+        self.persist = persist
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._minimization_lock = None
+        self._pending = []
+        self._flush_handle = None
+        self._flush_lock = None
+        # Flushes started in the background, kept so they are not garbage
+        # collected and can be awaited by `close`.
+        self._flush_tasks = set()
+
+    async def enroll(self, stratum, subject=None):
+        """Allocates a subject by block randomization within their stratum.
+
+        Args:
+            stratum: the subject's level of each stratification factor.
+            subject: (optional) an identifier of the subject, to save with
+                the allocation.
+
+        Raises:
+            ValueError: If the service has no registry, or `stratum` is not
+                a known stratum.
+            Exception: Whatever `persist` raises.  The subject stays
+                allocated.
+
+        Returns:
+            int: the group the subject is allocated to.
+        """
+        if self.registry is None:
+            raise ValueError("The service has no stratum registry.")
+        # Nothing is awaited before the record is queued, so the subjects of
+        # a stratum are allocated and saved in the order they arrived.
+        group = self.registry.allocate(stratum)
+        saved = self._queue(
+            {
+                "subject": subject,
+                "scheme": "block",
+                "stratum": list(stratum),
+                "group": group,
+            }
+        )
+        # The stratum can allocate its next subject while this one is saved.
+        if saved is not None:
+            await saved
+        return group
+
+    async def minimize(self, levels, subject=None):
+        """Allocates a subject by minimization.
+
+        Args:
+            levels: the subject's level of each factor of the allocator.
+            subject: (optional) an identifier of the subject, to save with
+                the allocation.
+
+        Raises:
+            ValueError: If the service has no minimization allocator, or
+                `levels` are not known levels.
+            Exception: Whatever `persist` raises.  The subject stays
+                allocated.
+
+        Returns:
+            the group label of the subject.
+        """
+        if self.allocator is None:
+            raise ValueError("The service has no minimization allocator.")
+        if self._minimization_lock is None:
+            self._minimization_lock = asyncio.Lock()
+        # Every subject shares the tallies, so minimization is serialized.
+        # The allocator may write to its store, so it runs in the executor.
+        async with self._minimization_lock:
+            group = await asyncio.get_running_loop().run_in_executor(
+                None, self.allocator.allocate, levels
+            )
+            saved = self._queue(
+                {
+                    "subject": subject,
+                    "scheme": "minimization",
+                    "levels": list(levels),
+                    "group": group,
+                }
+            )
+        if saved is not None:
+            await saved
+        return group
+
+    def _queue(self, record):
+        """Queues a record to be saved.
+
+        Returns:
+            asyncio.Future: a future that is done once the record's batch
+                has been saved, or None if the records are not saved.
+        """
+        if self.persist is None:
+            return None
+        loop = asyncio.get_running_loop()
+        saved = loop.create_future()
+        self._pending.append((record, saved))
+        if len(self._pending) >= self.batch_size:
+            self._start_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_interval, self._start_flush)
+        return saved
+
+    def _start_flush(self):
+        """Starts a flush in the background."""
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def flush(self):
+        """Saves every queued record."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        # Batches are saved one at a time, in the order they were queued.
+        async with self._flush_lock:
+            await self._flush_pending()
+
+    async def close(self):
+        """Saves every queued record and waits for the flushes in
+        progress."""
+        await self.flush()
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks)
+
+    async def _flush_pending(self):
+        while self._pending:
+            batch = self._pending[: self.batch_size]
+            del self._pending[: self.batch_size]
+            records = [record for record, _ in batch]
+            try:
+                if inspect.iscoroutinefunction(self.persist):
+                    await self.persist(records)
+                else:
+                    # A slow synchronous save must not block the loop.
+                    result = await asyncio.get_running_loop().run_in_executor(
+                        None, self.persist, records
+                    )
+                    if inspect.isawaitable(result):
+                        await result
+            except Exception as error:
+                for _, saved in batch:
+                    if not saved.done():
+                        saved.set_exception(error)
+            else:
+                for _, saved in batch:
+                    if not saved.done():
+                        saved.set_result(None)
+
+
+async def _handle_connection(service, reader, writer):
+    """Answers the requests of one client, in order."""
+    try:
+        async for line in reader:
+            try:
+                request = json.loads(line)
+                if request.get("method") == "minimize":
+                    group = await service.minimize(
+                        request["levels"], request.get("subject")
+                    )
+                else:
+                    group = await service.enroll(
+                        request["stratum"], request.get("subject")
+                    )
+                response = {"id": request.get("id"), "group": group}
+            except (KeyError, TypeError, ValueError) as error:
+                response = {"error": "{}: {}".format(type(error).__name__, error)}
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(service, host="127.0.0.1", port=0):
+    """Starts a JSON over socket server for a service.
+
+    Each request is a JSON object on its own line, either
+    ``{"stratum": [...]}`` for :meth:`AllocationService.enroll` or
+    ``{"method": "minimize", "levels": [...]}`` for
+    :meth:`AllocationService.minimize`, with an optional `subject` and `id`.
+    Each response is ``{"id": ..., "group": ...}`` or ``{"error": ...}``.
+
+    Args:
+        service: The :class:`AllocationService` to serve.
+        host: (optional) The address to listen on.  The default is the local
+            host.
+        port: (optional) The port to listen on.  The default is any free
+            port.
+
+    Returns:
+        asyncio.AbstractServer: the running server.  The port it listens on
+            is ``server.sockets[0].getsockname()[1]``.
+    """
+    return await asyncio.start_server(
+        lambda reader, writer: _handle_connection(service, reader, writer),
+        host,
+        port,
+    )
+
+
+class AllocationClient(object):
+
+    """A client for :func:`serve`.
+
+    Requests on one connection are answered in order, so a load test opens a
+    client per simulated site.
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=0):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, request):
+        """Sends a request and returns the group it was allocated.
+
+        Raises:
+            ValueError: If the server answers with an error.
+        """
+        async with self._lock:
+            self._writer.write(json.dumps(request).encode("utf-8") + b"\n")
+            await self._writer.drain()
+            line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("The server closed the connection.")
+        response = json.loads(line)
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["group"]
+
+    async def enroll(self, stratum, subject=None):
+        return await self.request({"stratum": list(stratum), "subject": subject})
+
+    async def minimize(self, levels, subject=None):
+        return await self.request(
+            {"method": "minimize", "levels": list(levels), "subject": subject}
+        )
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
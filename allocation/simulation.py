@@ -0,0 +1,359 @@
+"""
+Simulation is a module that provides functions to generate many independent
+replicates of a randomization scheme, or of a whole response-adaptive trial,
+as needed to qualify a study design.
+"""
+
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import randomization
+from .rng import root_entropy, substream_seed
+from .vectorized import (
+    _success_rates,
+    double_biased_coin_minimize_cut,
+    double_biased_coin_urn_cut,
+    label_dtype,
+)
+
+# The functions of :mod:`allocation.randomization` that `simulate` runs by
+# name.  They are looked up on each call, so that the wrappers of
+# :mod:`allocation.instrumentation` are used while it is enabled.
+SCHEMES = (
+    "simple",
+    "simple_max_deviation",
+    "complete",
+    "complete_max_deviation",
+    "block",
+    "random_block",
+    "efrons_biased_coin",
+    "smiths_exponent",
+    "weis_urn",
+    "generalized_biased_coin",
+)
+
+
+def _run_replicates(function, params, entropy, start, stop, n_columns, dtype):
+    """Runs replicates ``start, ..., stop - 1`` of a scheme.
+
+    Each replicate draws from its own substream of `entropy`, so the rows do
+    not depend on how the replicates are split between workers.
+    """
+    rows = np.zeros((stop - start, n_columns), dtype=dtype)
+    for row, index in enumerate(range(start, stop)):
+        rng = random.Random(substream_seed(entropy, index))
+        groups = function(rng=rng, **params)
+        # Schemes that give up (e.g. `simple_max_deviation`) return None,
+        # which leaves the row filled with zeros.
+        if groups is not None:
+            rows[row] = groups
+    return rows
+
+
+def simulate(scheme, params, n_replicates, workers=None, seed=None, rng=None):
+    """Generate independent replicates of a randomization scheme.
+
+    Args:
+        scheme: One of the names in :data:`SCHEMES` (e.g. ``"block"``) or a
+            function that accepts the keyword arguments in `params` and
+            an `rng`.  When `workers` is greater than 1 the function must be
+            picklable.
+        params: A dict of the keyword arguments to pass to `scheme`, e.g.
+            ``{"n_subjects": 100, "n_groups": 2, "block_length": 4}``.
+            It must not contain `seed` or `rng`.
+        n_replicates: The number of replicates to generate.
+        workers: (optional) The number of processes to spread the replicates
+            over.  The default is to run in the current process.
+        seed: (optional) The seed the replicate seeds are derived from.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            the root seed from.  When given, `seed` is ignored.
+
+    Raises:
+        ValueError: If `scheme` is an unknown name.
+        ValueError: If `params` contains `seed` or `rng`.
+
+    Returns:
+        numpy.ndarray: an array of shape ``(n_replicates, n_subjects)`` of
+            the integer group labels of each replicate.  A replicate for
+            which the scheme returned None is a row of zeros.
+
+    Notes:
+        Replicate :math:`i` is always generated from the :math:`i^{th}`
+        substream of the seed, so the result is the same for any number of
+        `workers`.
+
+        The group labels must be integers, so `complete` schemes need
+        integer `subjects`.
+    """
+    if callable(scheme):
+        function = scheme
+    elif scheme in SCHEMES:
+        function = getattr(randomization, scheme)
+    else:
+        raise ValueError(
+            "`scheme` must be callable or one of {}.".format(", ".join(SCHEMES))
+        )
+    if "seed" in params or "rng" in params:
+        raise ValueError("`params` must not contain `seed` or `rng`.")
+
+    if "subjects" in params:
+        n_columns = len(params["subjects"])
+        dtype = label_dtype(max(params["subjects"], default=0))
+    else:
+        n_columns = params["n_subjects"]
+        dtype = label_dtype(params.get("n_groups", 2))
+
+    entropy = root_entropy(seed, rng)
+    if workers is None or workers <= 1 or n_replicates <= 1:
+        return _run_replicates(
+            function, params, entropy, 0, n_replicates, n_columns, dtype
+        )
+
+    # A few chunks per worker evens out schemes whose cost varies by replicate.
+    chunk_size = math.ceil(n_replicates / (4 * workers))
+    starts = range(0, n_replicates, chunk_size)
+    stops = [min(start + chunk_size, n_replicates) for start in starts]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunks = pool.map(
+            _run_replicates,
+            [function] * len(starts),
+            [params] * len(starts),
+            [entropy] * len(starts),
+            starts,
+            stops,
+            [n_columns] * len(starts),
+            [dtype] * len(starts),
+        )
+        return np.concatenate(list(chunks))
+
+
+# The designs of `simulate_trials`, mapped to the number of arms they need.
+DESIGNS = {
+    "double_biased_coin_minimize": 2,
+    "double_biased_coin_urn": 2,
+    "current_belief": None,
+    "thompson": None,
+    "ucb": None,
+}
+# Trials are simulated in chunks of this many replicates, each with its own
+# substream, so that the results do not depend on the number of workers.
+_TRIAL_CHUNK_SIZE = 4096
+
+
+class TrialSimulation(object):
+
+    """The outcome of :func:`simulate_trials`.
+
+    Attributes:
+        design: The name of the design.
+        response_rates: The true success probability of each arm.
+        n_subjects: The number of subjects in each trial.
+        successes: An array of shape ``(n_replicates, n_arms)`` of the
+            number of successes on each arm of each trial.
+        trials: An array of shape ``(n_replicates, n_arms)`` of the number of
+            subjects allocated to each arm of each trial.
+    """
+
+    def __init__(self, design, response_rates, n_subjects, successes, trials):
+        self.design = design
+        self.response_rates = response_rates
+        self.n_subjects = n_subjects
+        self.successes = successes
+        self.trials = trials
+
+    @property
+    def n_replicates(self):
+        return len(self.trials)
+
+    @property
+    def allocation_proportions(self):
+        """The fraction of each trial's subjects allocated to each arm."""
+        return self.trials / max(self.n_subjects, 1)
+
+    @property
+    def total_successes(self):
+        """The number of successes of each trial."""
+        return self.successes.sum(axis=1)
+
+    def rejection_rate(self, alpha=0.05):
+        """Returns the fraction of trials in which a two-sided Wald test of
+        equal success rates is significant at level `alpha`.
+
+        This is the power of the design, or its type I error rate when the
+        response rates are equal.
+
+        Raises:
+            ValueError: If the design does not have 2 arms.
+        """
+        if self.trials.shape[1] != 2:
+            raise ValueError("The rejection rate needs exactly 2 arms.")
+        trials = np.maximum(self.trials, 1)
+        rates = self.successes / trials
+        variance = (rates * (1 - rates) / trials).sum(axis=1)
+        difference = np.abs(rates[:, 0] - rates[:, 1])
+        z = np.divide(
+            difference,
+            np.sqrt(variance),
+            out=np.zeros_like(difference),
+            where=variance > 0,
+        )
+        p_values = np.array([math.erfc(value / math.sqrt(2)) for value in z])
+        return float(np.mean(p_values < alpha)) if len(p_values) else 0.0
+
+    def operating_characteristics(self, alpha=0.05):
+        """Returns a summary of the design's behaviour over the replicates.
+
+        Returns:
+            dict: the mean and standard deviation of the allocation
+                proportion of each arm, the mean number of successes and
+                failures per trial, the fraction of subjects allocated to the
+                best arm, and for 2 arms the rejection rate at `alpha`.
+        """
+        proportions = self.allocation_proportions
+        best = int(np.argmax(self.response_rates))
+        total_successes = self.total_successes
+        summary = {
+            "design": self.design,
+            "n_subjects": self.n_subjects,
+            "n_replicates": self.n_replicates,
+            "mean_allocation": proportions.mean(axis=0).tolist(),
+            "sd_allocation": proportions.std(axis=0).tolist(),
+            "mean_successes": float(total_successes.mean()),
+            "mean_failures": float(self.n_subjects - total_successes.mean()),
+            "best_arm_allocation": float(proportions[:, best].mean()),
+        }
+        if self.trials.shape[1] == 2:
+            summary["rejection_rate"] = self.rejection_rate(alpha)
+        return summary
+
+
+def _break_ties(values, generator):
+    """Returns the column of the maximum of each row of `values`, choosing
+    among tied columns uniformly at random."""
+    tied = values == values.max(axis=1, keepdims=True)
+    return np.where(tied, generator.random(values.shape), -1.0).argmax(axis=1)
+
+
+def _run_trials(
+    design, response_rates, n_subjects, prior_alpha, prior_beta, seed, n_replicates
+):
+    """Simulates `n_replicates` trials side by side with one generator."""
+    generator = np.random.default_rng(seed)
+    response_rates = np.asarray(response_rates, dtype=np.float64)
+    n_arms = len(response_rates)
+    successes = np.zeros((n_replicates, n_arms), dtype=np.int64)
+    trials = np.zeros((n_replicates, n_arms), dtype=np.int64)
+    rows = np.arange(n_replicates)
+    for t in range(n_subjects):
+        if design.startswith("double_biased_coin"):
+            p_c = _success_rates(successes[:, 0], trials[:, 0])
+            p_t = _success_rates(successes[:, 1], trials[:, 1])
+            if design == "double_biased_coin_minimize":
+                cut = double_biased_coin_minimize_cut(p_c, p_t)
+            else:
+                cut = double_biased_coin_urn_cut(p_c, p_t)
+            arms = (generator.random(n_replicates) >= cut).astype(np.int64)
+        else:
+            alphas = prior_alpha + successes
+            betas = prior_beta + trials - successes
+            if design == "thompson":
+                arms = generator.beta(alphas, betas).argmax(axis=1)
+            elif design == "current_belief":
+                arms = _break_ties(alphas / (alphas + betas), generator)
+            elif t == 0:
+                arms = generator.integers(n_arms, size=n_replicates)
+            else:
+                denom = alphas + betas
+                index = alphas / denom + np.sqrt(2 * math.log(t) / denom)
+                arms = _break_ties(index, generator)
+        outcomes = generator.random(n_replicates) < response_rates[arms]
+        successes[rows, arms] += outcomes
+        trials[rows, arms] += 1
+    return successes, trials
+
+
+def simulate_trials(
+    design,
+    response_rates,
+    n_subjects,
+    n_replicates,
+    prior_alpha=None,
+    prior_beta=None,
+    workers=None,
+    seed=None,
+    rng=None,
+):
+    """Simulate many response-adaptive trials at once.
+
+    In each trial, every subject is allocated by the design from the
+    successes and trials observed so far, and then has a success with the
+    probability of their arm.  All of the trials advance together, one
+    subject at a time, with their counts held in NumPy arrays.
+
+    Args:
+        design: One of the names in :data:`DESIGNS`.  The
+            "double_biased_coin_minimize" and "double_biased_coin_urn" designs
+            follow :mod:`allocation.adaptive_randomization.double_biased_coin`
+            with arm 0 as the control.  "current_belief", "thompson" and "ucb"
+            follow the methods of
+            :func:`allocation.adaptive_randomization.multi_arm_bandit`.
+        response_rates: A list of the true success probability of each arm.
+        n_subjects: The number of subjects in each trial.
+        n_replicates: The number of trials to simulate.
+        prior_alpha: (optional) The alpha of the Beta prior of the bandit
+            designs.  The default is 0.5.
+        prior_beta: (optional) The beta of the Beta prior of the bandit
+            designs.  The default is 0.5.
+        workers: (optional) The number of processes to spread the trials
+            over.  The default is to run in the current process.
+        seed: (optional) The seed the chunk seeds are derived from.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            the root seed from.  When given, `seed` is ignored.
+
+    Raises:
+        ValueError: If `design` is unknown, or it needs a different number
+            of arms than `response_rates` has.
+
+    Returns:
+        TrialSimulation: the successes and trials of each arm of each trial,
+            and a summary of the design's operating characteristics.
+
+    Notes:
+        The trials are simulated in chunks of a fixed number of replicates,
+        and chunk :math:`i` always draws from the :math:`i^{th}` substream of
+        the seed, so the result is the same for any number of `workers`.
+    """
+    if design not in DESIGNS:
+        raise ValueError("`design` must be one of {}.".format(", ".join(DESIGNS)))
+    n_arms = DESIGNS[design]
+    if n_arms is not None and len(response_rates) != n_arms:
+        raise ValueError("`{}` needs {} response rates.".format(design, n_arms))
+    prior_alpha = prior_alpha or 0.5
+    prior_beta = prior_beta or 0.5
+
+    entropy = root_entropy(seed, rng)
+    starts = range(0, n_replicates, _TRIAL_CHUNK_SIZE)
+    sizes = [min(_TRIAL_CHUNK_SIZE, n_replicates - start) for start in starts]
+    seeds = [substream_seed(entropy, index) for index in range(len(starts))]
+    arguments = [
+        [design] * len(starts),
+        [list(response_rates)] * len(starts),
+        [n_subjects] * len(starts),
+        [prior_alpha] * len(starts),
+        [prior_beta] * len(starts),
+        seeds,
+        sizes,
+    ]
+    if workers is None or workers <= 1 or len(starts) <= 1:
+        chunks = list(map(_run_trials, *arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_run_trials, *arguments))
+
+    empty = np.zeros((0, len(response_rates)), dtype=np.int64)
+    successes = np.concatenate([chunk[0] for chunk in chunks] or [empty])
+    trials = np.concatenate([chunk[1] for chunk in chunks] or [empty])
+    return TrialSimulation(design, list(response_rates), n_subjects, successes, trials)
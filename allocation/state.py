@@ -0,0 +1,168 @@
+"""
+State is a module that provides stores for the counts kept by the stateful
+allocators, so they survive a restart without replaying the enrollment
+history.
+
+A store holds integer counters grouped by namespace, e.g. one namespace per
+allocator, and keyed by a tuple such as ``(treatment, factor, level)``.
+Counters only ever change by increments, so every update is a constant time
+write, and increments can be batched into one transaction.  The increments
+of one allocation are added with :meth:`StateStore.add_many`, so they are
+written together or not at all.
+"""
+
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+
+
+class StateStore(ABC):
+
+    """The interface of the state stores.
+
+    Subclasses implement :meth:`load` and :meth:`add`, :meth:`add_many` if
+    they can write several increments at once, and :meth:`flush` if they
+    buffer increments.
+    """
+
+    @abstractmethod
+    def load(self, namespace):
+        """Returns the counters of a namespace.
+
+        Args:
+            namespace: The name of the namespace.
+
+        Returns:
+            dict: a map from each key, as a tuple, to its count.  Increments
+                that have not been flushed yet are included.
+        """
+
+    @abstractmethod
+    def add(self, namespace, key, amount=1):
+        """Increments a counter.
+
+        Args:
+            namespace: The name of the namespace.
+            key: A tuple of strings and integers.
+            amount: (optional) The increment.  The default is 1.
+        """
+
+    def add_many(self, namespace, items):
+        """Increments several counters together, e.g. all the counts of one
+        allocation, so a failure cannot leave only some of them written.
+
+        Args:
+            namespace: The name of the namespace.
+            items: An iterable of ``(key, amount)`` pairs.
+        """
+        for key, amount in items:
+            self.add(namespace, key, amount)
+
+    def flush(self):
+        """Writes any pending increments."""
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class MemoryStateStore(StateStore):
+
+    """A state store that keeps the counters in memory, for tests and for
+    allocators that do not need to survive a restart."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def load(self, namespace):
+        return dict(self.counts.get(namespace, {}))
+
+    def add(self, namespace, key, amount=1):
+        counts = self.counts.setdefault(namespace, {})
+        key = tuple(key)
+        counts[key] = counts.get(key, 0) + amount
+
+
+class SQLiteStateStore(StateStore):
+
+    """A state store backed by a SQLite database in WAL mode.
+
+    The increments of each call to :meth:`add` or :meth:`add_many` are
+    committed in one transaction as they are added, so every allocation
+    survives a crash and none is half written.  With a `batch_size` above 1,
+    increments are coalesced in memory and written in one transaction once
+    `batch_size` of them are pending.  That is faster,
+    but increments that are still pending are lost if the process dies, so
+    call :meth:`flush` at the points where durability matters.
+
+    Arguments:
+        path: the path of the database file, created if it does not exist.
+        batch_size: (optional) The number of increments written per
+            transaction.  The default is 1.
+
+    Examples:
+        >>> with SQLiteStateStore("state.db") as store:
+        ...     allocator = MinimizationAllocator([2, 3], store=store, seed=1)
+        ...     allocator.allocate([1, 2])
+        1
+    """
+
+    def __init__(self, path, batch_size=1):
+        self.batch_size = batch_size
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS counts ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, "
+                "value INTEGER NOT NULL, PRIMARY KEY (namespace, key)"
+                ") WITHOUT ROWID"
+            )
+        self._pending = {}
+        self._n_pending = 0
+
+    def load(self, namespace):
+        self.flush()
+        rows = self._connection.execute(
+            "SELECT key, value FROM counts WHERE namespace = ?", (namespace,)
+        )
+        return {tuple(json.loads(key)): value for key, value in rows}
+
+    def add(self, namespace, key, amount=1):
+        self.add_many(namespace, [(key, amount)])
+
+    def add_many(self, namespace, items):
+        # Keys are stored as JSON lists, so they can hold strings and ints.
+        rows = [((namespace, json.dumps(list(key))), amount) for key, amount in items]
+        for row, amount in rows:
+            self._pending[row] = self._pending.get(row, 0) + amount
+        self._n_pending += len(rows)
+        if self._n_pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        # An upsert needs SQLite 3.24, so missing rows are inserted first.
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO counts (namespace, key, value) "
+                "VALUES (?, ?, 0)",
+                list(self._pending),
+            )
+            self._connection.executemany(
+                "UPDATE counts SET value = value + ? WHERE namespace = ? AND key = ?",
+                [(value, name, key) for (name, key), value in self._pending.items()],
+            )
+        self._pending = {}
+        self._n_pending = 0
+
+    def close(self):
+        self.flush()
+        self._connection.close()
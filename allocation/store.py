@@ -0,0 +1,326 @@
+"""
+Store is a module that provides a binary file format for pre-generated
+randomization lists, for concealed central randomization.
+
+A schedule file is written in one streaming pass from generators such as
+:func:`allocation.randomization.iter_block`, and read through :mod:`mmap`, so
+a worker can look up the assignment of any subject without loading the file
+and many processes can share the same pages.
+
+The layout of a file is:
+
+* a 32 byte prelude: the magic bytes ``ALLOCSCH``, the format version and
+  the offset and length of the header,
+* the codes of each stratum, one after the other, each starting on an 8 byte
+  boundary,
+* a JSON header with the scheme, its parameters, the seed, the labels, the
+  layout of the codes and the offset and length of each stratum.
+
+The codes are little-endian signed integers of a fixed size, e.g. ``"<i1"``
+for one byte, so a file written on one platform reads the same on another.
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from itertools import islice
+
+from .schedule import AllocationSchedule
+
+MAGIC = b"ALLOCSCH"
+VERSION = 2
+_PRELUDE = struct.Struct("<8sIIQQ")
+_ALIGNMENT = 8
+_CHUNK_SIZE = 65536
+# The layouts of the stored codes, as NumPy dtype strings.
+DTYPES = ("<i1", "<i2", "<i4", "<i8")
+
+
+def _local_typecode(dtype):
+    """Returns the :mod:`array` typecode of the integers of `dtype` on this
+    platform.
+
+    Raises:
+        ValueError: If `dtype` is not one of :data:`DTYPES`.
+    """
+    if dtype not in DTYPES:
+        raise ValueError("`dtype` must be one of {}.".format(", ".join(DTYPES)))
+    size = int(dtype[2:])
+    for typecode in "bhilq":
+        if array(typecode).itemsize == size:
+            return typecode
+
+
+class ScheduleWriter(object):
+
+    """Writes a schedule file one stratum at a time.
+
+    Use it as a context manager, so the header is written when the block
+    exits::
+
+        with ScheduleWriter("trial.sch", scheme="block", seed=1) as writer:
+            writer.write_stratum(iter_block(1000, 2, 4, seed=1), name="site 1")
+
+    Arguments:
+        path: the path of the file to write.
+        scheme: (optional) the name of the randomization scheme.
+        params: (optional) a JSON serializable dict of the parameters of the
+            scheme.
+        seed: (optional) the seed the schedule was generated with.
+        labels: (optional) a list of the group labels.  If provided, each
+            assignment is stored as the position of its label in `labels`,
+            otherwise the assignments must be integers and are stored as
+            they are.
+        dtype: (optional) the layout of the stored codes, one of
+            :data:`DTYPES`.  The default is "<i1", which holds codes up to
+            127.
+
+    Raises:
+        ValueError: If `dtype` is not one of :data:`DTYPES`.
+    """
+
+    def __init__(
+        self, path, scheme=None, params=None, seed=None, labels=None, dtype="<i1"
+    ):
+        self._typecode = _local_typecode(dtype)
+        self.header = {
+            "scheme": scheme,
+            "params": params or {},
+            "seed": seed,
+            "labels": list(labels) if labels is not None else None,
+            "dtype": dtype,
+            "strata": [],
+        }
+        self._index = None
+        if labels is not None:
+            self._index = {label: code for code, label in enumerate(labels)}
+        self._file = open(path, "wb")
+        self._file.write(_PRELUDE.pack(MAGIC, VERSION, 0, 0, 0))
+
+    def write_stratum(self, groups, name=None):
+        """Writes the assignments of one stratum.
+
+        Args:
+            groups: an iterable of the group labels of the stratum, in
+                order.  It is consumed in chunks.
+            name: (optional) the name of the stratum, a JSON serializable
+                value or a tuple of them.  The default is its position.
+
+        Raises:
+            ValueError: If an assignment cannot be stored.
+        """
+        offset = self._align()
+        length = 0
+        iterator = iter(groups)
+        for chunk in iter(lambda: list(islice(iterator, _CHUNK_SIZE)), []):
+            try:
+                if self._index is not None:
+                    chunk = [self._index[group] for group in chunk]
+                codes = array(self._typecode, chunk)
+            except (KeyError, OverflowError, TypeError) as error:
+                raise ValueError("Cannot store assignment: {}".format(error))
+            if sys.byteorder == "big":
+                codes.byteswap()
+            codes.tofile(self._file)
+            length += len(codes)
+
+        if name is None:
+            name = len(self.header["strata"])
+        self.header["strata"].append({"name": name, "offset": offset, "length": length})
+
+    def _align(self):
+        offset = self._file.tell()
+        padding = -offset % _ALIGNMENT
+        self._file.write(b"\0" * padding)
+        return offset + padding
+
+    def close(self):
+        """Writes the header and closes the file."""
+        if self._file.closed:
+            return
+        header = json.dumps(self.header).encode("utf-8")
+        offset = self._align()
+        self._file.write(header)
+        self._file.seek(0)
+        self._file.write(_PRELUDE.pack(MAGIC, VERSION, 0, offset, len(header)))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # Without a header the partial file cannot be mistaken for a
+            # complete one.
+            self._file.close()
+
+
+def write_schedule(
+    path, strata, scheme=None, params=None, seed=None, labels=None, dtype="<i1"
+):
+    """Writes a schedule file.
+
+    Args:
+        path: The path of the file to write.
+        strata: A dict of stratum names to iterables of group labels, or a
+            list of iterables of group labels.
+        scheme: (optional) The name of the randomization scheme.
+        params: (optional) A JSON serializable dict of the parameters of the
+            scheme.
+        seed: (optional) The seed the schedule was generated with.
+        labels: (optional) A list of the group labels.
+        dtype: (optional) The layout of the stored codes, one of
+            :data:`DTYPES`.
+
+    Examples:
+        >>> write_schedule(
+        ...     "trial.sch",
+        ...     [iter_block(n, 2, 4, seed=seed) for seed, n in enumerate([10, 12])],
+        ...     scheme="block",
+        ... )
+    """
+    with ScheduleWriter(path, scheme, params, seed, labels, dtype) as writer:
+        if isinstance(strata, dict):
+            for name, groups in strata.items():
+                writer.write_stratum(groups, name)
+        else:
+            for groups in strata:
+                writer.write_stratum(groups)
+
+
+def _from_json(value):
+    """Returns `value` with the lists JSON made of tuples turned back into
+    tuples, e.g. stratum names such as ``("site 1", "Female")``."""
+    if isinstance(value, list):
+        return tuple(_from_json(item) for item in value)
+    return value
+
+
+class ScheduleFile(object):
+
+    """Reads a schedule file through :mod:`mmap`.
+
+    Nothing but the header is read up front.  Looking up an assignment
+    touches only the page that holds it, and processes that open the same
+    file share its pages through the operating system's page cache.  On a
+    big-endian platform the codes of a stratum are copied and byte swapped
+    when it is looked up.
+
+    Arguments:
+        path: the path of a file written by :class:`ScheduleWriter`.
+
+    Raises:
+        ValueError: If the file is not a schedule file.
+
+    Examples:
+        >>> with ScheduleFile("trial.sch") as schedule:
+        ...     schedule.assignment(7, stratum="site 1")
+        2
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, _, offset, length = _PRELUDE.unpack_from(self._mmap)
+        except struct.error:
+            magic = version = None
+        if magic != MAGIC or version != VERSION or offset == 0:
+            self._mmap.close()
+            raise ValueError("{} is not a complete schedule file.".format(path))
+        self.header = json.loads(self._mmap[offset : offset + length].decode("utf-8"))
+        if self.header["labels"] is not None:
+            labels = self.header["labels"]
+            self.header["labels"] = [_from_json(label) for label in labels]
+        for stratum in self.header["strata"]:
+            stratum["name"] = _from_json(stratum["name"])
+        self._buffer = memoryview(self._mmap)
+        self._positions = {}
+        for position, stratum in enumerate(self.header["strata"]):
+            self._positions[stratum["name"]] = position
+
+    @property
+    def strata(self):
+        """The names of the strata, in the order they were written."""
+        return [stratum["name"] for stratum in self.header["strata"]]
+
+    def stratum(self, name=None):
+        """Returns the assignments of a stratum without copying them.
+
+        Args:
+            name: (optional) the name of the stratum.  The default is the
+                first stratum.
+
+        Raises:
+            KeyError: If there is no such stratum.
+
+        Returns:
+            AllocationSchedule: a view of the stratum's assignments.  It is
+                only valid until the file is closed.
+        """
+        if name is None and self.header["strata"]:
+            return self.stratum_at(0)
+        name = _from_json(name)
+        if name not in self._positions:
+            raise KeyError("Unknown stratum {!r}".format(name))
+        return self.stratum_at(self._positions[name])
+
+    def stratum_at(self, position):
+        """Returns the assignments of the stratum at a position, in the order
+        the strata were written, without copying them.
+
+        Strata that were written without a name are named by their
+        position, so for them this is the same as :meth:`stratum`.
+
+        Raises:
+            IndexError: If there is no such stratum.
+
+        Returns:
+            AllocationSchedule: a view of the stratum's assignments.  It is
+                only valid until the file is closed.
+        """
+        header = self.header["strata"][position]
+        typecode = _local_typecode(self.header["dtype"])
+        start = header["offset"]
+        stop = start + header["length"] * array(typecode).itemsize
+        codes = self._buffer[start:stop].cast(typecode)
+        if sys.byteorder == "big":
+            codes = array(typecode, codes.tobytes())
+            codes.byteswap()
+        return AllocationSchedule(codes, self.header["labels"])
+
+    def assignment(self, subject, stratum=None):
+        """Returns the assignment of one subject.
+
+        Args:
+            subject: the position of the subject within its stratum.
+            stratum: (optional) the name of the stratum.  The default is the
+                first stratum.
+
+        Raises:
+            KeyError: If there is no such stratum.
+            IndexError: If there is no such subject.
+
+        Returns:
+            The group label of the subject.
+        """
+        return self.stratum(stratum)[subject]
+
+    def __len__(self):
+        return len(self.header["strata"])
+
+    def close(self):
+        """Closes the file.  Views returned by :meth:`stratum` must have been
+        released first."""
+        self._buffer.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
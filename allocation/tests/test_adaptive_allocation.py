@@ -1,7 +1,11 @@
 """ Test Cases for Adaptive Allocation module
 """
 
-from ..adaptive_allocation import minimization
+import random
+
+import pytest
+
+from ..adaptive_allocation import MinimizationAllocator, minimization
 
 
 def test_minimization():
@@ -14,3 +18,38 @@ def test_minimization():
 
     result = minimization(counts, group_labels=names)
     assert result == "Treatment 2"
+
+
+def test_minimization_allocator():
+    """ Test Cases for MinimizationAllocator """
+    allocator = MinimizationAllocator(
+        [["Male", "Female"], ["AA", "Asian", "Hispanic", "White"]],
+        group_labels=["Treatment 1", "Treatment 2"],
+    )
+    for _ in range(10):
+        allocator.record("Treatment 1", ["Female", "Hispanic"])
+    for _ in range(9):
+        allocator.record("Treatment 2", ["Female", "White"])
+    allocator.record("Treatment 2", ["Male", "Hispanic"])
+    allocator.record("Treatment 2", ["Male", "Hispanic"])
+    assert allocator.tally(["Female", "Hispanic"]) == [[10, 10], [9, 2]]
+    assert allocator.allocate(["Female", "Hispanic"]) == "Treatment 2"
+    assert allocator.tally(["Female", "Hispanic"]) == [[10, 10], [10, 3]]
+
+    # Each allocation matches Minimization given the same tallies and RNG.
+    allocator = MinimizationAllocator([2, 3], n_treatments=3, seed=4)
+    rng = random.Random(4)
+    subject_rng = random.Random(0)
+    for _ in range(200):
+        levels = [subject_rng.randint(0, 1), subject_rng.randint(0, 2)]
+        expected = minimization(allocator.tally(levels), rng=rng)
+        assert allocator.allocate(levels) == expected
+
+    with pytest.raises(ValueError):
+        allocator.allocate([0])
+    with pytest.raises(ValueError):
+        allocator.allocate([0, 3])
+    with pytest.raises(ValueError):
+        MinimizationAllocator([2], n_treatments=1)
+    with pytest.raises(ValueError):
+        MinimizationAllocator([2], n_treatments=3, group_labels=["a", "b"])
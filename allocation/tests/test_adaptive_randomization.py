@@ -3,7 +3,11 @@
 
 import pytest
 
-from ..adaptive_randomization import double_biased_coin_urn, double_biased_coin_minimize
+from ..adaptive_randomization import (
+    double_biased_coin_minimize,
+    double_biased_coin_urn,
+    multi_arm_bandit,
+)
 
 
 def test_double_biased_coin_minimize():
@@ -52,3 +56,34 @@ def test_double_biased_coin_urn():
 
     result = double_biased_coin_urn(6, 6, 7, 8)
     assert result in ["Control", "Treatment"]
+
+
+def test_multi_arm_bandit():
+    """ Test Cases for multi_arm_bandit """
+    result = multi_arm_bandit(3, [1, 8, 1], [9, 2, 9])
+    assert result == 1
+
+    result = multi_arm_bandit(3, [1, 8, 1], [9, 2, 9], method="UCB")
+    assert result in [0, 1, 2]
+
+    result = multi_arm_bandit(3, [1, 8, 1], [9, 2, 9], method="Thompson", seed=1)
+    assert result in [0, 1, 2]
+
+    result = multi_arm_bandit(
+        3, [10, 80, 10], [90, 20, 90], method="Thompson", seed=1, batch_size=500
+    )
+    assert len(result) == 500
+    assert set(result) == {1}
+
+    result = multi_arm_bandit(
+        2, [0, 0], [0, 0], method="Thompson", seed=1, batch_size=10000
+    )
+    percent_arm_0 = float(result.count(0)) / len(result)
+    assert percent_arm_0 < 0.52
+    assert percent_arm_0 > 0.48
+    assert result == multi_arm_bandit(
+        2, [0, 0], [0, 0], method="Thompson", seed=1, batch_size=10000
+    )
+
+    with pytest.raises(ValueError):
+        multi_arm_bandit(2, [1, 1], [1, 1], batch_size=10)
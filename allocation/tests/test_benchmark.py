@@ -0,0 +1,104 @@
+""" Test Cases for Benchmark module
+"""
+
+import inspect
+import json
+
+import pytest
+
+import allocation
+
+from ..benchmark import CASES, compare, main, run_benchmarks
+
+
+def test_run_benchmarks():
+    """ Test Cases for run_benchmarks """
+    results = run_benchmarks(sizes=[20], groups=[2, 3], repeat=1)
+    cases = {result["case"] for result in results["results"]}
+    assert cases == set(CASES)
+    for result in results["results"]:
+        assert result["seconds"] >= 0
+        assert result["peak_bytes"] >= 0
+
+    results = run_benchmarks(["block", "weis_urn"], sizes=[10, 20], groups=[2, 3])
+    keys = [(r["case"], r["n_subjects"], r["n_groups"]) for r in results["results"]]
+    assert keys == [
+        ("block", 10, 2),
+        ("block", 20, 2),
+        ("block", 10, 3),
+        ("block", 20, 3),
+        ("weis_urn", 10, 2),
+        ("weis_urn", 20, 2),
+    ]
+
+    # Larger sizes are skipped once a case is over budget.
+    results = run_benchmarks(["block"], sizes=[10, 20], groups=[2], max_seconds=0)
+    assert len(results["results"]) == 1
+
+    with pytest.raises(ValueError):
+        run_benchmarks(["unknown"])
+
+
+def test_cases_cover_public_functions():
+    """ Test that every public allocation function has a benchmark case """
+    for name in allocation.__all__:
+        if inspect.isclass(getattr(allocation, name)):
+            continue
+        # A function may have a case per method, e.g. multi_arm_bandit_ucb.
+        assert any(case == name or case.startswith(name + "_") for case in CASES), name
+
+
+def test_compare():
+    """ Test Cases for compare """
+    baseline = {
+        "results": [
+            {
+                "case": "block",
+                "n_subjects": 10,
+                "n_groups": 2,
+                "seconds": 1.0,
+                "peak_bytes": 100,
+            }
+        ]
+    }
+    results = json.loads(json.dumps(baseline))
+    assert compare(results, baseline) == []
+
+    results["results"][0]["seconds"] = 1.2
+    assert compare(results, baseline) == []
+
+    results["results"][0]["seconds"] = 1.5
+    results["results"][0]["peak_bytes"] = 200
+    regressions = compare(results, baseline)
+    assert [regression["metric"] for regression in regressions] == [
+        "seconds",
+        "peak_bytes",
+    ]
+    assert compare(results, baseline, tolerance=1.5) == []
+
+
+def test_main(tmpdir):
+    """ Test Cases for the benchmark command line """
+    output = str(tmpdir.join("results.json"))
+    args = ["--cases", "block", "--sizes", "10", "--groups", "2", "--repeat", "1"]
+    assert main(args + ["--output", output]) == 0
+    with open(output) as f:
+        baseline = json.load(f)
+    assert len(baseline["results"]) == 1
+
+    baseline["results"][0]["seconds"] = 1e-12
+    with open(output, "w") as f:
+        json.dump(baseline, f)
+    assert main(args + ["--baseline", output]) == 1
+
+    with pytest.raises(SystemExit):
+        main(args + ["--baseline", str(tmpdir.join("missing.json"))])
+
+
+def test_compare_import():
+    """ Test that a slower import is a regression """
+    baseline = {"import_seconds": 0.002, "results": []}
+    regressions = compare({"import_seconds": 0.004, "results": []}, baseline)
+    assert [regression["case"] for regression in regressions] == ["import"]
+    assert compare({"import_seconds": 0.002, "results": []}, baseline) == []
+    assert compare({"results": []}, baseline) == []
@@ -0,0 +1,79 @@
+""" Test Cases for Exact module
+"""
+
+import numpy as np
+import pytest
+
+from ..exact import analyze
+from ..metrics import predictability
+from ..simulation import simulate
+
+
+def test_analyze():
+    """ Test Cases for analyze """
+    # The first subject is a coin toss, then the second goes to group 1 with
+    # probability `bias` after a group 2 and 0.5 after a group 1.
+    analysis = analyze("efrons_biased_coin", {"n_subjects": 2, "bias": 0.8})
+    assert analysis.distribution.tolist() == pytest.approx([0.1, 0.65, 0.25])
+    assert analysis.expected_imbalance.tolist() == pytest.approx([1.0, 0.7])
+    assert analysis.imbalance_probability(0) == pytest.approx(0.65)
+    assert analysis.imbalance_probability(2) == pytest.approx(0.35)
+    assert analysis is analyze("efrons_biased_coin", {"bias": 0.8, "n_subjects": 2})
+
+    analysis = analyze("block", {"n_subjects": 10, "n_groups": 2, "block_length": 4})
+    assert analysis.balance_probability.tolist() == pytest.approx(
+        [0, 2 / 3, 0, 1, 0, 2 / 3, 0, 1, 0, 2 / 3]
+    )
+    assert analysis.correct_guess_probability[3] == 1.0
+    with pytest.raises(ValueError):
+        analysis.expected_imbalance[0] = 1
+
+    with pytest.raises(ValueError):
+        analyze("unknown", {"n_subjects": 10})
+    with pytest.raises(ValueError):
+        analyze("efrons_biased_coin", {"n_subjects": 10, "bias": 2})
+    with pytest.raises(ValueError):
+        analyze("block", {"n_subjects": 10, "n_groups": 3, "block_length": 6})
+    with pytest.raises(ValueError):
+        analyze("block", {"n_subjects": 10, "n_groups": 2, "block_length": 0})
+    with pytest.raises(ValueError):
+        analyze("efrons_biased_coin", {"bias": 0.8})
+    with pytest.raises(ValueError):
+        analyze("efrons_biased_coin", {"n_subjects": -1})
+    with pytest.raises(ValueError):
+        analyze("efrons_biased_coin", {"n_subjects": 10, "bias": [0.8]})
+
+
+def test_analysis_params_read_only():
+    """ Test that the parameters of a cached analysis cannot be changed """
+    analysis = analyze("efrons_biased_coin", {"n_subjects": 3, "bias": 0.7})
+    assert analysis.params == {"bias": 0.7}
+    with pytest.raises(TypeError):
+        analysis.params["bias"] = 0.9
+    assert analyze("efrons_biased_coin", {"n_subjects": 3, "bias": 0.7}).params == {
+        "bias": 0.7
+    }
+
+
+@pytest.mark.parametrize(
+    "design,params",
+    [
+        ("efrons_biased_coin", {}),
+        ("smiths_exponent", {"exponent": 2}),
+        ("weis_urn", {}),
+        ("block", {"n_groups": 2, "block_length": 6, "ratio": [2, 1]}),
+    ],
+)
+def test_analyze_matches_simulation(design, params):
+    """ Test Cases for analyze against simulated replicates """
+    params = dict(params, n_subjects=30)
+    analysis = analyze(design, params)
+    sequences = simulate(design, params, 20000, seed=1)
+    imbalance = np.cumsum(sequences == 1, axis=1) - np.cumsum(sequences == 2, axis=1)
+    assert analysis.distribution.sum() == pytest.approx(1)
+    assert np.allclose(
+        analysis.expected_imbalance, np.abs(imbalance).mean(axis=0), atol=0.05
+    )
+    assert analysis.selection_bias == pytest.approx(
+        predictability(sequences, [1, 2]).mean(), abs=0.005
+    )
@@ -0,0 +1,29 @@
+""" Test Cases for importing the package
+"""
+
+import pytest
+
+import allocation
+
+from .. import randomization
+from ..benchmark import measure_import
+
+
+def test_import_is_lazy():
+    """ Test that importing the package loads none of its heavy dependencies """
+    result = measure_import(repeat=1)
+    for module in ("numpy", "scipy", "concurrent.futures", "allocation.randomization"):
+        assert module not in result["modules"]
+    assert [module for module in result["modules"] if "allocation" in module] == [
+        "allocation"
+    ]
+
+
+def test_lazy_attributes():
+    """ Test Cases for the lazily imported names """
+    assert allocation.simple is randomization.simple
+    assert allocation.vectorized.simple is not allocation.simple
+    assert "StratumRegistry" in dir(allocation)
+    assert set(allocation.__all__) <= set(dir(allocation))
+    with pytest.raises(AttributeError):
+        allocation.unknown
@@ -0,0 +1,148 @@
+""" Test Cases for Instrumentation module
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+import allocation
+
+from .. import instrumentation, randomization, simulation
+from ..adaptive_allocation import Minimization
+from ..instrumentation import CountingRandom, MetricsRegistry
+
+
+@pytest.fixture
+def registry():
+    registry = instrumentation.enable()
+    yield registry
+    instrumentation.disable()
+
+
+def test_enable_disable():
+    """ Test that disabling restores the original functions """
+    simple = randomization.simple
+    group = Minimization.group
+    instrumentation.enable()
+    try:
+        assert instrumentation.enabled()
+        assert randomization.simple is not simple
+        assert allocation.simple is randomization.simple
+        assert Minimization.group is not group
+    finally:
+        instrumentation.disable()
+    assert not instrumentation.enabled()
+    assert randomization.simple is simple
+    assert allocation.simple is simple
+    assert Minimization.group is group
+
+
+def test_instrumented_functions(registry):
+    """ Test Cases for the recorded metrics """
+    expected = randomization.simple(20, 2, seed=1)
+    instrumentation.disable()
+    assert expected == randomization.simple(20, 2, seed=1)
+    instrumentation.enable(registry)
+    # The output does not change.
+    assert allocation.simple(20, 2, seed=1) == expected
+    assert registry.as_dict()["allocation_calls_total"]["simple"] == 2
+    # randint rejects some of its draws, so there are at least 2 per call.
+    assert registry.as_dict()["allocation_rng_draws_total"]["simple"] >= 40
+
+    assert randomization.simple_max_deviation(100, 0.01, 5, seed=1) is None
+    stats = randomization.RejectionStats()
+    randomization.complete_max_deviation([1, 2] * 10, 0.5, 100, 1, None, stats)
+    allocation.minimization([[1, 2], [2, 1]], seed=1)
+    Minimization([[1, 2], [2, 1]], seed=1).group
+    allocation.multi_arm_bandit(3, [1, 0, 0], [0, 1, 0], seed=1, method="Thompson")
+
+    metrics = registry.as_dict()
+    calls = metrics["allocation_calls_total"]
+    # The group nested in minimization is not recorded.
+    assert calls["minimization"] == calls["Minimization.group"] == 1
+    assert calls["multi_arm_bandit"] == 1
+    assert metrics["allocation_rejection_candidates_total"]["simple_max_deviation"] == 5
+    assert metrics["allocation_rejection_gave_up_total"]["simple_max_deviation"] == 1
+    assert (
+        metrics["allocation_rejection_candidates_total"]["complete_max_deviation"]
+        == stats.candidates
+    )
+    latency = metrics["allocation_latency_seconds"]["minimization"]
+    assert latency["count"] == 1
+    assert latency["counts"][-1] == 1
+
+    with pytest.raises(ValueError):
+        allocation.simple(10, 2, p=[1])
+    assert registry.as_dict()["allocation_errors_total"]["simple"] == 1
+
+
+def test_instrumented_output_unchanged(registry):
+    """ Test that instrumented functions return the same seeded lists """
+    expected = [
+        randomization.stratification([10, 12, 9], 2, seed=3),
+        randomization.stratification([10, 12, 9], 2, 4, 3, workers=2, executor="thread"),
+        randomization.block(20, 2, 4, seed=3),
+    ]
+    instrumentation.disable()
+    assert expected == [
+        randomization.stratification([10, 12, 9], 2, seed=3),
+        randomization.stratification([10, 12, 9], 2, 4, 3, workers=2, executor="thread"),
+        randomization.block(20, 2, 4, seed=3),
+    ]
+
+
+def test_nested_calls_recorded_once(registry):
+    """ Test that calls made by another instrumented function are not recorded """
+    randomization.stratification([10, 12, 9], 2, seed=3)
+    randomization.stratification([10, 12, 9], 2, 4, 3, workers=2, executor="thread")
+    randomization.simple_max_deviation(100, 0.01, 5, seed=1)
+    calls = registry.as_dict()["allocation_calls_total"]
+    assert calls == {"stratification": 2, "simple_max_deviation": 1}
+    # The draws of the nested simple calls count towards the outer call.
+    draws = registry.as_dict()["allocation_rng_draws_total"]
+    assert draws["simple_max_deviation"] >= 500
+    assert "stratification" not in draws
+
+
+def test_instrumented_simulation(registry):
+    """ Test that the simulations are recorded while instrumentation is on """
+    params = {"n_subjects": 20, "n_groups": 2, "block_length": 4}
+    replicates = simulation.simulate("block", params, 5, seed=1)
+    trials = simulation.simulate_trials("thompson", [0.3, 0.6], 20, 10, seed=1)
+    calls = registry.as_dict()["allocation_calls_total"]
+    assert calls == {"block": 5, "simulate_trials": 1}
+
+    instrumentation.disable()
+    assert np.array_equal(replicates, simulation.simulate("block", params, 5, seed=1))
+    expected = simulation.simulate_trials("thompson", [0.3, 0.6], 20, 10, seed=1)
+    assert np.array_equal(trials.trials, expected.trials)
+
+
+def test_metrics_registry():
+    """ Test Cases for MetricsRegistry """
+    registry = MetricsRegistry()
+    registry.inc("calls_total", "simple")
+    registry.inc("calls_total", "simple", 2)
+    registry.observe("latency_seconds", "simple", 0.002)
+    registry.observe("latency_seconds", "simple", 20)
+    text = registry.to_prometheus()
+    assert "# TYPE calls_total counter" in text
+    assert 'calls_total{function="simple"} 3' in text
+    assert 'latency_seconds_bucket{function="simple",le="0.001"} 0' in text
+    assert 'latency_seconds_bucket{function="simple",le="0.01"} 1' in text
+    assert 'latency_seconds_bucket{function="simple",le="+Inf"} 2' in text
+    assert 'latency_seconds_count{function="simple"} 2' in text
+    registry.reset()
+    assert registry.as_dict() == {}
+
+
+def test_counting_random():
+    """ Test Cases for CountingRandom """
+    rng = CountingRandom(3)
+    expected = random.Random(3)
+    assert rng.random() == expected.random()
+    assert rng.randint(1, 6) == expected.randint(1, 6)
+    values = list(range(10))
+    rng.shuffle(values)
+    assert rng.draws >= 11
@@ -0,0 +1,100 @@
+""" Test Cases for Metrics module
+"""
+
+import numpy as np
+import pytest
+
+from ..metrics import (
+    StreamingMetrics,
+    correct_guesses,
+    imbalance,
+    max_run_length,
+    predictability,
+)
+from ..vectorized import efrons_biased_coin, simple
+
+
+def test_imbalance():
+    """ Test Cases for imbalance """
+    result = imbalance([[1, 1, 2, 2], [1, 2, 1, 2]], [1, 2])
+    assert result.tolist() == [[1, 2, 1, 0], [1, 0, 1, 0]]
+
+    result = imbalance([1, 2, 3, 3, 3], [1, 2, 3])
+    assert result.tolist() == [[1, 1, 0, 1, 2]]
+
+    sequences = np.stack([simple(50, 3, seed=seed) for seed in range(20)])
+    expected = [
+        [
+            max(list(row[:i]).count(v) for v in (1, 2, 3))
+            - min(list(row[:i]).count(v) for v in (1, 2, 3))
+            for i in range(1, 51)
+        ]
+        for row in sequences
+    ]
+    assert imbalance(sequences, [1, 2, 3]).tolist() == expected
+
+
+def test_max_run_length():
+    """ Test Cases for max_run_length """
+    result = max_run_length([[1, 1, 2, 2, 2, 1], [1, 2, 1, 2, 1, 2]])
+    assert result.tolist() == [3, 1]
+    assert max_run_length(np.empty((2, 0))).tolist() == [0, 0]
+
+    sequences = efrons_biased_coin(200, 20, seed=1)
+    for row, length in zip(sequences, max_run_length(sequences)):
+        runs = [1]
+        for previous, current in zip(row, row[1:]):
+            runs.append(runs[-1] + 1 if current == previous else 1)
+        assert length == max(runs)
+
+
+def test_predictability():
+    """ Test Cases for correct_guesses and predictability """
+    # The guesses are 1 or 2, 2, 1 or 2, then 1, and 1 or 2, 2, 2, then 2.
+    result = correct_guesses([[1, 2, 2, 1], [1, 1, 2, 2]], [1, 2])
+    assert result.tolist() == [3.0, 2.5]
+    assert predictability([[1, 2, 2, 1]], [1, 2]).tolist() == [0.25]
+
+    # Permuted blocks are more predictable than coin tosses.
+    blocks = np.tile([1, 2], (200, 50))
+    coins = np.stack([simple(100, 2, seed=seed) for seed in range(200)])
+    assert predictability(blocks, [1, 2]).mean() == pytest.approx(0.25)
+    assert abs(predictability(coins, [1, 2]).mean()) < 0.05
+
+
+def test_streaming_metrics():
+    """ Test Cases for StreamingMetrics """
+    sequences = efrons_biased_coin(1000, 30, seed=2)
+    metrics = StreamingMetrics([1, 2])
+    for start in range(0, 1000, 128):
+        metrics.update(sequences[:, start : start + 128])
+    assert metrics.n_subjects == 1000
+    assert np.array_equal(
+        metrics.max_imbalance, imbalance(sequences, [1, 2]).max(axis=1)
+    )
+    assert np.array_equal(metrics.imbalance, imbalance(sequences, [1, 2])[:, -1])
+    assert np.array_equal(metrics.max_run_length, max_run_length(sequences))
+    assert np.allclose(metrics.correct_guesses, correct_guesses(sequences, [1, 2]))
+    assert np.allclose(metrics.predictability, predictability(sequences, [1, 2]))
+
+    # A run that spans chunks.
+    metrics = StreamingMetrics([1, 2])
+    for chunk in ([1, 2, 2], [2, 2], [], [2, 1]):
+        metrics.update(chunk)
+    assert metrics.max_run_length.tolist() == [5]
+
+    with pytest.raises(ValueError):
+        metrics.update([[1], [2]])
+
+
+def test_streaming_metrics_before_update():
+    """ Test that StreamingMetrics can be read before the first chunk """
+    metrics = StreamingMetrics([1, 2])
+    assert metrics.max_imbalance.tolist() == metrics.imbalance.tolist() == []
+
+    metrics = StreamingMetrics([1, 2], n_replicates=3)
+    assert metrics.max_imbalance.tolist() == metrics.imbalance.tolist() == [0, 0, 0]
+    metrics.update([[1, 1], [1, 2], [2, 2]])
+    assert metrics.imbalance.tolist() == [2, 0, 2]
+    with pytest.raises(ValueError):
+        metrics.update([[1], [2]])
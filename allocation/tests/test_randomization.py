@@ -1,14 +1,26 @@
 """ Test Cases for Randomization module
 """
 
+import random
+
 import pytest
 
 from ..randomization import (
+    RejectionStats,
+    _alias_table,
+    _block_template,
+    _scan_within_deviation,
+    _shuffle_within_deviation,
     block,
     complete,
     complete_max_deviation,
     cumsum,
+    _GroupCounts,
     efrons_biased_coin,
+    generalized_biased_coin,
+    iter_block,
+    iter_generalized_biased_coin,
+    iter_random_block,
     max_deviation,
     random_block,
     random_treatment_order,
@@ -17,6 +29,7 @@ from ..randomization import (
     smiths_exponent,
     stratification,
     weis_urn,
+    williams_design,
 )
 
 
@@ -236,6 +249,44 @@ def test_simple_max_deviation():
         simple_max_deviation(n_subjects, max_iterations=-10)
 
 
+def test_early_abort_matches_max_deviation():
+    """ Test that stopping early accepts exactly the lists max_deviation does """
+    subjects = [1, 2, 3] * 6 + [1, 2]
+    totals = {1: 7, 2: 7, 3: 6}
+    for seed in range(200):
+        for bound in [0.15, 0.3, 0.5]:
+            candidate = subjects[:]
+            random.Random(seed).shuffle(candidate)
+            expected = max_deviation(candidate, [1, 2, 3]) < bound
+
+            accepted, n_checked = _scan_within_deviation(candidate, bound)
+            assert accepted == expected
+            assert n_checked <= len(candidate)
+
+            groups, n_checked = _shuffle_within_deviation(
+                subjects, totals, bound, random.Random(seed)
+            )
+            assert (groups is not None) == expected
+            if expected:
+                assert groups == candidate
+
+
+def test_rejection_stats():
+    """ Test Cases for RejectionStats """
+    stats = RejectionStats()
+    assert stats.acceptance_rate == 0.0
+    groups = [1, 2] * 50
+    result = complete_max_deviation(groups, 0.1, max_iterations=50, stats=stats)
+    assert stats.candidates >= 1
+    assert stats.accepted == (result is not None)
+    assert stats.subjects_total == 100 * stats.candidates
+    assert 0 < stats.checked_fraction <= 1
+
+    simple_max_deviation(100, 0.3, stats=stats)
+    assert stats.as_dict()["candidates"] == stats.candidates
+    assert 0 < stats.acceptance_rate <= 1
+
+
 def test_block():
     """ Test Cases for Block Ranomization """
 
@@ -267,6 +318,76 @@ def test_random_block():
     assert max_run <= 6
 
 
+def test_random_block_weights():
+    """ Test Cases for Block Randomization with weights and ratios """
+    blocks = list(
+        iter_random_block(30000, 2, [2, 4, 6], seed=1, by_block=True, weights=[6, 3, 1])
+    )
+    counts = [0, 0, 0]
+    for this_block in blocks:
+        counts[len(this_block) // 2 - 1] += 1
+    assert abs(counts[0] / len(blocks) - 0.6) < 0.02
+    assert abs(counts[2] / len(blocks) - 0.1) < 0.02
+    blocks = iter_random_block(100, 2, [2, 4], weights=[0, 1], by_block=True)
+    assert all(len(this_block) == 4 for this_block in blocks)
+
+    result = random_block(99, 2, [3, 6], seed=1, ratio=[2, 1])
+    assert result[:96].count(1) == 64
+    assert block(12, 3, 8, seed=1, ratio=[2, 1, 1]).count(1) == 6
+    with pytest.raises(ValueError):
+        random_block(10, 2, [4], ratio=[2, 1])
+    with pytest.raises(ValueError):
+        random_block(10, 2, [4], ratio=[1, 1, 1])
+    with pytest.raises(ValueError):
+        random_block(10, 2, [2, 4], weights=[1])
+    with pytest.raises(ValueError):
+        random_block(10, 2, [2, 4], weights=[0, 0])
+
+
+def test_block_templates():
+    """ Test Cases for the cached block templates """
+    assert _block_template(2, 6) == (1, 2, 1, 2, 1, 2)
+    assert _block_template(2, 6, (2, 1)) == (1, 1, 1, 1, 2, 2)
+    # Shuffling copies the cached templates.
+    block(100, 2, 6, seed=1)
+    assert _block_template(2, 6) == (1, 2, 1, 2, 1, 2)
+
+    probability, alias = _alias_table((1, 2, 5))
+    # Each index keeps `probability` of its slot and gets the rest of the
+    # slots that alias to it.
+    for i, weight in enumerate((1, 2, 5)):
+        share = probability[i] + sum(
+            1 - p for p, a in zip(probability, alias) if a == i and p < 1
+        )
+        assert abs(share / 3 - weight / 8) < 1e-12
+
+
+def test_iter_block():
+    """ Test Cases for lazy Block Randomization """
+    for n_subjects in [0, 98, 100]:
+        result = iter_block(n_subjects, 2, 4, seed=5)
+        assert list(result) == block(n_subjects, 2, 4, seed=5)
+
+    blocks = list(iter_block(10, 2, 4, seed=5, by_block=True))
+    assert [len(this_block) for this_block in blocks] == [4, 4, 2]
+    assert sum(blocks, []) == block(10, 2, 4, seed=5)
+
+    # Without `n_subjects` the stream does not end.
+    stream = iter_block(None, 2, 4, seed=5)
+    assert [next(stream) for _ in range(100)] == block(100, 2, 4, seed=5)
+
+
+def test_iter_random_block():
+    """ Test Cases for lazy Block Randomization with Random Block Lengths"""
+    for n_subjects in [0, 99, 100]:
+        result = iter_random_block(n_subjects, 2, [2, 4], seed=5)
+        assert list(result) == random_block(n_subjects, 2, [2, 4], seed=5)
+
+    blocks = list(iter_random_block(99, 2, [2, 4], seed=5, by_block=True))
+    assert sum(blocks, []) == random_block(99, 2, [2, 4], seed=5)
+    assert all(len(this_block) in [1, 2, 3, 4] for this_block in blocks)
+
+
 def test_random_treatment_order():
     """ Test Cases for Random Treatment Order """
     result = random_treatment_order(100, 2)
@@ -333,9 +454,94 @@ def test_weis_urn():
     assert percent_group_1 > 0.48
 
 
+def test_generalized_biased_coin():
+    """ Test Cases for the Generalized Biased Coin Randomization """
+    for n_groups in [2, 3, 4]:
+        result = generalized_biased_coin(10000, n_groups, seed=1)
+        assert len(result) == 10000
+        assert set(result) == set(range(1, n_groups + 1))
+        sizes = [result.count(group) for group in range(1, n_groups + 1)]
+        assert max(sizes) - min(sizes) < 20
+
+    # A certain bias towards the smallest groups gives permuted blocks.
+    result = generalized_biased_coin(99, 3, bias=0.999999, seed=2)
+    for i in range(0, 99, 3):
+        assert sorted(result[i : i + 3]) == [1, 2, 3]
+
+    expected = generalized_biased_coin(500, 4, seed=3)
+    assert list(iter_generalized_biased_coin(500, 4, seed=3)) == expected
+    stream = iter_generalized_biased_coin(None, 4, seed=3)
+    assert [next(stream) for _ in range(500)] == expected
+
+    with pytest.raises(ValueError):
+        generalized_biased_coin(10, 1)
+    with pytest.raises(ValueError):
+        generalized_biased_coin(10, 3, bias=1)
+
+
+def test_group_counts():
+    """ Test Cases for the group sizes of the Generalized Biased Coin """
+    rng = random.Random(4)
+    counts = _GroupCounts(5)
+    for _ in range(1000):
+        counts.add(rng.choice([counts.order[0], rng.randrange(5)]))
+        assert sorted(counts.counts) == [counts.counts[g] for g in counts.order]
+        n_smallest = counts.counts.count(min(counts.counts))
+        assert counts.n_smallest() == n_smallest
+        for group in range(5):
+            assert counts.order[counts.position[group]] == group
+
+
 def test_stratification():
     """ Test Cases for Stratified Randomization """
     result = stratification([10, 12], 2)
     assert len(result) == 2
     assert len(result[0]) == 10
     assert len(result[1]) == 12
+
+
+def test_stratification_workers():
+    """ Test Cases for Stratified Randomization with workers """
+    strata = [10, 12, 0, 7, 9]
+    expected = stratification(strata, 2, seed=3)
+    assert expected == stratification(strata, 2, seed=3, workers=2)
+    assert expected == stratification(strata, 2, seed=3, workers=3, executor="thread")
+    assert stratification(strata, 2, seed=3, workers=2, as_schedule=True) == expected
+    assert [len(stratum) for stratum in expected] == strata
+    # Strata do not share a stream.
+    assert expected[0] != expected[1][:10]
+    with pytest.raises(ValueError):
+        stratification(strata, 2, executor="fork")
+
+
+def test_williams_design():
+    """ Test Cases for Williams designs """
+    for n_treatments in range(2, 8):
+        design = williams_design(n_treatments)
+        assert len(design) == n_treatments * (1 + n_treatments % 2)
+        # Each sequence is an order of the treatments, and each treatment
+        # follows each other treatment equally often.
+        followers = {}
+        for sequence in design:
+            assert sorted(sequence) == list(range(1, n_treatments + 1))
+            for pair in zip(sequence, sequence[1:]):
+                followers[pair] = followers.get(pair, 0) + 1
+        assert len(followers) == n_treatments * (n_treatments - 1)
+        assert len(set(followers.values())) == 1
+    assert williams_design(4) is williams_design(4)
+    with pytest.raises(ValueError):
+        williams_design(0)
+
+
+def test_random_treatment_order_williams():
+    """ Test Cases for Williams designs in random_treatment_order """
+    result = random_treatment_order(10, 3, seed=1, design="williams")
+    design = [list(sequence) for sequence in williams_design(3)]
+    assert sorted(result[:6]) == sorted(design)
+    assert all(order in design for order in result[6:])
+    schedule = random_treatment_order(
+        10, 3, seed=1, design="williams", as_schedule=True
+    )
+    assert schedule == result
+    with pytest.raises(ValueError):
+        random_treatment_order(10, 3, design="latin")
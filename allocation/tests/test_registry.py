@@ -0,0 +1,36 @@
+""" Test Cases for Registry module
+"""
+
+import pytest
+
+from ..randomization import stratification
+from ..registry import StratumRegistry
+
+
+def test_stratum_registry():
+    """ Test Cases for StratumRegistry """
+    factors = [["A", "B", "C"], ["Male", "Female"], 4]
+    registry = StratumRegistry(factors, 2, block_length=4, seed=1)
+    assert registry.n_strata == 24
+    assert len(registry) == 0
+    assert registry.position(("A", "Male", 0)) == 0
+    assert registry.position(("B", "Female", 3)) == 15
+
+    keys = [("B", "Female", 3), ("A", "Male", 0), ("B", "Female", 3)] * 4
+    groups = {}
+    for key in keys:
+        groups.setdefault(key, []).append(registry.allocate(key))
+    assert len(registry) == 2
+    assert ("A", "Male", 0) in registry
+    assert ("C", "Male", 0) not in registry
+    assert ("D", "Male", 0) not in registry
+
+    # The lists match those of stratification for the same seed.
+    expected = stratification([8] * 24, 2, block_length=4, seed=1)
+    assert groups[("B", "Female", 3)] == expected[15]
+    assert groups[("A", "Male", 0)] == expected[0][:4]
+
+    with pytest.raises(ValueError):
+        registry.allocate(("A", "Male"))
+    with pytest.raises(ValueError):
+        registry.allocate(("A", "Other", 0))
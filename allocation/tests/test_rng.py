@@ -0,0 +1,79 @@
+""" Test Cases for Rng module
+"""
+
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from ..adaptive_allocation import minimization
+from ..adaptive_randomization import double_biased_coin_urn, multi_arm_bandit
+from ..randomization import block, simple_max_deviation, weis_urn
+from ..rng import NumpyRandom, get_generator, get_rng
+
+
+def test_get_rng():
+    """ Test Cases for get_rng """
+    assert isinstance(get_rng(1), random.Random)
+    assert get_rng(1).random() == random.Random(1).random()
+
+    rng = random.Random(2)
+    assert get_rng(1, rng) is rng
+
+    rng = get_rng(rng=np.random.default_rng(3))
+    assert isinstance(rng, NumpyRandom)
+    assert 1 <= rng.randint(1, 3) <= 3
+    assert rng.choice(["a"]) == "a"
+    groups = [1, 2, 3, 4]
+    rng.shuffle(groups)
+    assert sorted(groups) == [1, 2, 3, 4]
+
+    with pytest.raises(TypeError):
+        get_rng(rng=3)
+
+
+def test_get_generator():
+    """ Test Cases for get_generator """
+    generator = np.random.default_rng(1)
+    assert get_generator(rng=generator) is generator
+    assert get_generator(rng=NumpyRandom(generator)) is generator
+    assert get_generator(5).random() == np.random.default_rng(5).random()
+    assert get_generator(rng=random.Random(1)).random() == (
+        get_generator(rng=random.Random(1)).random()
+    )
+
+    with pytest.raises(TypeError):
+        get_generator(rng="a")
+
+
+def test_seed_reproducible():
+    """ Test that seeded calls do not depend on the global RNG """
+    expected = weis_urn(100, seed=4)
+    random.seed(0)
+    assert weis_urn(100, seed=4) == expected
+
+    assert simple_max_deviation(100, 0.5, seed=4) == (
+        simple_max_deviation(100, 0.5, seed=4)
+    )
+    assert block(20, 2, 4, rng=random.Random(6)) == block(20, 2, 4, seed=6)
+    assert len(block(20, 2, 4, rng=np.random.default_rng(6))) == 20
+
+    assert minimization([[1, 1], [1, 1]], seed=3) == (
+        minimization([[1, 1], [1, 1]], rng=random.Random(3))
+    )
+    assert double_biased_coin_urn(5, 6, 7, 8, seed=1) == (
+        double_biased_coin_urn(5, 6, 7, 8, seed=1)
+    )
+    assert multi_arm_bandit(3, [1, 1, 1], [1, 1, 1], seed=1) == (
+        multi_arm_bandit(3, [1, 1, 1], [1, 1, 1], seed=1)
+    )
+
+
+def test_threads():
+    """ Test that concurrent seeded calls do not corrupt each other """
+    seeds = list(range(32))
+    expected = [weis_urn(500, seed=seed) for seed in seeds]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        result = list(pool.map(lambda seed: weis_urn(500, seed=seed), seeds))
+    assert result == expected
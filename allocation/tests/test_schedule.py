@@ -0,0 +1,108 @@
+""" Test Cases for Schedule module
+"""
+
+import pickle
+from array import array
+
+import numpy as np
+import pytest
+
+from ..randomization import (
+    block,
+    complete,
+    efrons_biased_coin,
+    iter_block,
+    random_treatment_order,
+    simple,
+    stratification,
+)
+from ..schedule import AllocationSchedule
+
+
+def test_allocation_schedule():
+    """ Test Cases for AllocationSchedule """
+    schedule = AllocationSchedule(array("b", [1, 2, 2, 1, 3]))
+    assert len(schedule) == 5
+    assert schedule == [1, 2, 2, 1, 3]
+    assert schedule[0] == 1
+    assert schedule[-1] == 3
+    assert schedule[1:4] == [2, 2, 1]
+    assert schedule[::2] == [1, 2, 3]
+    assert schedule.count(2) == 2
+    assert 3 in schedule
+    assert schedule.nbytes == 5
+    with pytest.raises(IndexError):
+        schedule[5]
+
+    # Slices share the buffer.
+    codes = array("b", [1, 2, 2, 1])
+    view = AllocationSchedule(codes)[2:]
+    codes[3] = 2
+    assert view == [2, 2]
+
+    schedule = AllocationSchedule(np.array([[1, 2], [2, 1], [1, 2]], dtype=np.int8))
+    assert schedule.width == 2
+    assert schedule == [[1, 2], [2, 1], [1, 2]]
+    assert schedule[1] == [2, 1]
+    assert schedule[1:] == [[2, 1], [1, 2]]
+    assert schedule[::2] == [[1, 2], [1, 2]]
+
+    with pytest.raises(ValueError):
+        AllocationSchedule(array("b", [1, 2, 3]), width=2)
+
+
+def test_from_labels():
+    """ Test Cases for AllocationSchedule.from_labels """
+    schedule = AllocationSchedule.from_labels(["a", "b", "b", "a"])
+    assert schedule == ["a", "b", "b", "a"]
+    assert schedule.codes.tolist() == [0, 1, 1, 0]
+    assert schedule.labels == ("a", "b")
+
+    schedule = AllocationSchedule.from_labels(["b", "a"], labels=["a", "b"])
+    assert schedule.codes.tolist() == [1, 0]
+    with pytest.raises(ValueError):
+        AllocationSchedule.from_labels(["b", "c"], labels=["a", "b"])
+
+    schedule = AllocationSchedule.from_labels(range(1000))
+    assert schedule.codes.format == "h"
+    assert schedule == list(range(1000))
+
+    schedule = AllocationSchedule.from_labels(iter_block(200000, 2, 4, seed=1))
+    assert schedule.nbytes == 200000
+    assert schedule == block(200000, 2, 4, seed=1)
+
+    schedule = AllocationSchedule.from_labels([1, 2] * 40000 + ["x"])
+    assert schedule[-3:] == [1, 2, "x"]
+
+
+def test_as_schedule():
+    """ Test that functions return the same assignments as a schedule """
+    for function, args in [
+        (simple, (100, 3)),
+        (block, (100, 2, 4)),
+        (efrons_biased_coin, (100,)),
+        (complete, (["a", "b", "c"] * 10,)),
+    ]:
+        result = function(*args, seed=2, as_schedule=True)
+        assert isinstance(result, AllocationSchedule)
+        assert result == function(*args, seed=2)
+
+    result = random_treatment_order(10, 3, seed=2, as_schedule=True)
+    assert result.width == 3
+    assert result == random_treatment_order(10, 3, seed=2)
+
+    result = stratification([10, 12], 2, seed=2, as_schedule=True)
+    assert result == stratification([10, 12], 2, seed=2)
+
+
+def test_allocation_schedule_pickle():
+    """ Test Cases for pickling AllocationSchedule """
+    schedule = AllocationSchedule.from_labels(["a", "b", "b", "a"])
+    copy = pickle.loads(pickle.dumps(schedule))
+    assert copy == schedule
+    assert copy.labels == ("a", "b")
+
+    rows = random_treatment_order(5, 3, seed=1, as_schedule=True)
+    copy = pickle.loads(pickle.dumps(rows))
+    assert copy.width == 3
+    assert copy == rows
@@ -0,0 +1,140 @@
+""" Test Cases for Service module
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from ..adaptive_allocation import MinimizationAllocator
+from ..registry import StratumRegistry
+from ..service import AllocationClient, AllocationService, serve
+
+
+def test_allocation_service():
+    """ Test Cases for AllocationService """
+    batches = []
+
+    async def persist(records):
+        await asyncio.sleep(0)
+        batches.append(records)
+
+    registry = StratumRegistry([3, 2], 2, seed=1)
+    expected = StratumRegistry([3, 2], 2, seed=1)
+    service = AllocationService(
+        registry, MinimizationAllocator([2], seed=1), persist, batch_size=8
+    )
+
+    async def run():
+        strata = [(i % 3, i % 2) for i in range(24)]
+        groups = await asyncio.gather(
+            *[service.enroll(stratum, subject=i) for i, stratum in enumerate(strata)]
+        )
+        minimized = await asyncio.gather(*[service.minimize([i % 2]) for i in range(4)])
+        return strata, groups, minimized
+
+    strata, groups, minimized = asyncio.run(run())
+    # Within each stratum, subjects are allocated in the order they arrived.
+    assert groups == [expected.allocate(stratum) for stratum in strata]
+    assert sorted(minimized) == [1, 1, 2, 2]
+    records = [record for batch in batches for record in batch]
+    assert len(records) == 28
+    assert max(len(batch) for batch in batches) <= 8
+    assert [record["group"] for record in records[:24]] == groups
+    assert records[0] == {
+        "subject": 0,
+        "scheme": "block",
+        "stratum": [0, 0],
+        "group": groups[0],
+    }
+
+    with pytest.raises(ValueError):
+        asyncio.run(AllocationService().enroll((0, 0)))
+    with pytest.raises(ValueError):
+        asyncio.run(service.enroll((3, 0)))
+
+
+def test_allocation_service_batches_within_stratum():
+    """ Test that a stratum keeps allocating while its records are saved """
+    batches = []
+
+    async def persist(records):
+        await asyncio.sleep(0.01)
+        batches.append([record["subject"] for record in records])
+
+    service = AllocationService(StratumRegistry([1], 2, seed=1), persist=persist)
+
+    async def run():
+        await asyncio.gather(*[service.enroll([0], subject=i) for i in range(10)])
+        # A batch that is still pending is saved by `close`.
+        task = asyncio.ensure_future(service.enroll([0], subject=10))
+        await asyncio.sleep(0)
+        await service.close()
+        await task
+
+    asyncio.run(run())
+    # One batch covers every subject that arrived together.
+    assert batches == [list(range(10)), [10]]
+
+
+def test_allocation_service_persist_error():
+    """ Test that errors when saving reach the callers """
+
+    def persist(records):
+        raise OSError("disk full")
+
+    service = AllocationService(StratumRegistry([2], 2, seed=1), persist=persist)
+    with pytest.raises(OSError):
+        asyncio.run(service.enroll([0]))
+
+
+def test_allocation_service_slow_persist():
+    """ Test that a slow synchronous persist does not block other strata """
+    released = threading.Event()
+
+    def persist(records):
+        # Blocks until another stratum has allocated, which cannot happen
+        # if the save runs on the event loop.
+        if not released.wait(1):
+            raise TimeoutError("The event loop was blocked.")
+
+    registry = StratumRegistry([2], 2, seed=1)
+    service = AllocationService(registry, persist=persist)
+
+    async def run():
+        first = asyncio.ensure_future(service.enroll([0]))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(service.enroll([1]))
+        await asyncio.sleep(0.01)
+        assert [1] in registry
+        released.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(run())
+
+
+def test_serve():
+    """ Test Cases for the JSON over socket server """
+    registry = StratumRegistry([["A", "B"], 2], 2, seed=1)
+    expected = StratumRegistry([["A", "B"], 2], 2, seed=1)
+    service = AllocationService(registry, MinimizationAllocator([2], seed=1))
+
+    async def run():
+        server = await serve(service)
+        port = server.sockets[0].getsockname()[1]
+        clients = [await AllocationClient.connect(port=port) for _ in range(3)]
+        groups = []
+        for i in range(12):
+            groups.append(await clients[i % 3].enroll(["A", i % 2], subject=i))
+        group = await clients[0].minimize([1])
+        with pytest.raises(ValueError):
+            await clients[1].enroll(["C", 0])
+        for client in clients:
+            await client.close()
+        server.close()
+        await server.wait_closed()
+        return groups, group
+
+    groups, group = asyncio.run(run())
+    assert groups == [expected.allocate(["A", i % 2]) for i in range(12)]
+    assert group in (1, 2)
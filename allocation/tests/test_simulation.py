@@ -0,0 +1,77 @@
+""" Test Cases for Simulation module
+"""
+
+import numpy as np
+import pytest
+
+from .. import simulation
+from ..randomization import weis_urn
+from ..simulation import DESIGNS, simulate, simulate_trials
+
+
+def test_simulate():
+    """ Test Cases for simulate """
+    params = {"n_subjects": 10, "n_groups": 2, "block_length": 4}
+    result = simulate("block", params, 50, seed=1)
+    assert result.shape == (50, 10)
+    assert result.dtype == np.int8
+    assert np.all(np.sum(result[:, :8] == 1, axis=1) == 4)
+    assert np.array_equal(result, simulate("block", params, 50, seed=1))
+    assert not np.array_equal(result, simulate("block", params, 50, seed=2))
+
+    result = simulate("complete", {"subjects": [1, 2, 3, 3]}, 5, seed=1)
+    assert result.shape == (5, 4)
+    assert np.all(np.sort(result, axis=1) == [1, 2, 3, 3])
+
+    result = simulate(weis_urn, {"n_subjects": 20}, 5, seed=1)
+    assert result.shape == (5, 20)
+
+    with pytest.raises(ValueError):
+        simulate("unknown", params, 5)
+    with pytest.raises(ValueError):
+        simulate("block", dict(params, seed=1), 5)
+
+
+def test_simulate_workers():
+    """ Test that the replicates do not depend on the number of workers """
+    params = {"n_subjects": 30, "bias": 0.8}
+    expected = simulate("efrons_biased_coin", params, 21, seed=7)
+    result = simulate("efrons_biased_coin", params, 21, workers=2, seed=7)
+    assert np.array_equal(result, expected)
+    result = simulate("efrons_biased_coin", params, 21, workers=3, seed=7)
+    assert np.array_equal(result, expected)
+
+
+def test_simulate_trials():
+    """ Test Cases for simulate_trials """
+    for design in DESIGNS:
+        result = simulate_trials(design, [0.2, 0.8], 40, 200, seed=1)
+        assert result.trials.shape == (200, 2)
+        assert np.all(result.trials.sum(axis=1) == 40)
+        assert np.all(result.successes <= result.trials)
+        summary = result.operating_characteristics()
+        assert summary["n_replicates"] == 200
+        assert abs(sum(summary["mean_allocation"]) - 1) < 1e-9
+        # Every design favours the better arm.
+        assert summary["best_arm_allocation"] > 0.5
+        assert 0 <= summary["rejection_rate"] <= 1
+
+    result = simulate_trials("thompson", [0.1, 0.5, 0.9], 30, 100, seed=1)
+    assert result.allocation_proportions.shape == (100, 3)
+    assert "rejection_rate" not in result.operating_characteristics()
+    with pytest.raises(ValueError):
+        result.rejection_rate()
+    with pytest.raises(ValueError):
+        simulate_trials("double_biased_coin_urn", [0.1, 0.5, 0.9], 30, 100)
+    with pytest.raises(ValueError):
+        simulate_trials("unknown", [0.1, 0.5], 30, 100)
+
+
+def test_simulate_trials_workers(monkeypatch):
+    """ Test that the trials do not depend on the number of workers """
+    monkeypatch.setattr(simulation, "_TRIAL_CHUNK_SIZE", 16)
+    expected = simulate_trials("ucb", [0.3, 0.6], 20, 50, seed=3)
+    result = simulate_trials("ucb", [0.3, 0.6], 20, 50, workers=2, seed=3)
+    assert np.array_equal(result.trials, expected.trials)
+    assert np.array_equal(result.successes, expected.successes)
+    assert simulate_trials("ucb", [0.3, 0.6], 20, 0, seed=3).trials.shape == (0, 2)
@@ -0,0 +1,102 @@
+""" Test Cases for State module
+"""
+
+import sqlite3
+
+import pytest
+
+from ..adaptive_allocation import MinimizationAllocator
+from ..adaptive_randomization import ArmTally
+from ..state import MemoryStateStore, SQLiteStateStore, StateStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryStateStore()
+        return lambda batch_size=None: store
+    path = str(tmp_path / "state.db")
+    return lambda batch_size=3: SQLiteStateStore(path, batch_size=batch_size)
+
+
+def test_state_store(make_store):
+    """ Test Cases for the state stores """
+    store = make_store()
+    store.add("a", (1, "x"))
+    store.add("a", (1, "x"), 2)
+    store.add("a", [2, "y"])
+    store.add("b", (1, "x"))
+    store.add_many("b", [((1, "x"), 2), ((3, "z"), 1)])
+    assert store.load("a") == {(1, "x"): 3, (2, "y"): 1}
+    assert store.load("c") == {}
+    store.close()
+    with make_store() as store:
+        assert store.load("b") == {(1, "x"): 3, (3, "z"): 1}
+
+
+def test_sqlite_state_store_durable(tmp_path):
+    """ Test that the default SQLiteStateStore commits every increment """
+    path = str(tmp_path / "state.db")
+    store = SQLiteStateStore(path)
+    store.add("a", (1, "x"))
+    # A second connection sees the increment without a flush or close, as
+    # a process restarted after a crash would.
+    assert SQLiteStateStore(path).load("a") == {(1, "x"): 1}
+    store.close()
+
+    with pytest.raises(TypeError):
+        StateStore()
+
+
+def test_sqlite_state_store_atomic_allocation(tmp_path):
+    """ Test that an allocation that fails partway writes none of its counts """
+    path = str(tmp_path / "state.db")
+    store = SQLiteStateStore(path)
+    allocator = MinimizationAllocator([2, 3], store=store, seed=1)
+    allocator.allocate([0, 1])
+    before = store.load("minimization")
+    counts = list(allocator.counts)
+
+    # Fail the write of the second factor, after the first has been written
+    # in the same transaction.
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TRIGGER fail BEFORE UPDATE ON counts "
+            "WHEN NEW.key LIKE '[_, 1, _]' BEGIN SELECT RAISE(ABORT, 'fail'); END"
+        )
+    with pytest.raises(sqlite3.DatabaseError):
+        allocator.allocate([1, 2])
+    assert SQLiteStateStore(path).load("minimization") == before
+    assert list(allocator.counts) == counts
+
+
+def test_minimization_allocator_store(make_store):
+    """ Test that MinimizationAllocator recovers its counts from a store """
+    store = make_store()
+    allocator = MinimizationAllocator([["Male", "Female"], 3], store=store, seed=1)
+    subjects = [["Male", 0], ["Female", 2], ["Female", 1], ["Male", 2], ["Male", 1]]
+    for levels in subjects:
+        allocator.allocate(levels)
+    allocator.record(2, ["Female", 0])
+    store.close()
+
+    with make_store() as store:
+        restored = MinimizationAllocator([["Male", "Female"], 3], store=store)
+        assert restored.counts == allocator.counts
+
+
+def test_arm_tally(make_store):
+    """ Test Cases for ArmTally """
+    store = make_store()
+    tally = ArmTally(3, store=store)
+    for arm, success in [(0, True), (2, False), (2, True), (1, False)]:
+        tally.record(arm, success)
+    assert tally.successes == [1, 0, 1]
+    assert tally.trials == [1, 1, 2]
+    assert tally.failures == [0, 1, 1]
+    store.close()
+
+    with make_store() as store:
+        restored = ArmTally(3, store=store)
+        assert restored.successes == tally.successes
+        assert restored.trials == tally.trials
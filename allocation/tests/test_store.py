@@ -0,0 +1,102 @@
+""" Test Cases for Store module
+"""
+
+import struct
+
+import pytest
+
+from ..randomization import block, iter_block
+from ..store import ScheduleFile, ScheduleWriter, write_schedule
+
+
+def test_write_schedule(tmp_path):
+    """ Test Cases for write_schedule and ScheduleFile """
+    path = str(tmp_path / "trial.sch")
+    strata = {"site 1": iter_block(10, 2, 4, seed=1), "site 2": iter_block(0, 2, 4)}
+    params = {"n_groups": 2, "block_length": 4}
+    write_schedule(path, strata, scheme="block", params=params, seed=1)
+
+    with ScheduleFile(path) as schedule:
+        assert len(schedule) == 2
+        assert schedule.strata == ["site 1", "site 2"]
+        assert schedule.header["scheme"] == "block"
+        assert schedule.header["params"] == params
+        assert schedule.header["seed"] == 1
+        assert schedule.stratum("site 1") == block(10, 2, 4, seed=1)
+        assert schedule.stratum_at(1) == []
+        assert schedule.stratum_at(0) == schedule.stratum()
+        assert schedule.assignment(3, "site 1") == block(10, 2, 4, seed=1)[3]
+        with pytest.raises(KeyError):
+            schedule.stratum("site 3")
+        with pytest.raises(KeyError):
+            schedule.stratum(1)
+        with pytest.raises(IndexError):
+            schedule.stratum_at(2)
+        with pytest.raises(IndexError):
+            schedule.assignment(10)
+
+    # Tuple names, e.g. a level of each stratification factor, survive JSON.
+    strata = {("site 1", "Female"): [1, 2], ("site 1", "Male"): [2, 1]}
+    write_schedule(path, strata)
+    with ScheduleFile(path) as schedule:
+        assert schedule.strata == [("site 1", "Female"), ("site 1", "Male")]
+        assert schedule.stratum(("site 1", "Male")) == [2, 1]
+
+    # Integer names are names, not positions.
+    write_schedule(path, {1: [1, 1], 0: [2, 2]})
+    with ScheduleFile(path) as schedule:
+        assert schedule.stratum(0) == [2, 2]
+        assert schedule.stratum_at(0) == [1, 1]
+
+
+def test_schedule_file_layout(tmp_path):
+    """ Test that the codes are fixed size little-endian integers """
+    path = tmp_path / "trial.sch"
+    write_schedule(str(path), [[1, 300, -2]], dtype="<i2")
+    with ScheduleFile(str(path)) as schedule:
+        assert schedule.header["dtype"] == "<i2"
+        offset = schedule.header["strata"][0]["offset"]
+        assert schedule.stratum() == [1, 300, -2]
+    data = path.read_bytes()
+    assert data[offset : offset + 6] == struct.pack("<3h", 1, 300, -2)
+
+    with pytest.raises(ValueError):
+        write_schedule(str(path), [[1, 2]], dtype="l")
+
+
+def test_schedule_writer(tmp_path):
+    """ Test Cases for ScheduleWriter """
+    path = str(tmp_path / "trial.sch")
+    with ScheduleWriter(path, labels=["Control", "Treatment"]) as writer:
+        writer.write_stratum(iter(["Treatment", "Control", "Control"]))
+        writer.write_stratum(["Control"] * 100000)
+
+    with ScheduleFile(path) as schedule:
+        assert schedule.strata == [0, 1]
+        assert schedule.stratum() == ["Treatment", "Control", "Control"]
+        assert schedule.stratum().codes.tolist() == [1, 0, 0]
+        assert len(schedule.stratum(1)) == 100000
+        assert schedule.assignment(99999, 1) == "Control"
+
+    with ScheduleWriter(path) as writer:
+        with pytest.raises(ValueError):
+            writer.write_stratum([1, 200])
+    with ScheduleWriter(path, labels=["Control", "Treatment"]) as writer:
+        with pytest.raises(ValueError):
+            writer.write_stratum(["Placebo"])
+
+
+def test_schedule_file_invalid(tmp_path):
+    """ Test Cases for ScheduleFile with files that are not schedules """
+    path = tmp_path / "trial.sch"
+    path.write_bytes(b"not a schedule file at all, not even close")
+    with pytest.raises(ValueError):
+        ScheduleFile(str(path))
+
+    # A writer that fails leaves a file without a header.
+    with pytest.raises(RuntimeError):
+        with ScheduleWriter(str(path)) as writer:
+            writer.write_stratum([1, 2])
+            raise RuntimeError
+    with pytest.raises(ValueError):
+        ScheduleFile(str(path))
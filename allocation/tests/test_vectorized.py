@@ -0,0 +1,233 @@
+""" Test Cases for Vectorized module
+"""
+
+import numpy as np
+import pytest
+
+from .. import randomization
+from ..adaptive_randomization.double_biased_coin import DoubleBiasedCoin
+from ..vectorized import (
+    _double_biased_coin_rates,
+    double_biased_coin_minimize,
+    double_biased_coin_minimize_cut,
+    double_biased_coin_urn,
+    double_biased_coin_urn_cut,
+    efrons_biased_coin,
+    generalized_biased_coin,
+    max_deviation,
+    random_block,
+    random_treatment_order,
+    simple,
+    smiths_exponent,
+    weis_urn,
+)
+
+
+def test_simple():
+    """ Test Cases for vectorized Simple Randomization"""
+    result = simple(100, 2)
+    assert len(result) == 100
+    assert result.dtype == np.int8
+    assert set(result.tolist()) == {1, 2}
+
+    # The same seed must give the same list.
+    assert np.array_equal(simple(1000, 3, seed=42), simple(1000, 3, seed=42))
+
+    result = simple(100000, 2, seed=1)
+    percent_group_1 = np.mean(result == 1)
+    assert percent_group_1 < 0.52
+    assert percent_group_1 > 0.48
+
+    result = simple(100000, 2, p=[0.3, 0.7], seed=1)
+    percent_group_1 = np.mean(result == 1)
+    assert percent_group_1 < 0.32
+    assert percent_group_1 > 0.28
+
+    result = simple(100000, 3, p=[1, 2, 1], seed=1)
+    assert set(result.tolist()) == {1, 2, 3}
+    percent_group_2 = np.mean(result == 2)
+    assert percent_group_2 < 0.52
+    assert percent_group_2 > 0.48
+
+    assert simple(10, 300).dtype == np.int16
+
+    with pytest.raises(ValueError):
+        simple(100, 3, p=[0.5, 0.5])
+
+
+def test_max_deviation():
+    """ Test Cases for vectorized max_deviation"""
+    candidates = [randomization.simple(50, 3, seed=seed) for seed in range(20)]
+    result = max_deviation(np.array(candidates), [1, 2, 3])
+    assert result.shape == (20,)
+    for candidate, dev in zip(candidates, result):
+        assert abs(randomization.max_deviation(candidate, [1, 2, 3]) - dev) < 1e-12
+
+    # A single list is scored as one row.
+    result = max_deviation(candidates[0], [1, 2, 3])
+    assert result.shape == (1,)
+
+    # Labels missing from a row do not contribute.
+    result = max_deviation([[1, 1, 2, 2], [1, 1, 1, 1]], [1, 2])
+    assert abs(result[0] - 0.5) < 1e-12
+    assert result[1] == 0
+
+
+def test_sequential_designs():
+    """ Test that one replicate matches the pure Python designs draw for draw """
+    for seed in range(5):
+        for bias in [None, 0.8]:
+            expected = randomization.efrons_biased_coin(
+                200, bias, rng=np.random.default_rng(seed)
+            )
+            result = efrons_biased_coin(200, 1, bias, rng=np.random.default_rng(seed))
+            assert result[0].tolist() == expected
+
+        for exponent in [None, 2]:
+            expected = randomization.smiths_exponent(
+                200, exponent, rng=np.random.default_rng(seed)
+            )
+            result = smiths_exponent(200, 1, exponent, rng=np.random.default_rng(seed))
+            assert result[0].tolist() == expected
+
+        expected = randomization.weis_urn(200, rng=np.random.default_rng(seed))
+        result = weis_urn(200, 1, rng=np.random.default_rng(seed))
+        assert result[0].tolist() == expected
+
+
+def test_sequential_designs_replicates():
+    """ Test Cases for the replicate-vectorized sequential designs """
+    for design in [efrons_biased_coin, smiths_exponent, weis_urn]:
+        result = design(1000, 50, seed=3)
+        assert result.shape == (50, 1000)
+        assert result.dtype == np.int8
+        percent_group_1 = np.mean(result == 1, axis=1)
+        assert np.all(percent_group_1 < 0.55)
+        assert np.all(percent_group_1 > 0.45)
+        assert np.array_equal(result, design(1000, 50, seed=3))
+
+    with pytest.raises(ValueError):
+        efrons_biased_coin(10, 10, 1)
+    with pytest.raises(ValueError):
+        smiths_exponent(10, 10, exponent="a")
+
+
+def test_generalized_biased_coin():
+    """ Test Cases for the replicate-vectorized generalized biased coin """
+    result = generalized_biased_coin(300, 3, 2000, seed=1)
+    assert result.shape == (2000, 300)
+    assert result.dtype == np.int8
+    assert np.array_equal(result, generalized_biased_coin(300, 3, 2000, seed=1))
+    sizes = np.stack([np.sum(result == group, axis=1) for group in [1, 2, 3]])
+    assert np.all(sizes.max(axis=0) - sizes.min(axis=0) < 20)
+
+    # The imbalance matches that of the pure Python design.
+    expected = [
+        randomization.generalized_biased_coin(300, 3, rng=np.random.default_rng(i))
+        for i in range(2000)
+    ]
+    expected = np.stack(
+        [np.sum(np.array(expected) == group, axis=1) for group in [1, 2, 3]]
+    )
+    assert np.mean(sizes.max(axis=0) - sizes.min(axis=0)) == pytest.approx(
+        np.mean(expected.max(axis=0) - expected.min(axis=0)), abs=0.15
+    )
+
+    with pytest.raises(ValueError):
+        generalized_biased_coin(10, 1, 10)
+    with pytest.raises(ValueError):
+        generalized_biased_coin(10, 3, 10, bias=0)
+
+
+def test_double_biased_coin():
+    """ Test Cases for the vectorized Double Biased Coin methods """
+    generator = np.random.default_rng(0)
+    control_trials = generator.integers(0, 20, size=200)
+    control_success = generator.integers(0, control_trials + 1)
+    treatment_trials = generator.integers(0, 20, size=200)
+    treatment_success = generator.integers(0, treatment_trials + 1)
+
+    p_c, p_t = _double_biased_coin_rates(
+        control_success, control_trials, treatment_success, treatment_trials
+    )
+    minimize_cut = double_biased_coin_minimize_cut(p_c, p_t)
+    urn_cut = double_biased_coin_urn_cut(p_c, p_t)
+    for idx in range(200):
+        dbc = DoubleBiasedCoin(
+            control_success[idx],
+            control_trials[idx],
+            treatment_success[idx],
+            treatment_trials[idx],
+        )
+        assert (dbc.p_c, dbc.p_t) == (p_c[idx], p_t[idx])
+        if dbc.p_c + dbc.p_t > 0:
+            expected = np.sqrt(dbc.p_c) / (np.sqrt(dbc.p_c) + np.sqrt(dbc.p_t))
+            assert abs(minimize_cut[idx] - expected) < 1e-12
+        if dbc.p_c + dbc.p_t < 2:
+            expected = (1 - dbc.p_t) / ((1 - dbc.p_t) + (1 - dbc.p_c))
+            assert abs(urn_cut[idx] - expected) < 1e-12
+
+    for method in [double_biased_coin_minimize, double_biased_coin_urn]:
+        result = method(
+            control_success, control_trials, treatment_success, treatment_trials
+        )
+        assert result.shape == (200,)
+        assert set(result.tolist()) <= {"Control", "Treatment"}
+
+        result = method(np.full(10000, 5), 10, 5, np.full(10000, 10), "C", "T", seed=2)
+        percent_control = np.mean(result == "C")
+        assert percent_control < 0.52
+        assert percent_control > 0.48
+
+        with pytest.raises(ValueError):
+            method([6, 1], [5, 1], [7, 1], [8, 1])
+        with pytest.raises(ValueError):
+            method([5, 1], [6, 1], [9, 1], [8, 1])
+
+
+def test_random_treatment_order():
+    """ Test Cases for the vectorized random_treatment_order """
+    for n_treatments in (3, 10):
+        result = random_treatment_order(1000, n_treatments, seed=1)
+        assert result.shape == (1000, n_treatments)
+        assert result.dtype == np.int8
+        assert (np.sort(result, axis=1) == np.arange(1, n_treatments + 1)).all()
+    # All 6 orders of 3 treatments turn up about equally often.
+    _, counts = np.unique(
+        random_treatment_order(6000, 3, seed=1), axis=0, return_counts=True
+    )
+    assert len(counts) == 6
+    assert counts.min() > 800
+
+    result = random_treatment_order(10, 4, seed=1, design="williams")
+    design = np.tile(randomization.williams_design(4), (2, 1))
+    assert (np.sort(result[:8], axis=0) == np.sort(design, axis=0)).all()
+    with pytest.raises(ValueError):
+        random_treatment_order(10, 3, design="latin")
+
+
+def test_random_block():
+    """ Test Cases for the vectorized random_block """
+    for n_subjects in (0, 1, 99, 1000):
+        result = random_block(n_subjects, 2, [2, 4, 6], seed=1)
+        assert len(result) == n_subjects
+        # Every prefix is at most 3 subjects away from balance.
+        imbalance = np.cumsum(np.where(result == 1, 1, -1))
+        assert (np.abs(imbalance) <= 3).all()
+
+    result = random_block(30000, 3, [3, 6], ratio=[1, 1, 1], weights=[1, 3], seed=1)
+    assert set(np.unique(result)) == {1, 2, 3}
+    result = random_block(3000, 2, [3, 6], ratio=[2, 1], seed=1)
+    assert (np.bincount(result) == [0, 2000, 1000]).all()
+    # Every block is balanced, however far into the list it is.
+    result = random_block(10 ** 6, 2, [4], seed=2)
+    assert (np.sum(result.reshape(-1, 4) == 1, axis=1) == 2).all()
+
+    with pytest.raises(ValueError):
+        random_block(10, 2, [0, 4])
+    with pytest.raises(ValueError):
+        random_block(10, 2, [])
+    with pytest.raises(ValueError):
+        random_block(10, 2, [2, 4], weights=[1])
+    with pytest.raises(ValueError):
+        random_block(10, 2, [2, 4], weights=[-1, 2])
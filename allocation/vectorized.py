@@ -0,0 +1,618 @@
+"""
+Vectorized is a module that provides NumPy implementations of the functions
+in the randomization module.  They are meant for very long lists, or many
+lists at once, where the per-subject cost of the pure Python versions
+dominates.
+"""
+
+import numbers
+from functools import lru_cache
+from itertools import permutations
+
+import numpy as np
+
+from .constants import CONTROL, TREATMENT
+from .randomization import (
+    _block_template,
+    _check_generalized_biased_coin,
+    _ratio,
+    williams_design,
+)
+from .rng import get_generator
+
+# The largest number of treatments whose orders are drawn from a table of all
+# permutations.  8! rows of 8 labels take 315 KiB.
+_MAX_TABLE_TREATMENTS = 8
+
+
+def label_dtype(n_groups):
+    """Returns the smallest signed integer dtype able to hold the labels
+    ``1, ..., n_groups``.
+
+    Args:
+        n_groups: The number of groups.
+
+    Returns:
+        numpy.dtype: int8, int16, int32 or int64.
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_groups <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def simple(n_subjects, n_groups, p=None, seed=None, rng=None):
+    """Create a randomization list using simple randomization.
+
+    This is the vectorized counterpart of
+    :func:`allocation.randomization.simple`.  All assignments are drawn in a
+    single call to the RNG.
+
+    Args:
+        n_subjects: The number of subjects to randomize.
+        n_groups: The number of groups to randomize subjects to.
+        p: (optional) The probability that a subject will be randomized to a
+            group.  The length of p must be equal to n_groups.
+        seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+
+    Raises:
+        ValueError: If the length of `p` is not equal to `n_groups`.
+
+    Returns:
+        numpy.ndarray: an array of length `n_subjects` of integers
+            representing the groups each subject is assigned to.  The labels
+            are ``1, ..., n_groups`` stored in the smallest integer dtype
+            that holds them.
+    """
+    rng = get_generator(seed, rng)
+    dtype = label_dtype(n_groups)
+    if p is None:
+        return rng.integers(1, n_groups, size=n_subjects, dtype=dtype, endpoint=True)
+
+    if len(p) != n_groups:
+        raise ValueError("The length of `p` must be equal to `n_groups`.")
+    # Normalize p to 1 so that the last cut point is exactly 1.0
+    cut_points = np.cumsum(p, dtype=np.float64)
+    cut_points /= cut_points[-1]
+    # A draw is assigned to the first group whose cut point is not below it.
+    groups = np.searchsorted(cut_points, rng.random(n_subjects), side="left")
+    groups += 1
+    return groups.astype(dtype, copy=False)
+
+
+def max_deviation(sequences, values):
+    """Calculate the maximum deviation of each row of a 2-D array of lists.
+
+    This is the batched counterpart of
+    :func:`allocation.randomization.max_deviation`.  Each row of `sequences`
+    is a candidate randomization list and is scored independently, so a whole
+    round of rejection sampling can be scored in one call.
+
+    The running count of each group is the cumulative sum of its one-hot
+    indicator along the rows, which replaces the per-index inner loop.
+
+    Args:
+        sequences: An array of shape ``(n_replicates, n_subjects)`` of group
+            labels.  A 1-D array is treated as a single row.
+        values: The group labels to calculate the deviation over.
+
+    Returns:
+        numpy.ndarray: an array of length `n_replicates` with the maximum
+            deviation of each row.  Groups that do not appear in a row do not
+            contribute to its deviation.
+    """
+    sequences = np.atleast_2d(np.asarray(sequences))
+    n_replicates, n_subjects = sequences.shape
+    deviations = np.zeros(n_replicates, dtype=np.float64)
+    if n_subjects == 0:
+        return deviations
+
+    positions = np.arange(1, n_subjects + 1, dtype=np.float64)
+    for value in values:
+        # One group at a time keeps the working set at one
+        # (n_replicates, n_subjects) array instead of one per group.
+        counts = np.cumsum(sequences == value, axis=1, dtype=np.float64)
+        totals = counts[:, -1].copy()
+        expected = positions * (totals[:, np.newaxis] / n_subjects)
+        np.subtract(counts, expected, out=counts)
+        np.abs(counts, out=counts)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value_deviation = counts.max(axis=1) / totals
+        value_deviation[totals == 0] = 0
+        np.maximum(deviations, value_deviation, out=deviations)
+    return deviations
+
+
+def random_block(
+    n_subjects, n_groups, block_lengths, weights=None, ratio=None, seed=None, rng=None
+):
+    """Create a randomization list by block randomization with random blocks.
+
+    This is the vectorized counterpart of
+    :func:`allocation.randomization.random_block`.  The block lengths are
+    drawn in one call, the blocks are laid out side by side from their
+    templates, and every block is shuffled by a single sort by block number
+    and then by uniform keys.
+
+    Args:
+        n_subjects: The number of subjects to randomize.
+        n_groups: The number of groups to randomize subjects to.
+        block_lengths: A list of the length of the blocks.
+        weights: (optional) The relative probability of each block length.
+            The default is to choose block lengths uniformly.
+        ratio: (optional) The allocation ratio of the groups within each
+            block, e.g. ``[2, 1]``.  The default is equal allocation.
+        seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+
+    Raises:
+        ValueError: If `block_lengths` is empty or a block length is less
+            than 1.
+        ValueError: If the length of `weights` is not equal to the length of
+            `block_lengths`, or the weights are negative or all 0.
+        ValueError: If the length of `ratio` is not equal to `n_groups`, or a
+            block length is not a multiple of its sum.
+
+    Returns:
+        numpy.ndarray: an array of length `n_subjects` of the groups each
+            subject is assigned to, in the smallest integer dtype that holds
+            the labels.
+    """
+    rng = get_generator(seed, rng)
+    dtype = label_dtype(n_groups)
+    block_lengths = np.asarray(block_lengths, dtype=np.int64)
+    if len(block_lengths) == 0 or block_lengths.min() < 1:
+        raise ValueError("`block_lengths` must all be at least 1.")
+    p = None
+    if weights is not None:
+        if len(weights) != len(block_lengths):
+            raise ValueError("The length of `weights` must match `block_lengths`.")
+        p = np.asarray(weights, dtype=np.float64)
+        if (p < 0).any() or p.sum() <= 0:
+            raise ValueError("`weights` must be non-negative and not all 0.")
+        p = p / p.sum()
+
+    # One row per block length, padded to the longest.
+    ratio = _ratio(ratio)
+    templates = np.zeros((len(block_lengths), block_lengths.max()), dtype=dtype)
+    for row, block_length in enumerate(block_lengths.tolist()):
+        templates[row, :block_length] = _block_template(n_groups, block_length, ratio)
+
+    # Draw enough blocks to cover every subject; at most one batch is wasted.
+    kinds = np.empty(0, dtype=np.int64)
+    covered = 0
+    while covered < n_subjects:
+        n_blocks = max(1, -(-(n_subjects - covered) // int(block_lengths.min())))
+        batch = rng.choice(len(block_lengths), size=n_blocks, p=p)
+        kinds = np.concatenate([kinds, batch])
+        covered += int(block_lengths[batch].sum())
+    lengths = block_lengths[kinds]
+    ends = np.cumsum(lengths)
+    n_blocks = int(np.searchsorted(ends, n_subjects)) + 1 if n_subjects else 0
+    kinds, lengths, ends = kinds[:n_blocks], lengths[:n_blocks], ends[:n_blocks]
+
+    # The block of each subject and its position within the block.
+    block_ids = np.repeat(np.arange(n_blocks), lengths)
+    positions = np.arange(len(block_ids)) - np.repeat(ends - lengths, lengths)
+    groups = templates[kinds[block_ids], positions]
+    # Sorting by block, then by a uniform key, shuffles each block within
+    # itself.  Adding the key to the block number instead could round up to
+    # the next block.
+    order = np.lexsort((rng.random(len(block_ids)), block_ids))
+    return groups[order][:n_subjects]
+
+
+@lru_cache(maxsize=None)
+def _permutation_table(n_treatments):
+    """Returns a read-only array of every order of ``1, ..., n_treatments``,
+    one per row."""
+    table = np.array(
+        list(permutations(range(1, n_treatments + 1))),
+        dtype=label_dtype(n_treatments),
+    )
+    table.flags.writeable = False
+    return table
+
+
+def random_treatment_order(
+    n_subjects, n_treatments, seed=None, rng=None, design="random"
+):
+    """Create a randomization list for studies where the subject recieves
+    multiple treatments.
+
+    This is the vectorized counterpart of
+    :func:`allocation.randomization.random_treatment_order`.  With up to 8
+    treatments, each subject's order is a random row of a cached table of
+    all :math:`n!` orders.  With more, the orders are the argsort of a
+    matrix of uniform draws.
+
+    Args:
+        n_subjects: The number of subjects to randomize.
+        n_treatments: The number of treatments a subject will recieve.
+        seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+        design: (optional) "random" to give each subject an independent
+            random order, or "williams" to block randomize subjects to the
+            sequences of
+            :func:`allocation.randomization.williams_design`.  The default is
+            "random".
+
+    Raises:
+        ValueError: If `design` is not "random" or "williams".
+
+    Returns:
+        numpy.ndarray: an array of shape ``(n_subjects, n_treatments)`` of
+            the treatment order of each subject, in the smallest integer
+            dtype that holds the labels.  It can be wrapped in an
+            :class:`allocation.schedule.AllocationSchedule`.
+    """
+    if design not in ("random", "williams"):
+        raise ValueError('`design` must be "random" or "williams".')
+    rng = get_generator(seed, rng)
+    dtype = label_dtype(n_treatments)
+
+    if design == "williams":
+        sequences = np.array(williams_design(n_treatments), dtype=dtype)
+        n_sequences = len(sequences)
+        # Each block of subjects gets every sequence once, in random order.
+        n_blocks = -(-n_subjects // n_sequences)
+        rows = np.argsort(rng.random((n_blocks, n_sequences)), axis=1)
+        return sequences[rows.ravel()[:n_subjects]]
+    if n_treatments <= _MAX_TABLE_TREATMENTS:
+        table = _permutation_table(n_treatments)
+        return table[rng.integers(len(table), size=n_subjects)]
+    orders = np.argsort(rng.random((n_subjects, n_treatments)), axis=1)
+    orders += 1
+    return orders.astype(dtype)
+
+
+def efrons_biased_coin(n_subjects, n_replicates, bias=None, seed=None, rng=None):
+    """Create many randomization lists using Efron's Biased Coin.
+
+    This is the replicate-vectorized counterpart of
+    :func:`allocation.randomization.efrons_biased_coin`.  The lists are
+    generated side by side, one subject at a time, with the state of each
+    list held in a vector of counts.
+
+    Args:
+        n_subjects: The number of subjects to randomize.
+        n_replicates: The number of lists to generate.
+        bias: (optional) The probability the new subject will be assigned to
+            the under represented group.  The default is 0.67.
+        seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+
+    Raises:
+        ValueError: If the length of `bias` is not in [0, 1].
+
+    Returns:
+        numpy.ndarray: an int8 array of shape ``(n_replicates, n_subjects)``
+            of the groups each subject is assigned to.
+    """
+    if bias is None:
+        bias = 0.67
+    elif bias >= 1 or bias <= 0:
+        raise ValueError("`bias` must be in [0, 1].")
+    rng = get_generator(seed, rng)
+
+    groups = np.empty((n_subjects, n_replicates), dtype=np.int8)
+    group_0_count = np.zeros(n_replicates, dtype=np.int64)
+    for i in range(n_subjects):
+        if i == 0:
+            cut = 0.5
+        else:
+            # The same comparisons as `group_0_count / (i + 1)` against 0.5,
+            # done on integers.
+            twice_count = 2 * group_0_count
+            cut = np.where(twice_count < i + 1, 1 - bias, bias)
+            cut[twice_count == i + 1] = 0.5
+        in_group_1 = rng.random(n_replicates) > cut
+        np.subtract(2, in_group_1, out=groups[i], casting="unsafe")
+        group_0_count += in_group_1
+    return groups.T
+
+
+def smiths_exponent(n_subjects, n_replicates, exponent=None, seed=None, rng=None):
+    """Create many randomization lists using Smith's Exponent.
+
+    This is the replicate-vectorized counterpart of
+    :func:`allocation.randomization.smiths_exponent`.
+
+    Args:
+        n_subjects: The number of subjects to randomize.
+        n_replicates: The number of lists to generate.
+        exponent: (optional) Smith's Exponent (:math:`\\rho`).
+            The default is 1.
+        seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+
+    Raises:
+        ValueError: If `exponent` is not a number.
+
+    Returns:
+        numpy.ndarray: an int8 array of shape ``(n_replicates, n_subjects)``
+            of the groups each subject is assigned to.
+    """
+    if exponent is None:
+        exponent = 1
+    elif not isinstance(exponent, numbers.Number):
+        raise ValueError("`exponent` must be a number.")
+    rng = get_generator(seed, rng)
+
+    groups = np.empty((n_subjects, n_replicates), dtype=np.int8)
+    group_0_count = np.zeros(n_replicates, dtype=np.float64)
+    for i in range(n_subjects):
+        # The plus one is to account for zero indexing.
+        weight_0 = group_0_count**exponent
+        cut = weight_0 / (weight_0 + (i + 1 - group_0_count) ** exponent)
+        in_group_1 = rng.random(n_replicates) > cut
+        np.subtract(2, in_group_1, out=groups[i], casting="unsafe")
+        group_0_count += in_group_1
+    return groups.T
+
+
+def weis_urn(n_subjects, n_replicates, seed=None, rng=None):
+    """Create many randomization lists using Wei's Urn.
+
+    This is the replicate-vectorized counterpart of
+    :func:`allocation.randomization.weis_urn`.
+
+    Args:
+        n_subjects: The number of subjects to randomize.
+        n_replicates: The number of lists to generate.
+        seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+
+    Returns:
+        numpy.ndarray: an int8 array of shape ``(n_replicates, n_subjects)``
+            of the groups each subject is assigned to.
+    """
+    rng = get_generator(seed, rng)
+
+    groups = np.empty((n_subjects, n_replicates), dtype=np.int8)
+    group_0_count = np.zeros(n_replicates, dtype=np.int64)
+    for i in range(n_subjects):
+        if i > 0:
+            cut = 1 - group_0_count / (i + 1)
+        else:
+            cut = 0.5
+        in_group_1 = rng.random(n_replicates) < cut
+        np.subtract(2, in_group_1, out=groups[i], casting="unsafe")
+        group_0_count += in_group_1
+    return groups.T
+
+
+def generalized_biased_coin(
+    n_subjects, n_groups, n_replicates, bias=None, seed=None, rng=None
+):
+    """Create many randomization lists using a generalized biased coin.
+
+    This is the replicate-vectorized counterpart of
+    :func:`allocation.randomization.generalized_biased_coin`.  The lists are
+    generated side by side, one subject at a time, with the group sizes of
+    each list held in a matrix of counts.
+
+    Args:
+        n_subjects: The number of subjects to randomize.
+        n_groups: The number of groups to randomize subjects to.
+        n_replicates: The number of lists to generate.
+        bias: (optional) The probability the new subject will be assigned to
+            one of the smallest groups.  The default is 0.67.
+        seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+
+    Raises:
+        ValueError: If `n_groups` is less than 2, or `bias` is not in
+            [0, 1].
+
+    Returns:
+        numpy.ndarray: an array of shape ``(n_replicates, n_subjects)`` of
+            the groups each subject is assigned to, in the dtype of
+            :func:`label_dtype`.
+    """
+    bias = _check_generalized_biased_coin(n_groups, bias)
+    rng = get_generator(seed, rng)
+
+    groups = np.empty((n_subjects, n_replicates), dtype=label_dtype(n_groups))
+    counts = np.zeros((n_replicates, n_groups), dtype=np.int64)
+    replicates = np.arange(n_replicates)
+    for i in range(n_subjects):
+        smallest = counts == counts.min(axis=1, keepdims=True)
+        n_smallest = smallest.sum(axis=1)
+        # Balanced lists choose among all groups, which are all smallest.
+        to_smallest = (rng.random(n_replicates) < bias) | (n_smallest == n_groups)
+        eligible = np.where(to_smallest[:, np.newaxis], smallest, ~smallest)
+        n_eligible = np.where(to_smallest, n_smallest, n_groups - n_smallest)
+        # Pick the eligible group of a random rank.
+        rank = (rng.random(n_replicates) * n_eligible).astype(np.int64)
+        group = np.argmax(np.cumsum(eligible, axis=1) > rank[:, np.newaxis], axis=1)
+        counts[replicates, group] += 1
+        groups[i] = group + 1
+    return groups.T
+
+
+def _success_rates(successes, trials):
+    """Returns the success rate of each arm, or 0.5 for arms with at most one
+    trial, as :class:`DoubleBiasedCoin` does."""
+    successes = np.asarray(successes, dtype=np.float64)
+    trials = np.asarray(trials, dtype=np.float64)
+    rates = np.full(np.broadcast(successes, trials).shape, 0.5)
+    np.divide(successes, trials, out=rates, where=trials > 1)
+    return rates
+
+
+def _double_biased_coin_rates(
+    control_success, control_trials, treatment_success, treatment_trials
+):
+    if np.any(np.less(control_trials, control_success)):
+        raise ValueError(
+            "'control_trials' must be greater than or equal to 'control_success'"
+        )
+    if np.any(np.less(treatment_trials, treatment_success)):
+        raise ValueError(
+            "'treatment_trials' must be greater than or equal to 'treatment_success'"
+        )
+    p_c = _success_rates(control_success, control_trials)
+    p_t = _success_rates(treatment_success, treatment_trials)
+    return p_c, p_t
+
+
+def double_biased_coin_minimize_cut(p_c, p_t):
+    """Returns the probability of assigning the control group under the Double
+    Biased Coin Minimization method, for arrays of success rates."""
+    sqrt_c = np.sqrt(p_c)
+    denom = sqrt_c + np.sqrt(p_t)
+    # With no successes in either group there is nothing to favour.
+    cut = np.full(denom.shape, 0.5)
+    np.divide(sqrt_c, denom, out=cut, where=denom > 0)
+    return cut
+
+
+def double_biased_coin_urn_cut(p_c, p_t):
+    """Returns the probability of assigning the control group under the Double
+    Biased Coin Urn method, for arrays of success rates."""
+    fail_t = 1 - np.asarray(p_t)
+    denom = fail_t + (1 - np.asarray(p_c))
+    # With no failures in either group there is nothing to favour.
+    cut = np.full(denom.shape, 0.5)
+    np.divide(fail_t, denom, out=cut, where=denom > 0)
+    return cut
+
+
+def _double_biased_coin(
+    cut_function,
+    control_success,
+    control_trials,
+    treatment_success,
+    treatment_trials,
+    control_name,
+    treatment_name,
+    seed,
+    rng,
+):
+    p_c, p_t = _double_biased_coin_rates(
+        control_success, control_trials, treatment_success, treatment_trials
+    )
+    cut = cut_function(p_c, p_t)
+    rng = get_generator(seed, rng)
+    return np.where(
+        rng.random(cut.shape) < cut,
+        control_name or CONTROL,
+        treatment_name or TREATMENT,
+    )
+
+
+def double_biased_coin_minimize(
+    control_success,
+    control_trials,
+    treatment_success,
+    treatment_trials,
+    control_name=None,
+    treatment_name=None,
+    seed=None,
+    rng=None,
+):
+    """Returns group assignments for many trials at once using the Double
+    Biased Coin Minimization method.
+
+    This is the vectorized counterpart of
+    :func:`allocation.adaptive_randomization.double_biased_coin_minimize`.
+    The counts are arrays with one element per trial (or site, or arm), and
+    all of the cut points and draws are computed in one pass.
+
+    Args:
+        control_success: An array of the number of successfull trials in the
+            control group.
+        control_trials: An array of the number of trials in the control group.
+        treatment_success: An array of the number of successfull trials in
+            the treatment group.
+        treatment_trials: An array of the number of trials in the treatment
+            group.
+        control_name: (optional) The name of the control group.  The default
+            is 'Control'
+        treatment_name: (optional) The name of the treatment group.  The
+            default is 'Treatment'
+        seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+
+    Raises:
+        ValueError: If any of the trials are fewer than the successes.
+
+    Returns:
+        numpy.ndarray: the name (either `control_name` or `treatment_name`) of
+            the group assigned in each trial.
+    """
+    return _double_biased_coin(
+        double_biased_coin_minimize_cut,
+        control_success,
+        control_trials,
+        treatment_success,
+        treatment_trials,
+        control_name,
+        treatment_name,
+        seed,
+        rng,
+    )
+
+
+def double_biased_coin_urn(
+    control_success,
+    control_trials,
+    treatment_success,
+    treatment_trials,
+    control_name=None,
+    treatment_name=None,
+    seed=None,
+    rng=None,
+):
+    """Returns group assignments for many trials at once using the Double
+    Biased Coin Urn method.
+
+    This is the vectorized counterpart of
+    :func:`allocation.adaptive_randomization.double_biased_coin_urn`.
+    The counts are arrays with one element per trial (or site, or arm), and
+    all of the cut points and draws are computed in one pass.
+
+    Args:
+        control_success: An array of the number of successfull trials in the
+            control group.
+        control_trials: An array of the number of trials in the control group.
+        treatment_success: An array of the number of successfull trials in
+            the treatment group.
+        treatment_trials: An array of the number of trials in the treatment
+            group.
+        control_name: (optional) The name of the control group.  The default
+            is 'Control'
+        treatment_name: (optional) The name of the treatment group.  The
+            default is 'Treatment'
+        seed: (optional) The seed to provide to the RNG.
+        rng: (optional) A `random.Random` or `numpy.random.Generator` to draw
+            from.  When given, `seed` is ignored.
+
+    Raises:
+        ValueError: If any of the trials are fewer than the successes.
+
+    Returns:
+        numpy.ndarray: the name (either `control_name` or `treatment_name`) of
+            the group assigned in each trial.
+    """
+    return _double_biased_coin(
+        double_biased_coin_urn_cut,
+        control_success,
+        control_trials,
+        treatment_success,
+        treatment_trials,
+        control_name,
+        treatment_name,
+        seed,
+        rng,
+    )
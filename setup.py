@@ -31,19 +31,18 @@ setup(
     long_description=README,
     zip_safe=False,
     keywords='statistics randomization experimental-design',
-    install_requires=['scipy'],
+    install_requires=['numpy'],
     classifiers=[
         'Environment :: Web Environment',
         'Intended Audience :: Developers',
         'Intended Audience :: Science/Research',
         'License :: OSI Approved :: GNU General Public License v3 (GPLv3)',
         'Operating System :: OS Independent',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Topic :: Internet :: WWW/HTTP',
         'Topic :: Internet :: WWW/HTTP :: Dynamic Content',
     ],
-    python_requires=">=3.6",
+    python_requires=">=3.7",
     tests_require=tests_require,
     test_suite='runtests.main',
 )